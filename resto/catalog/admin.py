@@ -1,5 +1,8 @@
-from django.contrib import admin
-from .models import Category, MenuItem, StockMovement
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from . import ledger, stock
+from .forms import MenuItemForm
+from .models import Category, MenuItem, StockCheckpoint, StockMovement, StockReservation
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -11,9 +14,34 @@ class MenuItemAdmin(admin.ModelAdmin):
     list_display = ('id','name','category','price','stock_qty','is_active')
     list_filter = ('category','is_active')
     search_fields = ('name',)
+    form = MenuItemForm
+
+    def save_model(self, request, obj, form, change):
+        # perubahan stok lewat admin dicatat sebagai ADJUST supaya ledger tidak drift
+        if not change:
+            super().save_model(request, obj, form, change)
+            ledger.record_adjustment(obj, 0, request.user, "Stok awal via admin")
+            return
+        # selisih terhadap stok saat form dibuka, diterapkan dengan F() (tidak menimpa checkout)
+        try:
+            stock.adjust(obj.pk, form.stock_delta(), request.user, "Edit stok via admin")
+        except ValidationError as ve:
+            messages.error(request, " ".join(ve.messages))
+        form.save_except_stock()
+        obj.refresh_from_db(fields=['stock_qty'])
 
 @admin.register(StockMovement)
 class StockMovementAdmin(admin.ModelAdmin):
     list_display = ('id','menu_item','move_type','qty','created_at','user')
     list_filter = ('move_type',)
-    search_fields = ('menu_item__name',)
\ No newline at end of file
+    search_fields = ('menu_item__name',)
+
+@admin.register(StockCheckpoint)
+class StockCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('id','menu_item','movement_id','balance','created_at')
+    search_fields = ('menu_item__name',)
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('id','menu_item','holder','qty','expires_at')
+    search_fields = ('menu_item__name','holder')
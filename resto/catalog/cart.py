@@ -0,0 +1,121 @@
+"""
+Keranjang pelanggan di cache, bukan di session database.
+
+Sebelumnya setiap klik "Tambah" menulis ulang baris ``django_session`` dan
+browser anonim ikut mengisi tabel itu. Sekarang:
+
+- Browser diberi cookie ``CART_COOKIE_NAME`` berisi id acak, hanya saat
+  keranjang pertama kali diisi (melihat menu tidak membuat apa-apa).
+- Isi keranjang disimpan di cache alias ``carts`` dengan format ringkas
+  ``"<menu_id>:<qty>,<menu_id>:<qty>"``. Setiap penulisan memperpanjang TTL
+  (``CART_TTL``), jadi keranjang yang ditinggalkan hilang sendiri.
+- Database baru disentuh saat checkout (Order + OrderItem).
+
+Pakai cache bersama (Redis/Memcached/FileBasedCache) untuk alias ``carts``
+kalau aplikasi berjalan di lebih dari satu proses; LocMemCache hanya per proses.
+"""
+import re
+import secrets
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+CART_COOKIE_NAME = getattr(settings, 'CART_COOKIE_NAME', 'resto_cart')
+CART_TTL = getattr(settings, 'CART_TTL', 60 * 60 * 24 * 3)
+CART_CACHE_ALIAS = 'carts'
+_CART_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+def encode(items):
+    return ','.join(f'{pk}:{qty}' for pk, qty in items.items() if qty > 0)
+
+
+def decode(raw):
+    items = {}
+    for part in (raw or '').split(','):
+        pk, _, qty = part.partition(':')
+        try:
+            pk, qty = int(pk), int(qty)
+        except ValueError:
+            continue
+        if qty > 0:
+            items[pk] = qty
+    return items
+
+
+def _cache():
+    return caches[CART_CACHE_ALIAS]
+
+
+def _key(cid):
+    return f'cart:{cid}'
+
+
+def _cart_id(request):
+    cid = getattr(request, '_cart_id', None)
+    if cid is None:
+        cid = request.COOKIES.get(CART_COOKIE_NAME, '')
+        request._cart_id = cid if _CART_ID.match(cid) else ''
+    return request._cart_id
+
+
+def cart_id(request):
+    """Id keranjang browser ini; dibuat (dan cookie dikirim) kalau belum ada."""
+    if not _cart_id(request):
+        request._cart_id = secrets.token_urlsafe(18)
+        request._cart_touched = True
+    return request._cart_id
+
+
+def get_cart(request):
+    """Isi keranjang sebagai dict {menu_item_id: qty} (salinan, aman diubah)."""
+    if not hasattr(request, '_cart'):
+        cid = _cart_id(request)
+        request._cart = decode(_cache().get(_key(cid))) if cid else {}
+    return dict(request._cart)
+
+
+def save_cart(request, items):
+    """Simpan keranjang; keranjang kosong langsung dihapus dari cache."""
+    items = {int(pk): int(qty) for pk, qty in items.items() if int(qty) > 0}
+    if not items:
+        if _cart_id(request):
+            _cache().delete(_key(_cart_id(request)))
+        request._cart = {}
+        return
+    _cache().set(_key(cart_id(request)), encode(items), CART_TTL)
+    request._cart = items
+    request._cart_touched = True
+
+
+def clear_cart(request):
+    save_cart(request, {})
+
+
+class CartMiddleware:
+    """Kirim/perpanjang cookie id keranjang setiap kali keranjang ditulis."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.set_cookie(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.set_cookie(request, await self.get_response(request))
+
+    def set_cookie(self, request, response):
+        if getattr(request, '_cart_touched', False):
+            response.set_cookie(
+                CART_COOKIE_NAME, request._cart_id, max_age=CART_TTL,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
@@ -1,3 +1,6 @@
+import csv
+import io
+
 from django import forms
 from .models import Category, MenuItem
 
@@ -14,6 +17,12 @@ class MenuItemForm(forms.ModelForm):
             "description": forms.Textarea(attrs={"rows": 3})
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # stok saat form dibuka ikut dikirim (input hidden "initial-stock_qty"),
+        # supaya yang disimpan selisihnya, bukan angka absolut (lihat stock_delta)
+        self.fields["stock_qty"].show_hidden_initial = True
+
     def clean_price(self):
         v = self.cleaned_data["price"]
         if v < 0:
@@ -25,3 +34,81 @@ class MenuItemForm(forms.ModelForm):
         if v < 0:
             raise forms.ValidationError("Stok tidak boleh negatif.")
         return v
+
+    def stock_delta(self):
+        """Stok yang diisi dikurangi stok yang ditampilkan saat form dibuka."""
+        field = self.fields["stock_qty"]
+        raw = field.hidden_widget().value_from_datadict(self.data, self.files,
+                                                       self.add_initial_prefix("stock_qty"))
+        try:
+            shown = field.to_python(raw)
+        except forms.ValidationError:
+            shown = None
+        if shown is None:
+            shown = self.initial.get("stock_qty") or 0
+        return self.cleaned_data["stock_qty"] - shown
+
+    def save_except_stock(self):
+        """Simpan field selain stock_qty; stok diubah lewat stock.adjust(stock_delta())."""
+        obj = self.save(commit=False)
+        obj.save(update_fields=[f for f in self._meta.fields if f != "stock_qty"])
+        return obj
+
+
+class BulkStockForm(forms.Form):
+    """
+    Restock / stok opname banyak menu sekaligus. Baris berasal dari input
+    ``qty_<id>`` di tabel dan/atau file CSV dengan kolom ``menu_item_id,qty``
+    (kolom lain, mis. nama, diabaikan).
+    """
+    MODE_RESTOCK = "restock"
+    MODE_COUNT = "count"
+    MODE_CHOICES = [
+        (MODE_RESTOCK, "Restock (tambah stok, movement IN)"),
+        (MODE_COUNT, "Stok opname (set ke hasil hitung, movement ADJUST)"),
+    ]
+
+    CSV_EXTRA = object()
+
+    mode = forms.ChoiceField(choices=MODE_CHOICES, initial=MODE_RESTOCK)
+    note = forms.CharField(max_length=255, required=False)
+    csv_file = forms.FileField(required=False, label="File CSV")
+
+    def clean_csv_file(self):
+        f = self.cleaned_data.get("csv_file")
+        if not f:
+            return []
+        try:
+            text = f.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise forms.ValidationError("File CSV harus UTF-8.")
+        # kolom berlebih (mis. koma di akhir baris "1,5,") dikumpulkan di restkey lalu diabaikan
+        reader = csv.DictReader(io.StringIO(text), restkey=self.CSV_EXTRA)
+        fields = {(name or "").strip().lower() for name in reader.fieldnames or []}
+        if not {"menu_item_id", "qty"} <= fields:
+            raise forms.ValidationError("CSV wajib punya kolom menu_item_id dan qty.")
+        lines, errors = [], []
+        for row in reader:
+            row = {(k or "").strip().lower(): (v or "").strip()
+                   for k, v in row.items() if k != self.CSV_EXTRA}
+            if not row["menu_item_id"] and not row["qty"]:
+                continue
+            try:
+                lines.append((int(row["menu_item_id"]), int(row["qty"])))
+            except ValueError:
+                errors.append(f"Baris {reader.line_num}: menu_item_id/qty harus angka.")
+        if errors:
+            raise forms.ValidationError(errors[:10])
+        return lines
+
+    def lines(self):
+        """Gabungan baris dari tabel (input kosong dilewati) dan CSV."""
+        lines = []
+        for key, raw in self.data.items():
+            if not key.startswith("qty_") or not raw.strip():
+                continue
+            try:
+                lines.append((int(key[4:]), int(raw)))
+            except ValueError:
+                raise forms.ValidationError(f"Qty {key[4:]} harus angka.")
+        return lines + self.cleaned_data["csv_file"]
@@ -0,0 +1,206 @@
+"""
+Pipeline gambar menu.
+
+- Upload disimpan berdasarkan hash isi file (``menu/<hash>.<ext>``), jadi file
+  yang sama persis hanya tersimpan sekali.
+- Turunan berukuran tetap (thumb/card, WEBP) dibuat di background thread
+  setelah commit, bukan di request upload.
+- Nama file berbasis hash tidak pernah berubah isinya, sehingga aman diberi
+  header cache jangka panjang (immutable).
+- Gambar lama (nama upload biasa) dipindah dulu ke nama hash sebelum turunannya
+  dibuat (``migrate_original``), jadi nama turunan selalu diturunkan dari hash.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 20
+DERIVED_DIR = 'menu/derived'
+# nama -> lebar (px); tinggi mengikuti rasio asli
+DERIVATIVES = {'thumb': 160, 'card': 480, 'card2x': 960}
+CARD_WIDTH = DERIVATIVES['card']
+DERIVED_FORMAT = 'WEBP'
+DERIVED_QUALITY = 80
+
+HASHED_NAME_RE = re.compile(r'^menu/(derived/)?[0-9a-f]{%d}(-\d+)?\.[0-9a-z]+$' % HASH_LENGTH)
+
+
+def content_hash(content):
+    """Hash sha256 (dipotong) dari isi django File."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class _AlreadyStored(Exception):
+    """File dengan nama hash ini sudah ada (isinya pasti sama)."""
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """
+    FileSystemStorage yang menamai file dengan hash isinya, apa pun nama
+    upload-nya. Upload file yang sudah ada tidak ditulis ulang, cukup memakai
+    nama yang sama. Turunan (``menu/derived/``) memakai nama dari hash file
+    aslinya (lihat ``derived_name``).
+    """
+    def save(self, name, content, max_length=None):
+        if content is None:
+            return super().save(name, content, max_length=max_length)
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if not is_derived_name(name):
+            ext = os.path.splitext(name)[1].lower()
+            name = posixpath.join(posixpath.dirname(name), content_hash(content) + ext)
+        if self.exists(name):
+            return name
+        try:
+            return super().save(name, content, max_length=max_length)
+        except _AlreadyStored:
+            # upload bersamaan dengan isi yang sama sudah menulis file ini duluan
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # nama berbasis hash: file yang sama = isi yang sama, tidak perlu suffix acak.
+        # Jangan pernah mengembalikan nama yang sudah ada: _save akan mengulang terus.
+        if is_hashed_name(name):
+            if self.exists(name):
+                raise _AlreadyStored(name)
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+
+menu_image_storage = ContentHashStorage()
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.match(name or ''))
+
+
+def is_derived_name(name):
+    return is_hashed_name(name) and posixpath.dirname(name) == DERIVED_DIR
+
+
+def derived_name(name, width):
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return f"{DERIVED_DIR}/{stem}-{width}.{DERIVED_FORMAT.lower()}"
+
+
+def _delete_derivatives(name, storage):
+    for width in DERIVATIVES.values():
+        old = derived_name(name, width)
+        if storage.exists(old):
+            storage.delete(old)
+
+
+def migrate_original(name, storage=menu_image_storage):
+    """
+    Pindahkan gambar lama yang namanya bukan hash ke ``menu/<hash>.<ext>``:
+    semua MenuItem yang memakainya diarahkan ke nama baru (update(), tanpa
+    signal), lalu file lama dan turunan lamanya dihapus. Mengembalikan nama
+    yang berlaku (sama dengan ``name`` kalau sudah hash / file tidak ada).
+    """
+    from .models import MenuItem
+
+    if not name or is_hashed_name(name) or not storage.exists(name):
+        return name
+    with storage.open(name, 'rb') as fh:
+        new_name = storage.save(name, fh)
+    if new_name != name:
+        MenuItem.objects.filter(image=name).update(image=new_name)
+        storage.delete(name)
+        _delete_derivatives(name, storage)
+    return new_name
+
+
+def generate_derivatives(name, storage=menu_image_storage):
+    """
+    Buat semua ukuran turunan untuk satu gambar berbasis hash (yang belum ada
+    saja; gambar lama lewat ``migrate_original`` dulu). Mengembalikan jumlah
+    file yang dibuat.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    missing = [w for w in DERIVATIVES.values() if not storage.exists(derived_name(name, w))]
+    if not missing:
+        return 0
+    try:
+        with storage.open(name, 'rb') as fh:
+            original = Image.open(fh)
+            original.load()
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Gagal membuka gambar %s: %s", name, exc)
+        return 0
+
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+    created = 0
+    for width in missing:
+        img = original.copy()
+        if img.width > width:
+            img.thumbnail((width, round(img.height * width / img.width)), Image.LANCZOS)
+        buf = BytesIO()
+        img.save(buf, DERIVED_FORMAT, quality=DERIVED_QUALITY, method=4)
+        storage.save(derived_name(name, width), ContentFile(buf.getvalue()))
+        created += 1
+    return created
+
+
+def responsive(name, storage=menu_image_storage):
+    """
+    Data untuk tag <img>: src (ukuran card kalau sudah ada) dan srcset.
+    Selama turunan belum dibuat, dipakai file aslinya.
+    """
+    if not name:
+        return None
+    url = storage.url(name)
+    available = [(w, derived_name(name, w)) for w in DERIVATIVES.values()
+                 if storage.exists(derived_name(name, w))]
+    if not available:
+        return {'url': url, 'src': url, 'srcset': ''}
+    srcset = ', '.join(f"{storage.url(n)} {w}w" for w, n in available)
+    card = dict(available).get(CARD_WIDTH, available[-1][1])
+    return {'url': url, 'src': storage.url(card), 'srcset': srcset}
+
+
+# ---------- background ----------
+_executor = None
+
+
+def _build_and_refresh(name):
+    from . import menu_cache
+    try:
+        new_name = migrate_original(name)
+        if generate_derivatives(new_name) or new_name != name:
+            # nama gambar / srcset di snapshot menu publik perlu dihitung ulang
+            menu_cache.invalidate()
+    except Exception:
+        logger.exception("Gagal membuat turunan gambar %s", name)
+
+
+def schedule_derivatives(name):
+    """
+    Jadwalkan pembuatan turunan di luar request. Dengan
+    ``MENU_IMAGE_SYNC = True`` (mis. di test) langsung dikerjakan.
+    """
+    global _executor
+    if getattr(settings, 'MENU_IMAGE_SYNC', False):
+        _build_and_refresh(name)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='menu-images')
+    _executor.submit(_build_and_refresh, name)
@@ -0,0 +1,128 @@
+"""
+Ledger stok: checkpoint saldo dan rekonsiliasi dengan MenuItem.stock_qty.
+
+Saldo ledger = jumlah StockMovement bertanda (IN +, OUT -, ADJUST apa adanya).
+Daripada menjumlah seluruh histori, saldo yang diharapkan dihitung dari
+StockCheckpoint terakhir per item ditambah movement dengan id lebih besar dari
+checkpoint itu. Semua item dihitung dalam SATU query (subquery per item yang
+memakai index menu_item_id pada StockMovement).
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import menu_cache
+from .models import MenuItem, StockCheckpoint, StockMovement
+
+# movement yang lebih baru dari ini belum dimasukkan ke checkpoint: transaksi
+# yang masih berjalan bisa saja commit dengan id lebih kecil dari id terbesar
+CHECKPOINT_SAFETY = datetime.timedelta(minutes=5)
+
+
+def signed_qty():
+    return Case(
+        When(move_type=StockMovement.MOVE_OUT, then=-F('qty')),
+        default=F('qty'),
+        output_field=IntegerField(),
+    )
+
+
+def _movement_sum(upper=None):
+    moves = StockMovement.objects.filter(menu_item=OuterRef('pk'),
+                                         id__gt=Coalesce(OuterRef('cp_movement'), Value(0)))
+    if upper is not None:
+        moves = moves.filter(id__lte=upper)
+    moves = moves.order_by().values('menu_item').annotate(total=Sum(signed_qty())).values('total')
+    return Coalesce(Subquery(moves, output_field=IntegerField()), Value(0))
+
+
+def with_expected(queryset=None, upper=None):
+    """
+    Anotasi MenuItem dengan ``expected`` (saldo ledger) dan ``cp_movement``.
+    ``upper``: hanya movement sampai id ini (untuk membuat checkpoint).
+    """
+    queryset = MenuItem.objects.all() if queryset is None else queryset
+    latest = StockCheckpoint.objects.filter(menu_item=OuterRef('pk')).order_by('-movement_id')
+    if upper is not None:
+        latest = latest.filter(movement_id__lte=upper)
+    return (queryset
+            .annotate(cp_movement=Subquery(latest.values('movement_id')[:1]),
+                      cp_balance=Subquery(latest.values('balance')[:1]))
+            .annotate(expected=Coalesce(F('cp_balance'), Value(0)) + _movement_sum(upper)))
+
+
+class Drift:
+    def __init__(self, item_id, name, stock_qty, expected):
+        self.item_id = item_id
+        self.name = name
+        self.stock_qty = stock_qty
+        self.expected = expected
+
+    @property
+    def delta(self):
+        """stock_qty - saldo ledger (positif: stok lebih banyak dari catatan)."""
+        return self.stock_qty - self.expected
+
+
+def find_drift(queryset=None):
+    rows = with_expected(queryset).values_list('id', 'name', 'stock_qty', 'expected').order_by('id')
+    return [Drift(*row) for row in rows if row[2] != row[3]]
+
+
+def create_checkpoints(now=None):
+    """
+    Simpan saldo semua item sampai movement terbaru yang sudah lewat
+    CHECKPOINT_SAFETY. Mengembalikan jumlah checkpoint baru.
+    """
+    now = now or timezone.now()
+    upper = (StockMovement.objects.filter(created_at__lt=now - CHECKPOINT_SAFETY)
+             .order_by('-id').values_list('id', flat=True).first())
+    if upper is None:
+        return 0
+    rows = (with_expected(upper=upper)
+            .filter(Q(cp_movement__isnull=True) | Q(cp_movement__lt=upper))
+            .values_list('id', 'expected'))
+    checkpoints = [StockCheckpoint(menu_item_id=item_id, movement_id=upper, balance=balance)
+                   for item_id, balance in rows]
+    StockCheckpoint.objects.bulk_create(checkpoints, batch_size=1000, ignore_conflicts=True)
+    return len(checkpoints)
+
+
+def repair_stock(drifts):
+    """
+    Samakan stock_qty dengan saldo ledger dalam satu UPDATE. Baris yang
+    stock_qty-nya sudah berubah sejak dibaca (mis. ada checkout) dilewati.
+    """
+    if not drifts:
+        return 0
+    guard = Q()
+    for d in drifts:
+        guard |= Q(pk=d.item_id, stock_qty=d.stock_qty)
+    with transaction.atomic():
+        updated = MenuItem.objects.filter(guard).update(
+            stock_qty=Case(*[When(pk=d.item_id, then=Value(d.expected)) for d in drifts],
+                           default=F('stock_qty')),
+        )
+    menu_cache.invalidate()
+    return updated
+
+
+def repair_ledger(drifts, user, note='Rekonsiliasi stok'):
+    """Anggap stock_qty benar (hasil hitung fisik): catat selisihnya sebagai ADJUST."""
+    return StockMovement.objects.bulk_create([
+        StockMovement(menu_item_id=d.item_id, user=user, move_type=StockMovement.MOVE_ADJUST,
+                      qty=d.delta, note=note)
+        for d in drifts if d.delta
+    ])
+
+
+def record_adjustment(item, old_qty, user, note):
+    """Catat perubahan stock_qty langsung (form edit/admin) sebagai ADJUST."""
+    delta = item.stock_qty - (old_qty or 0)
+    if delta:
+        StockMovement.objects.create(menu_item=item, user=user, move_type=StockMovement.MOVE_ADJUST,
+                                     qty=delta, note=note)
+    return delta
@@ -0,0 +1,77 @@
+import math
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from catalog import search
+from catalog.models import Category, MenuItem
+from resto.bench import throwaway_database
+
+WORDS = [
+    'nasi', 'goreng', 'ayam', 'bakar', 'madu', 'sate', 'satay', 'kambing', 'sapi', 'ikan',
+    'mie', 'jawa', 'tahu', 'tempe', 'sambal', 'balado', 'rendang', 'soto', 'bakso', 'es',
+    'teh', 'lemon', 'kopi', 'susu', 'jeruk', 'alpukat', 'cheesecake', 'panna', 'cotta',
+    'spring', 'roll', 'kentang', 'bruschetta', 'tomat', 'pedas', 'manis', 'gurih', 'spesial',
+]
+CATEGORIES = [('Masakan', 'MAIN'), ('Pembuka', 'APP'), ('Minuman', 'DRINK'), ('Penutup', 'DESSERT')]
+QUERIES = ['na', 'nasi gor', 'satay', 'sate kam', 'es te', 'kopi susu', 'mie jawa', 'pedas', 'ren', 'xyz']
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    # persentil nearest-rank: sampel ke-ceil(0.95 n)
+    return statistics.mean(samples), samples[math.ceil(0.95 * len(samples)) - 1]
+
+
+class Command(BaseCommand):
+    help = "Benchmark pencarian menu: icontains+join vs indeks full-text, di database sementara."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rnd = random.Random(opts['seed'])
+        with throwaway_database() as conn:
+            cats = [Category.objects.create(name=n, code=c) for n, c in CATEGORIES]
+            MenuItem.objects.bulk_create([
+                MenuItem(
+                    category=rnd.choice(cats),
+                    name=' '.join(rnd.sample(WORDS, 3)).title() + f' {i}',
+                    description=' '.join(rnd.sample(WORDS, 6)),
+                    price=Decimal(rnd.randrange(5, 80) * 1000),
+                    stock_qty=rnd.randrange(0, 50),
+                )
+                for i in range(opts['items'])
+            ], batch_size=1000)
+
+            started = time.perf_counter()
+            search.rebuild_index()
+            self.stdout.write(f"backend {conn.vendor}: indeks {opts['items']} item "
+                              f"dalam {time.perf_counter() - started:.2f} s")
+            self.stdout.write(f"{'query':<12} {'hasil':>6} {'icontains ms (p95)':>20} {'indeks ms (p95)':>20}")
+
+            for q in QUERIES:
+                def legacy():
+                    return list(MenuItem.objects.filter(
+                        Q(name__icontains=q) | Q(description__icontains=q) | Q(category__name__icontains=q)
+                    ).values_list('id', flat=True))
+
+                def indexed():
+                    return search.search_ids(q)
+
+                hits = len(indexed())
+                legacy_mean, legacy_p95 = _timed(legacy, opts['repeat'])
+                index_mean, index_p95 = _timed(indexed, opts['repeat'])
+                self.stdout.write(f"{q:<12} {hits:>6} {legacy_mean:>11.2f} ({legacy_p95:>6.2f}) "
+                                  f"{index_mean:>11.2f} ({index_p95:>6.2f})")
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, transaction
+
+from catalog.models import Category, MenuItem, StockMovement
+from catalog.stock import deduct_stock
+from resto.bench import run_threads, throwaway_database
+
+
+def _checkout_setbased(item_id, user):
+    with transaction.atomic():
+        deduct_stock([(item_id, 1)], user, note='bench')
+
+
+def _checkout_legacy(item_id, user):
+    # Pola lama pos_checkout: baca, kurangi di Python, save(), create()
+    with transaction.atomic():
+        item = MenuItem.objects.get(pk=item_id)
+        if item.stock_qty < 1:
+            raise ValidationError("Stok habis.")
+        item.stock_qty -= 1
+        item.save(update_fields=['stock_qty'])
+        StockMovement.objects.create(menu_item=item, user=user,
+                                     move_type=StockMovement.MOVE_OUT, qty=1, note='bench')
+
+
+class Command(BaseCommand):
+    help = ("Benchmark konkurensi pengurangan stok: banyak thread checkout "
+            "item 'hot' yang sama di database sementara.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--checkouts', type=int, default=50, help='checkout per thread')
+        parser.add_argument('--stock', type=int, default=500, help='stok awal item hot')
+        parser.add_argument('--mode', choices=['setbased', 'legacy'], default='setbased')
+
+    def handle(self, *args, **opts):
+        checkout = _checkout_setbased if opts['mode'] == 'setbased' else _checkout_legacy
+
+        with throwaway_database():
+            user = get_user_model().objects.create_user(username='bench', password='bench')
+            cat = Category.objects.create(name='Bench', code='BENCH')
+            item = MenuItem.objects.create(category=cat, name='Hot Item',
+                                           price=Decimal('10000'), stock_qty=opts['stock'])
+
+            def worker(_):
+                ok = refused = errors = 0
+                for _ in range(opts['checkouts']):
+                    try:
+                        checkout(item.id, user)
+                        ok += 1
+                    except ValidationError:
+                        refused += 1
+                    except DatabaseError:
+                        errors += 1
+                return ok, refused, errors
+
+            results, elapsed = run_threads(worker, opts['threads'])
+            ok = sum(r[0] for r in results)
+            refused = sum(r[1] for r in results)
+            errors = sum(r[2] for r in results)
+
+            item.refresh_from_db()
+            moved = sum(StockMovement.objects.filter(menu_item=item).values_list('qty', flat=True))
+            expected_stock = opts['stock'] - ok
+            correct = (item.stock_qty == expected_stock and moved == ok and item.stock_qty >= 0)
+
+            self.stdout.write(f"mode          : {opts['mode']}")
+            self.stdout.write(f"threads       : {opts['threads']} x {opts['checkouts']} checkout")
+            self.stdout.write(f"sukses        : {ok}")
+            self.stdout.write(f"ditolak (stok): {refused}")
+            self.stdout.write(f"error DB      : {errors}")
+            self.stdout.write(f"stok akhir    : {item.stock_qty} (seharusnya {expected_stock})")
+            self.stdout.write(f"movement OUT  : {moved}")
+            self.stdout.write(f"checkout/detik: {ok / elapsed:.1f} ({elapsed:.2f} s)")
+            if correct:
+                self.stdout.write(self.style.SUCCESS("BENAR: tidak ada lost update / oversell."))
+            else:
+                self.stdout.write(self.style.ERROR("SALAH: stok dan ledger tidak konsisten."))
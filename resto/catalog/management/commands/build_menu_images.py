@@ -0,0 +1,51 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+
+from catalog import images, menu_cache
+from catalog.models import MenuItem
+
+
+class Command(BaseCommand):
+    help = ("Pindahkan gambar menu lama ke nama berbasis hash (duplikat jadi satu file, "
+            "file & turunan lama dihapus), lalu buat semua ukuran turunan dan hapus turunan "
+            "yang tidak dipakai. --prune juga menghapus gambar asli yang tidak dipakai.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true',
+                            help='hapus juga gambar asli di media/menu yang tidak direferensikan MenuItem mana pun')
+
+    def handle(self, *args, prune=False, **opts):
+        storage = images.menu_image_storage
+        renamed = 0
+        for item in MenuItem.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image'):
+            name = item.image.name
+            # semua item yang memakai file lama yang sama ikut dipindah (update(), tanpa signal)
+            if images.migrate_original(name, storage) != name:
+                renamed += 1
+
+        names = set(MenuItem.objects.exclude(image='').exclude(image__isnull=True)
+                    .values_list('image', flat=True))
+        created = sum(images.generate_derivatives(name) for name in sorted(names) if storage.exists(name))
+
+        # turunan bisa dibuat ulang kapan saja, jadi yang tidak dipakai (mis. dari nama
+        # gambar lama) selalu dihapus; gambar asli hanya dengan --prune
+        removed = freed = 0
+        keep = set(names)
+        keep.update(images.derived_name(n, w) for n in names for w in images.DERIVATIVES.values())
+        for directory in ('menu', images.DERIVED_DIR) if prune else (images.DERIVED_DIR,):
+            if not storage.exists(directory):
+                continue
+            _, files = storage.listdir(directory)
+            for filename in files:
+                path = posixpath.join(directory, filename)
+                if path not in keep:
+                    freed += storage.size(path)
+                    storage.delete(path)
+                    removed += 1
+
+        menu_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"{renamed} gambar dipindah ke nama hash, {created} turunan dibuat, "
+            f"{removed} file tak terpakai dihapus ({freed / 1024:.0f} KiB)."
+        ))
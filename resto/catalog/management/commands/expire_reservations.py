@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from catalog import reservations
+
+
+class Command(BaseCommand):
+    help = ("Hapus reservasi stok yang sudah kedaluwarsa (per batch). Reservasi "
+            "kedaluwarsa sudah tidak dihitung; perintah ini hanya membersihkan tabel. "
+            "Jadwalkan via cron, mis. tiap 5 menit.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size=1000, **opts):
+        deleted = reservations.expire(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} reservasi kedaluwarsa dihapus."))
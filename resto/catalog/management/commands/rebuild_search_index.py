@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from catalog import search
+
+
+class Command(BaseCommand):
+    help = "Bangun ulang indeks pencarian menu (MenuSearchDocument + FTS) untuk semua MenuItem."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size=1000, **opts):
+        count = search.rebuild_index(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{count} dokumen menu diindeks."))
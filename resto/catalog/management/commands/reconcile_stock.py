@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from catalog import ledger
+
+
+class Command(BaseCommand):
+    help = ("Bandingkan MenuItem.stock_qty dengan saldo ledger StockMovement "
+            "(checkpoint terakhir + movement sesudahnya) untuk semua menu sekaligus. "
+            "Opsional: perbaiki selisih dan/atau simpan checkpoint baru.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', choices=['stock', 'ledger'],
+                            help="stock: samakan stock_qty ke ledger; "
+                                 "ledger: catat selisih sebagai ADJUST (stock_qty dianggap benar)")
+        parser.add_argument('--user', help='username pencatat ADJUST (default: superuser pertama)')
+        parser.add_argument('--checkpoint', action='store_true',
+                            help='simpan checkpoint saldo baru setelah rekonsiliasi')
+        parser.add_argument('--limit', type=int, default=50, help='maks. baris selisih yang ditampilkan')
+
+    def handle(self, *args, fix=None, user=None, checkpoint=False, limit=50, **opts):
+        drifts = ledger.find_drift()
+        for d in drifts[:limit]:
+            self.stdout.write(f"#{d.item_id:<6} {d.name[:40]:<40} stok {d.stock_qty:>7}  "
+                              f"ledger {d.expected:>7}  selisih {d.delta:+d}")
+        if len(drifts) > limit:
+            self.stdout.write(f"... dan {len(drifts) - limit} item lain")
+
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("Stok dan ledger cocok untuk semua menu."))
+        elif fix == 'stock':
+            updated = ledger.repair_stock(drifts)
+            self.stdout.write(self.style.SUCCESS(
+                f"{updated} stock_qty disamakan dengan ledger "
+                f"({len(drifts) - updated} dilewati karena stok berubah saat proses)."))
+        elif fix == 'ledger':
+            with transaction.atomic():
+                created = ledger.repair_ledger(drifts, self._user(user))
+            self.stdout.write(self.style.SUCCESS(f"{len(created)} movement ADJUST dicatat."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drifts)} menu tidak cocok. Jalankan dengan --fix stock|ledger untuk memperbaiki."))
+
+        if checkpoint:
+            self.stdout.write(f"Checkpoint baru: {ledger.create_checkpoints()} menu.")
+
+    def _user(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username} tidak ditemukan.")
+        user = User.objects.filter(is_superuser=True).order_by('id').first()
+        if user is None:
+            raise CommandError("Tidak ada superuser; pakai --user.")
+        return user
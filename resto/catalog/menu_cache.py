@@ -0,0 +1,94 @@
+"""
+Snapshot menu publik yang disimpan di cache, diberi nomor versi.
+
+Versi (mikrodetik epoch, selalu naik) di-bump setiap kali MenuItem,
+Category, stok atau reservasi stok berubah. Snapshot disimpan per versi,
+jadi bump cukup mengganti nomor versi; snapshot lama kedaluwarsa sendiri.
+
+Jumlah stok di snapshot adalah ``available`` (stok dikurangi reservasi aktif,
+catalog.reservations), sama dengan yang bisa dipegang keranjang. Reservasi
+yang habis TTL-nya tanpa ditulis ulang baru terlihat bebas setelah
+``manage.py expire_reservations`` menghapusnya (selama itu snapshot
+menampilkan stok lebih sedikit, tidak pernah lebih).
+"""
+import datetime
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import images, reservations
+from .models import Category, MenuItem
+
+VERSION_KEY = 'catalog:menu:version'
+SNAPSHOT_KEY = 'catalog:menu:snapshot:{}'
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _now_us(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    version = max(_now_us(), (cache.get(VERSION_KEY) or 0) + 1)
+    cache.set(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def invalidate():
+    """
+    Bump sekarang dan sekali lagi setelah commit: snapshot yang sempat dibangun
+    dari data sebelum commit tidak akan dipakai lagi.
+    """
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def version_datetime(version):
+    return datetime.datetime.fromtimestamp(version / 1_000_000, tz=datetime.timezone.utc)
+
+
+def sort_key(item):
+    """Urutan tampil menu publik: kategori, nama, id (tidak peka huruf besar)."""
+    return (item['category']['name'].casefold(), item['name'].casefold(), item['id'])
+
+
+def _build(version):
+    categories = [{'id': c.id, 'name': c.name}
+                  for c in Category.objects.order_by('name').only('id', 'name')]
+    items = []
+    active = MenuItem.objects.select_related('category').filter(is_active=True)
+    qs = (reservations.with_available(active)
+          .filter(available__gt=0)
+          .order_by('category__name', 'name'))
+    for m in qs:
+        items.append({
+            'id': m.id,
+            'name': m.name,
+            'description': m.description,
+            'price': m.price,
+            'available': m.available,
+            'category': {'id': m.category_id, 'name': m.category.name},
+            'image': images.responsive(m.image.name) if m.image else None,
+        })
+    items.sort(key=sort_key)
+    return {'version': version, 'categories': categories, 'items': items}
+
+
+def get_snapshot():
+    """Ambil snapshot versi terbaru; bangun dari DB kalau belum ada di cache."""
+    version = get_version()
+    key = SNAPSHOT_KEY.format(version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build(version)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
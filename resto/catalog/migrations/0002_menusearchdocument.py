@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'catalog_menusearch_fts'
+DOC_TABLE = 'catalog_menusearchdocument'
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"name_terms, body_terms, content='{DOC_TABLE}', content_rowid='menu_item_id', prefix='2 3')",
+    f"CREATE TRIGGER {DOC_TABLE}_ai AFTER INSERT ON {DOC_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name_terms, body_terms) "
+    f"VALUES (new.menu_item_id, new.name_terms, new.body_terms); END",
+    f"CREATE TRIGGER {DOC_TABLE}_ad AFTER DELETE ON {DOC_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name_terms, body_terms) "
+    f"VALUES ('delete', old.menu_item_id, old.name_terms, old.body_terms); END",
+    f"CREATE TRIGGER {DOC_TABLE}_au AFTER UPDATE ON {DOC_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name_terms, body_terms) "
+    f"VALUES ('delete', old.menu_item_id, old.name_terms, old.body_terms); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name_terms, body_terms) "
+    f"VALUES (new.menu_item_id, new.name_terms, new.body_terms); END",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {DOC_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {DOC_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {DOC_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+MYSQL_FORWARD = [
+    f"ALTER TABLE {DOC_TABLE} ADD FULLTEXT INDEX catalog_msd_name_ft (name_terms)",
+    f"ALTER TABLE {DOC_TABLE} ADD FULLTEXT INDEX catalog_msd_all_ft (name_terms, body_terms)",
+]
+MYSQL_BACKWARD = [
+    f"ALTER TABLE {DOC_TABLE} DROP INDEX catalog_msd_name_ft",
+    f"ALTER TABLE {DOC_TABLE} DROP INDEX catalog_msd_all_ft",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_FORWARD[:1])
+        except Exception:
+            # SQLite tanpa FTS5: catalog.search otomatis pakai LIKE
+            return
+        _run(schema_editor, SQLITE_FORWARD[1:])
+    elif vendor == 'mysql':
+        _run(schema_editor, MYSQL_FORWARD)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'mysql':
+        _run(schema_editor, MYSQL_BACKWARD)
+
+
+def backfill_documents(apps, schema_editor):
+    from catalog.search import document_terms
+    MenuItem = apps.get_model('catalog', 'MenuItem')
+    MenuSearchDocument = apps.get_model('catalog', 'MenuSearchDocument')
+    docs = [
+        MenuSearchDocument(
+            menu_item_id=item.pk,
+            name_terms=document_terms(item.name),
+            body_terms=document_terms(f"{item.description} {item.category.name}"),
+        )
+        for item in MenuItem.objects.select_related('category').iterator()
+    ]
+    MenuSearchDocument.objects.bulk_create(docs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuSearchDocument',
+            fields=[
+                ('menu_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='catalog.menuitem')),
+                ('name_terms', models.TextField(blank=True)),
+                ('body_terms', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
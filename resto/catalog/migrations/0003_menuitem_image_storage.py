@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+import catalog.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_menusearchdocument'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='menuitem',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=catalog.images.ContentHashStorage(), upload_to='menu/'),
+        ),
+    ]
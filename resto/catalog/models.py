@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from .images import menu_image_storage
+
 class Category(models.Model):
     name = models.CharField(max_length=80)
     code = models.CharField(max_length=80, unique=True)  # MAIN, APP, DRINK
@@ -15,7 +17,8 @@ class MenuItem(models.Model):
     price = models.DecimalField(max_digits=12, decimal_places=2)
     stock_qty = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
-    image = models.ImageField(upload_to='menu/', blank=True, null=True)
+    # disimpan berdasarkan hash isi file (lihat catalog.images)
+    image = models.ImageField(upload_to='menu/', storage=menu_image_storage, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     def __str__(self):
@@ -30,9 +33,62 @@ class StockMovement(models.Model):
     menu_item = models.ForeignKey('catalog.MenuItem', on_delete=models.CASCADE, related_name='movements')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     move_type = models.CharField(max_length=6, choices=MOVE_CHOICES)
-    qty = models.IntegerField()
+    qty = models.IntegerField()  # IN/OUT selalu positif; ADJUST = selisih bertanda (+/-)
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-id']
+
+class StockCheckpoint(models.Model):
+    """
+    Saldo ledger per item sampai StockMovement ``movement_id`` (inklusif).
+    Saldo yang diharapkan = checkpoint terakhir + movement setelahnya, jadi
+    rekonsiliasi tidak perlu menjumlah seluruh histori (lihat catalog.ledger).
+    """
+    menu_item = models.ForeignKey('catalog.MenuItem', on_delete=models.CASCADE, related_name='checkpoints')
+    movement_id = models.BigIntegerField()
+    balance = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['menu_item', 'movement_id'], name='uniq_checkpoint_item_movement'),
+        ]
+
+class StockReservation(models.Model):
+    """
+    Stok yang sedang "dipegang" keranjang pelanggan atau order DRAFT sampai
+    ``expires_at``. Tersedia = stock_qty - jumlah reservasi aktif milik pihak
+    lain (lihat catalog.reservations). Baris kedaluwarsa diabaikan dan
+    dibersihkan berkala oleh ``manage.py expire_reservations``.
+    """
+    menu_item = models.ForeignKey('catalog.MenuItem', on_delete=models.CASCADE, related_name='reservations')
+    holder = models.CharField(max_length=64)  # "cart:<id cookie>" atau "order:<pk>"
+    qty = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['menu_item', 'holder'], name='uniq_reservation_item_holder'),
+        ]
+        indexes = [
+            # SUM(qty) reservasi aktif per item cukup dari index (covering)
+            models.Index(fields=['menu_item', 'expires_at', 'qty'], name='reservation_active_idx'),
+            models.Index(fields=['holder'], name='reservation_holder_idx'),
+            models.Index(fields=['expires_at'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.holder} {self.menu_item_id} x{self.qty}"
+
+class MenuSearchDocument(models.Model):
+    """
+    Dokumen pencarian per MenuItem (token sudah dinormalisasi, lihat catalog.search).
+    Di SQLite tabel ini jadi sumber tabel FTS5, di MySQL diberi FULLTEXT index.
+    """
+    menu_item = models.OneToOneField('catalog.MenuItem', on_delete=models.CASCADE,
+                                     primary_key=True, related_name='search_document')
+    name_terms = models.TextField(blank=True)
+    body_terms = models.TextField(blank=True)  # deskripsi + nama kategori
@@ -0,0 +1,167 @@
+"""
+Pagination berbasis cursor (keyset).
+
+Berbeda dengan Paginator bawaan (COUNT(*) + OFFSET), halaman berikutnya
+diambil dengan ``WHERE (kolom_sort, id) > (nilai baris terakhir)`` memakai
+kolom urutan yang sama, jadi biaya per halaman konstan sedalam apa pun
+halamannya. Tidak ada total halaman; yang ada hanya link Prev/Next.
+
+Dipakai juga untuk list di memori (snapshot menu publik) lewat ``key``.
+"""
+import base64
+import bisect
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(ordering, values, direction):
+    payload = {'o': list(ordering), 'v': list(values), 'd': direction}
+    raw = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values, direction = payload['v'], payload['d']
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(cursor)
+    # cursor dari urutan lain (user ganti sort) tidak berlaku
+    if payload.get('o') != list(ordering) or direction not in ('n', 'p') or len(values) != len(ordering):
+        raise InvalidCursor(cursor)
+    return values, direction
+
+
+class CursorPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class CursorPaginator:
+    """
+    ``ordering`` seperti argumen order_by (mis. ``['-price']``); ``id`` selalu
+    ditambahkan di akhir sebagai pemutus seri supaya urutan unik. Kolom
+    ordering tidak boleh NULL.
+
+    Untuk list di memori berikan ``key`` (fungsi item -> tuple nilai ordering,
+    list harus sudah urut naik berdasarkan key itu).
+    """
+    def __init__(self, object_list, ordering, per_page, key=None):
+        ordering = list(ordering)
+        if key is None and ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering.append('id')
+        self.object_list = object_list
+        self.ordering = ordering
+        self.per_page = per_page
+        self.key = key
+
+    def get_page(self, cursor=None):
+        """Seperti Paginator.get_page: cursor kosong/rusak -> halaman pertama."""
+        values, direction = None, 'n'
+        if cursor:
+            try:
+                values, direction = decode_cursor(cursor, self.ordering)
+            except InvalidCursor:
+                values = None
+        if self.key is not None:
+            return self._page_list(values, direction)
+        try:
+            return self._page_queryset(values, direction)
+        except (ValidationError, ValueError, TypeError):
+            return self._page_queryset(None, 'n')
+
+    # ---------- queryset ----------
+    def _keyset(self, values, forward):
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(self.ordering[:i], values[:i]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+    def _row_values(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj
+            for part in field.lstrip('-').split('__'):
+                value = getattr(value, part)
+            values.append(value)
+        return values
+
+    def _page_queryset(self, values, direction):
+        forward = direction == 'n'
+        qs = self.object_list
+        if values is not None:
+            qs = qs.filter(self._keyset(values, forward))
+        if forward:
+            qs = qs.order_by(*self.ordering)
+        else:
+            qs = qs.order_by(*[f[1:] if f.startswith('-') else '-' + f for f in self.ordering])
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        return self._make_page(rows, [self._row_values(r) for r in rows], values, forward, has_more)
+
+    # ---------- list di memori ----------
+    def _page_list(self, values, direction):
+        forward = direction == 'n'
+        keys = [tuple(self.key(obj)) for obj in self.object_list]
+        if values is None:
+            start, end = 0, self.per_page
+        elif forward:
+            start = bisect.bisect_right(keys, tuple(values))
+            end = start + self.per_page
+        else:
+            end = bisect.bisect_left(keys, tuple(values))
+            start = max(end - self.per_page, 0)
+        rows = self.object_list[start:end]
+        has_more = end < len(keys) if forward else start > 0
+        return self._make_page(rows, keys[start:end], values, forward, has_more)
+
+    def _make_page(self, rows, row_values, cursor_values, forward, has_more):
+        if forward:
+            has_next, has_previous = has_more, cursor_values is not None
+        else:
+            has_next, has_previous = True, has_more
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self.ordering, row_values[-1], 'n')
+        if rows and has_previous:
+            previous_cursor = encode_cursor(self.ordering, row_values[0], 'p')
+        return CursorPage(rows, has_next, has_previous, next_cursor, previous_cursor)
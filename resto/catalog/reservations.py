@@ -0,0 +1,117 @@
+"""
+Reservasi stok berbatas waktu untuk keranjang dan order DRAFT.
+
+Cek stok saat tambah item saja tidak cukup: banyak pelanggan bisa sama-sama
+memegang porsi terakhir dan baru gagal saat bayar. Di sini setiap pemegang
+(``holder``: ``cart:<id>`` atau ``order:<pk>``) punya satu baris reservasi per
+menu dengan ``expires_at``.
+
+- ``available = stock_qty - SUM(qty reservasi aktif pihak lain)`` dihitung
+  dengan subquery yang dilayani index (menu_item, expires_at, qty), bisa untuk
+  banyak item dalam satu query.
+- ``reserve`` mengunci baris MenuItem (urut pk) lalu menetapkan jumlah yang
+  dipegang, dipotong ke jumlah yang masih tersedia. Setiap reserve
+  memperpanjang semua reservasi milik holder itu (TTL geser).
+- Reservasi kedaluwarsa langsung tidak dihitung; barisnya dihapus per batch
+  oleh ``expire`` (``manage.py expire_reservations``).
+- Menu publik (catalog.menu_cache) menampilkan jumlah tersedia, jadi setiap
+  perubahan jumlah yang dipegang mengganti versi snapshot-nya.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import menu_cache
+from .models import MenuItem, StockReservation
+
+RESERVATION_TTL = datetime.timedelta(seconds=getattr(settings, 'STOCK_RESERVATION_TTL', 15 * 60))
+
+
+def cart_holder(cart_id):
+    return f'cart:{cart_id}'
+
+
+def order_holder(order):
+    return f'order:{order.pk}'
+
+
+def active(now=None):
+    return StockReservation.objects.filter(expires_at__gt=now or timezone.now())
+
+
+def reserved_qty(exclude_holder=None, now=None):
+    """Subquery SUM(qty) reservasi aktif untuk MenuItem luar (OuterRef pk)."""
+    rows = active(now).filter(menu_item=OuterRef('pk'))
+    if exclude_holder:
+        rows = rows.exclude(holder=exclude_holder)
+    rows = rows.order_by().values('menu_item').annotate(total=Sum('qty')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def with_available(queryset=None, exclude_holder=None):
+    """Anotasi ``reserved`` dan ``available`` (stok dikurangi reservasi pihak lain)."""
+    queryset = MenuItem.objects.all() if queryset is None else queryset
+    return (queryset.annotate(reserved=reserved_qty(exclude_holder))
+            .annotate(available=F('stock_qty') - F('reserved')))
+
+
+def available(item_ids, exclude_holder=None):
+    """{menu_item_id: jumlah tersedia} untuk beberapa item dalam satu query."""
+    return dict(with_available(MenuItem.objects.filter(pk__in=list(item_ids)), exclude_holder)
+                .values_list('pk', 'available'))
+
+
+def reserve(holder, wanted, ttl=None):
+    """
+    Tetapkan jumlah yang dipegang ``holder`` untuk tiap ``{menu_item_id: qty}``
+    (nilai absolut, 0 = lepas). Dipotong ke stok yang masih tersedia.
+    Mengembalikan ``{menu_item_id: qty dipegang}``; item yang tidak ada = 0.
+    """
+    wanted = {int(pk): max(int(qty), 0) for pk, qty in wanted.items()}
+    if not wanted:
+        return {}
+    expires_at = timezone.now() + (ttl or RESERVATION_TTL)
+    with transaction.atomic():
+        # reservasi untuk menu yang sama dilayani bergiliran lewat lock baris MenuItem
+        locked = (MenuItem.objects.select_for_update().filter(pk__in=list(wanted)).order_by('pk'))
+        free = dict(with_available(locked, exclude_holder=holder).values_list('pk', 'available'))
+        granted = {pk: max(min(qty, free.get(pk, 0)), 0) for pk, qty in wanted.items()}
+
+        StockReservation.objects.filter(holder=holder, menu_item_id__in=list(wanted)).delete()
+        StockReservation.objects.bulk_create([
+            StockReservation(menu_item_id=pk, holder=holder, qty=qty, expires_at=expires_at)
+            for pk, qty in granted.items() if qty > 0
+        ])
+        StockReservation.objects.filter(holder=holder).update(expires_at=expires_at)
+        menu_cache.invalidate()
+    return granted
+
+
+def release(holder):
+    deleted = StockReservation.objects.filter(holder=holder).delete()[0]
+    if deleted:
+        menu_cache.invalidate()
+    return deleted
+
+
+def transfer(old_holder, new_holder):
+    """Pindahkan semua reservasi (mis. keranjang -> order saat checkout)."""
+    return StockReservation.objects.filter(holder=old_holder).update(holder=new_holder)
+
+
+def expire(now=None, batch_size=1000):
+    """Hapus reservasi kedaluwarsa per batch (DELETE pendek, lock tidak lama)."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(StockReservation.objects.filter(expires_at__lte=now)
+                   .order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            if total:
+                menu_cache.invalidate()
+            return total
+        total += StockReservation.objects.filter(pk__in=ids).delete()[0]
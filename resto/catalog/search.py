@@ -0,0 +1,211 @@
+"""
+Pencarian menu berbasis indeks token.
+
+Setiap MenuItem punya satu MenuSearchDocument berisi token nama dan token
+"body" (deskripsi + nama kategori) yang sudah dinormalisasi. Dokumen ini
+dijaga tetap sinkron lewat signal (catalog.signals) dan di-query dengan
+indeks full-text sesuai backend database:
+
+- SQLite : tabel virtual FTS5 ``catalog_menusearch_fts`` (external content,
+           disinkronkan trigger), ranking bm25.
+- MySQL  : FULLTEXT index di tabel dokumen, BOOLEAN MODE.
+- lainnya: LIKE per token di tabel dokumen (tanpa join ke kategori).
+
+Semua token query dicocokkan sebagai prefix supaya bisa dipakai untuk
+type-ahead di POS.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+
+from .models import MenuItem, MenuSearchDocument
+
+FTS_TABLE = 'catalog_menusearch_fts'
+NAME_WEIGHT = 10.0
+# MySQL InnoDB mengabaikan token lebih pendek dari innodb_ft_min_token_size (default 3)
+MYSQL_MIN_TOKEN = 3
+
+# Variasi ejaan yang sering muncul di menu (kiri -> bentuk baku)
+VARIANTS = {
+    'satay': 'sate', 'sateh': 'sate',
+    'mee': 'mie',
+    'baso': 'bakso',
+    'tempeh': 'tempe',
+    'tauhu': 'tahu',
+    'sambel': 'sambal',
+    'cabe': 'cabai',
+    'krupuk': 'kerupuk',
+    'randang': 'rendang',
+}
+
+# Ejaan lama -> EYD (djeruk -> jeruk, ketjap -> kecap, goela -> gula)
+_OLD_SPELLING = [('dj', 'j'), ('tj', 'c'), ('nj', 'ny'), ('sj', 'sy'), ('oe', 'u')]
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+
+def _strip_accents(text):
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(_strip_accents(text or '').lower())
+
+
+def fold(token):
+    """Bentuk baku satu token (variasi ejaan & ejaan lama)."""
+    if token in VARIANTS:
+        return VARIANTS[token]
+    for old, new in _OLD_SPELLING:
+        token = token.replace(old, new)
+    return VARIANTS.get(token, token)
+
+
+def document_terms(text):
+    """Token asli + bentuk bakunya, tanpa duplikat (urutan dipertahankan)."""
+    seen = []
+    for tok in tokenize(text):
+        for t in (tok, fold(tok)):
+            if t not in seen:
+                seen.append(t)
+    return ' '.join(seen)
+
+
+def build_document(item, category_name=None):
+    if category_name is None:
+        category_name = item.category.name
+    return MenuSearchDocument(
+        menu_item_id=item.pk,
+        name_terms=document_terms(item.name),
+        body_terms=document_terms(f"{item.description} {category_name}"),
+    )
+
+
+def index_item(item):
+    doc = build_document(item)
+    MenuSearchDocument.objects.update_or_create(
+        menu_item_id=item.pk,
+        defaults={'name_terms': doc.name_terms, 'body_terms': doc.body_terms},
+    )
+
+
+def reindex_items(queryset, batch_size=1000):
+    """Bangun ulang dokumen untuk sekumpulan MenuItem (mis. satu kategori)."""
+    count = 0
+    batch = []
+    for item in queryset.select_related('category').order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(build_document(item))
+        if len(batch) >= batch_size:
+            count += _replace(batch)
+            batch = []
+    if batch:
+        count += _replace(batch)
+    return count
+
+
+def _replace(docs):
+    # delete + insert supaya trigger FTS5 ikut jalan (bulk_create update_conflicts tidak portable)
+    MenuSearchDocument.objects.filter(menu_item_id__in=[d.menu_item_id for d in docs]).delete()
+    MenuSearchDocument.objects.bulk_create(docs)
+    return len(docs)
+
+
+def rebuild_index(batch_size=1000):
+    MenuSearchDocument.objects.all().delete()
+    return reindex_items(MenuItem.objects.all(), batch_size=batch_size)
+
+
+def query_terms(q):
+    """Token query yang sudah dinormalisasi (dipakai sebagai prefix)."""
+    terms = []
+    for tok in tokenize(q):
+        t = fold(tok)
+        if t not in terms:
+            terms.append(t)
+    return terms
+
+
+# ---------- backend ----------
+_fts5_ready = None
+
+
+def _has_fts5():
+    global _fts5_ready
+    if _fts5_ready is None:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [FTS_TABLE])
+            _fts5_ready = cur.fetchone() is not None
+    return _fts5_ready
+
+
+def _search_fts5(terms, limit):
+    match = ' AND '.join('"%s"*' % t for t in terms)
+    sql = (f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+           f"ORDER BY bm25({FTS_TABLE}, {NAME_WEIGHT}, 1.0)")
+    params = [match]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return [row[0] for row in cur.fetchall()]
+
+
+def _search_mysql(terms, limit):
+    table = MenuSearchDocument._meta.db_table
+    against = ' '.join('+%s*' % t for t in terms)
+    sql = (f"SELECT menu_item_id FROM {table} "
+           f"WHERE MATCH(name_terms, body_terms) AGAINST (%s IN BOOLEAN MODE) "
+           f"ORDER BY MATCH(name_terms) AGAINST (%s IN BOOLEAN MODE) * {NAME_WEIGHT} "
+           f"+ MATCH(name_terms, body_terms) AGAINST (%s IN BOOLEAN MODE) DESC")
+    params = [against, against, against]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return [row[0] for row in cur.fetchall()]
+
+
+def _search_like(terms, limit):
+    qs = MenuSearchDocument.objects.all()
+    name_hits = Q()
+    for t in terms:
+        # awal kata: di awal kolom atau setelah spasi
+        in_name = Q(name_terms__startswith=t) | Q(name_terms__contains=' ' + t)
+        in_body = Q(body_terms__startswith=t) | Q(body_terms__contains=' ' + t)
+        qs = qs.filter(in_name | in_body)
+        name_hits &= in_name
+    ids = list(qs.values_list('menu_item_id', flat=True))
+    in_name_ids = set(qs.filter(name_hits).values_list('menu_item_id', flat=True))
+    ids.sort(key=lambda pk: pk not in in_name_ids)
+    return ids[:limit] if limit else ids
+
+
+def search_ids(q, limit=None):
+    """
+    Cari MenuItem yang cocok dengan query; kembalikan list id urut relevansi
+    (kecocokan di nama lebih tinggi). Query kosong -> list kosong.
+    """
+    terms = query_terms(q)
+    if not terms:
+        return []
+    if connection.vendor == 'sqlite' and _has_fts5():
+        return _search_fts5(terms, limit)
+    if connection.vendor == 'mysql' and min(len(t) for t in terms) >= MYSQL_MIN_TOKEN:
+        return _search_mysql(terms, limit)
+    return _search_like(terms, limit)
+
+
+def filter_ranked(queryset, q, limit=None):
+    """
+    Batasi queryset MenuItem ke hasil pencarian, urut relevansi.
+    Dipakai POS (type-ahead) yang menampilkan hasil dalam urutan ranking.
+    """
+    ids = search_ids(q, limit=limit)
+    if not ids:
+        return queryset.none()
+    rank = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(rank)
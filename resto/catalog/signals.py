@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import images, menu_cache, search
+from .models import Category, MenuItem
+
+# Field yang ikut masuk dokumen pencarian
+SEARCH_FIELDS = {'name', 'description', 'category', 'category_id'}
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_menu_snapshot(sender, **kwargs):
+    # admin, menu_update, menu_restock, dll. semuanya lewat save()/delete()
+    menu_cache.invalidate()
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menu_item(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return  # loaddata: jalankan rebuild_search_index setelahnya
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return  # mis. restock (update_fields=['stock_qty'])
+    search.index_item(instance)
+
+
+@receiver(post_save, sender=Category)
+def index_category_items(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    # nama kategori ikut di dokumen, jadi semua item di kategori ini diindeks ulang
+    search.reindex_items(instance.items.all())
+
+
+@receiver(post_save, sender=MenuItem)
+def build_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not instance.image:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    name = instance.image.name
+    # dikerjakan di background setelah commit, bukan di request upload
+    transaction.on_commit(lambda: images.schedule_derivatives(name))
@@ -0,0 +1,192 @@
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+
+from . import menu_cache
+from .models import MenuItem, StockMovement
+
+
+class InsufficientStock(ValidationError):
+    """
+    Dilempar kalau stok tidak cukup untuk salah satu item.
+    Turunan ValidationError supaya view bisa menampilkan pesannya lewat
+    ``message_dict`` seperti error validasi Payment.
+    """
+    def __init__(self, shortages):
+        # shortages: list of (MenuItem, diminta, tersedia)
+        self.shortages = shortages
+        super().__init__({
+            'stock': [
+                f"Stok {item.name} tidak cukup (diminta {wanted}, tersedia {available})."
+                for item, wanted, available in shortages
+            ]
+        })
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _merge_lines(lines):
+    """Gabungkan (menu_item_id, qty) yang sama, urut berdasarkan id."""
+    merged = OrderedDict()
+    for item_id, qty in sorted(lines):
+        if qty <= 0:
+            continue
+        merged[item_id] = merged.get(item_id, 0) + qty
+    return merged
+
+
+def deduct_stock(lines, user, note=''):
+    """
+    Kurangi stok beberapa MenuItem sekaligus dan catat StockMovement OUT.
+
+    ``lines`` berisi pasangan (menu_item_id, qty). Pengurangan dijalankan
+    sebagai SATU statement UPDATE dengan aritmetika di sisi database
+    (``stock_qty = stock_qty - qty``) dan guard ``stock_qty >= qty`` per baris,
+    jadi dua kasir yang menjual item yang sama tidak saling menimpa dan stok
+    tidak bisa minus. Baris dikunci oleh UPDATE itu sendiri dalam urutan
+    primary key, sehingga urutan penguncian selalu sama (bebas deadlock).
+
+    Kalau ada item yang stoknya kurang, UPDATE dibatalkan (savepoint) dan
+    InsufficientStock dilempar; sebaiknya dipanggil di dalam
+    ``transaction.atomic()`` bersama pembuatan Payment.
+    """
+    merged = _merge_lines(lines)
+    if not merged:
+        return []
+
+    guard = Q()
+    for item_id, qty in merged.items():
+        guard |= Q(pk=item_id, stock_qty__gte=qty)
+
+    try:
+        with transaction.atomic():
+            updated = MenuItem.objects.filter(guard).update(
+                stock_qty=Case(
+                    *[When(pk=item_id, then=F('stock_qty') - qty) for item_id, qty in merged.items()],
+                    default=F('stock_qty'),
+                )
+            )
+            if updated != len(merged):
+                raise _Rollback
+    except _Rollback:
+        # Jalur gagal saja yang perlu query tambahan untuk pesan error
+        items = MenuItem.objects.in_bulk(list(merged))
+        shortages = [
+            (items[item_id], qty, items[item_id].stock_qty)
+            for item_id, qty in merged.items()
+            if item_id in items and items[item_id].stock_qty < qty
+        ]
+        # Item yang terhapus di tengah jalan dianggap stok 0
+        shortages += [
+            (MenuItem(pk=item_id, name=f"#{item_id}"), qty, 0)
+            for item_id, qty in merged.items() if item_id not in items
+        ]
+        raise InsufficientStock(shortages)
+
+    # UPDATE massal tidak memicu signal post_save, jadi snapshot menu di-bump manual
+    menu_cache.invalidate()
+    return StockMovement.objects.bulk_create([
+        StockMovement(
+            menu_item_id=item_id,
+            user=user,
+            move_type=StockMovement.MOVE_OUT,
+            qty=qty,
+            note=note,
+        )
+        for item_id, qty in merged.items()
+    ])
+
+
+def _unknown_items(missing):
+    return ValidationError({'lines': [f"Menu #{pk} tidak ditemukan." for pk in missing]})
+
+
+def restock(lines, user, note=''):
+    """
+    Tambah stok banyak MenuItem sekaligus (penerimaan barang) dan catat
+    StockMovement IN. Satu UPDATE ``stock_qty = stock_qty + qty`` untuk semua
+    baris dan satu bulk INSERT movement, dalam satu transaksi. Menu yang tidak
+    dikenal menggagalkan seluruh batch (ValidationError).
+    """
+    merged = _merge_lines(lines)
+    if not merged:
+        return []
+    with transaction.atomic():
+        updated = MenuItem.objects.filter(pk__in=list(merged)).update(
+            stock_qty=Case(
+                *[When(pk=item_id, then=F('stock_qty') + qty) for item_id, qty in merged.items()],
+                default=F('stock_qty'),
+            )
+        )
+        if updated != len(merged):
+            known = set(MenuItem.objects.filter(pk__in=list(merged)).values_list('pk', flat=True))
+            raise _unknown_items([pk for pk in merged if pk not in known])
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(menu_item_id=item_id, user=user, move_type=StockMovement.MOVE_IN,
+                          qty=qty, note=note)
+            for item_id, qty in merged.items()
+        ])
+    menu_cache.invalidate()
+    return movements
+
+
+def stock_take(counts, user, note=''):
+    """
+    Terapkan hasil hitung fisik: ``counts`` berisi (menu_item_id, jumlah_terhitung).
+    Baris dikunci (urut pk) supaya penjualan yang berjalan tidak hilang di
+    antara baca dan tulis; hanya item yang selisih yang di-UPDATE dan dicatat
+    sebagai ADJUST bertanda. Mengembalikan list movement ADJUST.
+    """
+    wanted = {}
+    for item_id, counted in counts:
+        if counted < 0:
+            raise ValidationError({'lines': [f"Jumlah hitung menu #{item_id} tidak boleh negatif."]})
+        wanted[item_id] = counted   # baris ganda: hitungan terakhir yang dipakai
+    wanted = OrderedDict(sorted(wanted.items()))
+    if not wanted:
+        return []
+    with transaction.atomic():
+        current = dict(MenuItem.objects.select_for_update().filter(pk__in=list(wanted))
+                       .order_by('pk').values_list('pk', 'stock_qty'))
+        missing = [pk for pk in wanted if pk not in current]
+        if missing:
+            raise _unknown_items(missing)
+        changed = {pk: qty for pk, qty in wanted.items() if qty != current[pk]}
+        if not changed:
+            return []
+        MenuItem.objects.filter(pk__in=list(changed)).update(
+            stock_qty=Case(*[When(pk=pk, then=Value(qty)) for pk, qty in changed.items()],
+                           default=F('stock_qty'))
+        )
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(menu_item_id=pk, user=user, move_type=StockMovement.MOVE_ADJUST,
+                          qty=qty - current[pk], note=note)
+            for pk, qty in changed.items()
+        ])
+    menu_cache.invalidate()
+    return movements
+
+
+def adjust(item_id, delta, user, note=''):
+    """
+    Koreksi stok satu menu dari form edit (admin/menu_update) sebesar ``delta``
+    terhadap stok yang ditampilkan saat form dibuka: ``stock_qty = stock_qty +
+    delta``, jadi penjualan yang terjadi sejak itu tidak tertimpa. Dicatat
+    sebagai ADJUST sebesar delta. ValidationError kalau stok akan negatif.
+    """
+    if not delta:
+        return None
+    with transaction.atomic():
+        updated = MenuItem.objects.filter(pk=item_id, stock_qty__gte=-delta).update(
+            stock_qty=F('stock_qty') + delta)
+        if not updated:
+            raise ValidationError({'stock_qty': ["Stok sudah berubah sejak form dibuka dan akan menjadi "
+                                                 "negatif; muat ulang lalu ulangi."]})
+        movement = StockMovement.objects.create(menu_item_id=item_id, user=user,
+                                                move_type=StockMovement.MOVE_ADJUST, qty=delta, note=note)
+    menu_cache.invalidate()
+    return movement
@@ -2,8 +2,15 @@ from decimal import Decimal
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from catalog.models import Category, MenuItem
+from catalog import cart, reservations
+from catalog.models import Category, MenuItem, StockReservation
+from orders.models import Order
+from orders.services import checkout_cart
 from payments.models import PaymentMethod
 
 
@@ -60,3 +67,79 @@ class CartFlowTests(TestCase):
         res = self.client.post(checkout_url, {"payment_method": "CASH"}, follow=True)
         # Boleh 200 (tampil halaman sukses) atau 302 (redirect ke halaman pembayaran)
         self.assertIn(res.status_code, [200, 302])
+
+
+class CartStoreTests(TestCase):
+    """
+    Menguji penyimpanan keranjang di cache:
+    - Melihat menu tidak membuat cookie/keranjang; tambah item membuat cookie
+    - Isi keranjang tidak menulis ke django_session
+    - Format ringkas encode/decode, keranjang kosong dihapus dari cache
+    """
+    def setUp(self):
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.item = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=20)
+
+    def test_cart_lives_in_cache_not_session(self):
+        res = self.client.get(reverse("catalog:public_menu"))
+        self.assertNotIn(cart.CART_COOKIE_NAME, res.cookies)
+
+        res = self.client.post(reverse("catalog:cart_add", args=[self.item.id]), {"qty": 2})
+        cart_id = res.cookies[cart.CART_COOKIE_NAME].value
+        self.assertEqual(caches["carts"].get(f"cart:{cart_id}"), f"{self.item.id}:2")
+        self.assertFalse(Session.objects.exists())
+
+        self.assertContains(self.client.get(reverse("catalog:cart_view")), "Nasi Goreng")
+        self.client.post(reverse("catalog:cart_remove", args=[self.item.id]))
+        self.assertIsNone(caches["carts"].get(f"cart:{cart_id}"))
+
+    def test_encode_decode(self):
+        self.assertEqual(cart.encode({3: 1, 12: 4, 7: 0}), "3:1,12:4")
+        self.assertEqual(cart.decode("3:1,12:4,x:y,5:-1"), {3: 1, 12: 4})
+        self.assertEqual(cart.decode(None), {})
+
+
+class CheckoutCartTests(TestCase):
+    """
+    Menguji checkout keranjang sebagai satu unit atomik:
+    - Order + item dibuat, total sama dengan SUM ulang, reservasi pindah ke order
+    - Qty dipotong ke stok yang bisa dipegang
+    - Jumlah query tidak bertambah mengikuti jumlah item di keranjang
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123", is_staff=True)
+        self.cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.items = [self._item(i) for i in range(8)]
+
+    def _item(self, i, stock=20):
+        return MenuItem.objects.create(category=self.cat, name=f"Menu {i}",
+                                       price=Decimal("10000") + i * 500, stock_qty=stock)
+
+    def test_creates_order_and_moves_reservation(self):
+        self.client.login(username="kasir", password="pass123")
+        scarce = self._item(99, stock=1)
+        self.client.post(reverse("catalog:cart_add", args=[self.items[0].id]), {"qty": 2})
+        self.client.post(reverse("catalog:cart_add", args=[scarce.id]), {"qty": 1})
+        StockReservation.objects.filter(menu_item=scarce).delete()
+        reservations.reserve("cart:lain", {scarce.id: 1})   # porsi terakhir diambil orang lain
+
+        res = self.client.post(reverse("catalog:cart_checkout"), {"name": "Budi", "phone": "0812"})
+        order = Order.objects.get()
+        self.assertRedirects(res, reverse("pos_checkout", args=[order.order_no]), fetch_redirect_response=False)
+        self.assertEqual(list(order.items.values_list("menu_item_id", "qty")), [(self.items[0].id, 2)])
+        expected = Order.objects.get(pk=order.pk)
+        expected.recalc_totals()
+        self.assertEqual((order.subtotal, order.grand_total), (expected.subtotal, expected.grand_total))
+        self.assertEqual(StockReservation.objects.get(holder=reservations.order_holder(order)).qty, 2)
+        self.assertEqual(cart.get_cart(res.wsgi_request), {})
+
+    def test_query_count_independent_of_cart_size(self):
+        def run(n):
+            lines = {item.id: 1 for item in self.items[:n]}
+            with CaptureQueriesContext(connection) as ctx:
+                checkout_cart(self.user, lines, f"cart:{n}", name="Guest")
+            # alokasi blok nomor order sesekali menambah query, tidak ikut dihitung
+            return len([q for q in ctx.captured_queries if "ordersequence" not in q["sql"]])
+        run(1)
+        self.assertEqual(run(2), run(8))
@@ -0,0 +1,133 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from catalog import images
+from catalog.models import Category, MenuItem
+from catalog.views import media_file
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='resto-media-')
+
+
+def _png(color):
+    buf = BytesIO()
+    Image.new('RGB', (1200, 800), color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MENU_IMAGE_SYNC=True)
+class MenuImagePipelineTests(TestCase):
+    """
+    Menguji pipeline gambar menu:
+    - Upload identik disimpan sekali (nama berbasis hash)
+    - Upload ulang file yang namanya sudah hash tidak macet dan tidak menduplikasi
+    - Turunan thumb/card dibuat dan dipakai di srcset menu publik
+    - File berbasis hash disajikan dengan header cache panjang
+    - Gambar lama (nama bukan hash) dipindah ke nama hash sebelum turunannya dibuat;
+      file & turunan lama dihapus
+    """
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.cat = Category.objects.create(name="Masakan", code="MAIN")
+
+    def _item(self, name, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MenuItem.objects.create(
+                category=self.cat, name=name, price=Decimal("20000"), stock_qty=5,
+                image=SimpleUploadedFile("sate.png", content, content_type="image/png"),
+            )
+
+    def test_duplicate_upload_stored_once(self):
+        a = self._item("Sate", _png("red"))
+        b = self._item("Satay", _png("red"))
+        c = self._item("Sate Kambing", _png("blue"))
+        self.assertEqual(a.image.name, b.image.name)
+        self.assertNotEqual(a.image.name, c.image.name)
+        self.assertTrue(images.is_hashed_name(a.image.name))
+
+    def test_reupload_of_hashed_file(self):
+        a = self._item("Sate", _png("orange"))
+        storage = images.menu_image_storage
+        # gambar yang diunduh dari /media/menu/<hash>.png lalu diupload lagi
+        self.assertEqual(storage.save(a.image.name, ContentFile(_png("orange"))), a.image.name)
+        # nama hash tapi isinya lain: tetap dinamai menurut isinya
+        other = storage.save(a.image.name, ContentFile(_png("purple")))
+        self.assertNotEqual(other, a.image.name)
+        self.assertTrue(images.is_hashed_name(other))
+        # balapan: upload lain menulis file yang sama setelah cek exists pertama
+        with mock.patch.object(storage, "exists", side_effect=[False, True]):
+            self.assertEqual(storage.save("menu/x.png", ContentFile(_png("orange"))), a.image.name)
+
+    def test_derivatives_in_srcset_and_cache_headers(self):
+        item = self._item("Sate", _png("green"))
+        for width in images.DERIVATIVES.values():
+            self.assertTrue(images.menu_image_storage.exists(images.derived_name(item.image.name, width)))
+
+        res = self.client.get(reverse("catalog:public_menu"))
+        self.assertContains(res, "srcset=")
+        self.assertContains(res, "-480.webp 480w")
+
+        # route media hanya terpasang saat DEBUG, jadi view dipanggil langsung
+        res = media_file(RequestFactory().get("/media/" + item.image.name), item.image.name)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_build_menu_images_dedupes_legacy_files(self):
+        storage = images.menu_image_storage
+        # file lama dengan suffix acak Django: isi sama, nama beda
+        for name in ("menu/sate.png", "menu/sate_RIEe2WY.png"):
+            FileSystemStorage(location=MEDIA_ROOT).save(name, ContentFile(_png("yellow")))
+        a = MenuItem.objects.create(category=self.cat, name="Sate", price=Decimal("1"), stock_qty=1)
+        b = MenuItem.objects.create(category=self.cat, name="Satay", price=Decimal("1"), stock_qty=1)
+        MenuItem.objects.filter(pk=a.pk).update(image="menu/sate.png")
+        MenuItem.objects.filter(pk=b.pk).update(image="menu/sate_RIEe2WY.png")
+
+        call_command("build_menu_images", "--prune", stdout=StringIO())
+
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual(a.image.name, b.image.name)
+        self.assertTrue(images.is_hashed_name(a.image.name))
+        self.assertFalse(storage.exists("menu/sate.png"))
+        self.assertFalse(storage.exists("menu/sate_RIEe2WY.png"))
+        self.assertTrue(storage.exists(images.derived_name(a.image.name, images.CARD_WIDTH)))
+
+    def test_legacy_original_migrated_before_derivatives(self):
+        storage = images.menu_image_storage
+        legacy = FileSystemStorage(location=MEDIA_ROOT)
+        legacy.save("menu/rendang.png", ContentFile(_png("brown")))
+        # turunan lama yang dinamai dari nama file lama
+        legacy.save(images.derived_name("menu/rendang.png", images.CARD_WIDTH), ContentFile(b"lama"))
+        item = MenuItem.objects.create(category=self.cat, name="Rendang", price=Decimal("1"), stock_qty=1)
+        MenuItem.objects.filter(pk=item.pk).update(image="menu/rendang.png")
+        item.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+
+        item.refresh_from_db()
+        self.assertTrue(images.is_hashed_name(item.image.name))
+        self.assertFalse(storage.exists("menu/rendang.png"))
+        self.assertFalse(storage.exists(images.derived_name("menu/rendang.png", images.CARD_WIDTH)))
+        for width in images.DERIVATIVES.values():
+            self.assertTrue(storage.exists(images.derived_name(item.image.name, width)))
+
+        # turunan yang tidak dipakai dibersihkan tanpa --prune
+        stale = legacy.save(f"{images.DERIVED_DIR}/{'0' * images.HASH_LENGTH}.webp", ContentFile(b"x"))
+        call_command("build_menu_images", stdout=StringIO())
+        self.assertFalse(storage.exists(stale))
+        self.assertTrue(storage.exists(images.derived_name(item.image.name, images.CARD_WIDTH)))
@@ -0,0 +1,102 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog import ledger
+from catalog.models import Category, MenuItem, StockCheckpoint, StockMovement
+from catalog.stock import deduct_stock
+
+
+class StockLedgerTests(TestCase):
+    """
+    Menguji checkpoint & rekonsiliasi ledger stok:
+    - saldo = checkpoint terakhir + movement sesudahnya (IN +, OUT -, ADJUST bertanda)
+    - drift terdeteksi dan bisa diperbaiki ke dua arah
+    - edit stok lewat form menu/admin tercatat sebagai ADJUST sebesar selisih dari
+      stok saat form dibuka, tanpa menimpa penjualan yang terjadi sesudahnya
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="admin", password="pass123",
+                                             is_staff=True, is_superuser=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=0)
+        self._move(self.nasi, StockMovement.MOVE_IN, 10)
+        self.nasi.stock_qty = 10
+        self.nasi.save(update_fields=["stock_qty"])
+
+    def _move(self, item, move_type, qty):
+        return StockMovement.objects.create(menu_item=item, user=self.user, move_type=move_type, qty=qty)
+
+    def test_expected_uses_latest_checkpoint(self):
+        deduct_stock([(self.nasi.id, 3)], self.user)
+        later = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(ledger.create_checkpoints(now=later), 1)
+        cp = StockCheckpoint.objects.get()
+        self.assertEqual(cp.balance, 7)
+
+        # histori sebelum checkpoint tidak dibaca lagi: ubah movement lama tidak berpengaruh
+        StockMovement.objects.filter(id__lte=cp.movement_id).update(qty=999)
+        self._move(self.nasi, StockMovement.MOVE_ADJUST, -2)
+        self.assertEqual(ledger.with_expected().get(pk=self.nasi.pk).expected, 5)
+
+    def test_recent_movements_not_checkpointed(self):
+        self.assertEqual(ledger.create_checkpoints(), 0)
+
+    def test_reconcile_and_fix(self):
+        MenuItem.objects.filter(pk=self.nasi.pk).update(stock_qty=12)  # drift +2
+        drifts = ledger.find_drift()
+        self.assertEqual([(d.item_id, d.delta) for d in drifts], [(self.nasi.id, 2)])
+
+        out = StringIO()
+        call_command("reconcile_stock", fix="ledger", stdout=out)
+        self.assertEqual(ledger.find_drift(), [])
+        self.assertTrue(StockMovement.objects.filter(move_type="ADJUST", qty=2).exists())
+
+        MenuItem.objects.filter(pk=self.nasi.pk).update(stock_qty=4)
+        call_command("reconcile_stock", fix="stock", stdout=out)
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 12)
+
+    def test_menu_form_edit_records_adjustment(self):
+        self.client.login(username="admin", password="pass123")
+        self.client.post(reverse("catalog:menu_update", args=[self.nasi.pk]), {
+            "category": self.nasi.category_id, "name": self.nasi.name, "description": "",
+            "price": "20000", "stock_qty": "15", "is_active": "on",
+        })
+        self.assertTrue(StockMovement.objects.filter(move_type="ADJUST", qty=5).exists())
+        self.assertEqual(ledger.find_drift(), [])
+
+    def test_form_edit_keeps_concurrent_sale(self):
+        self.client.login(username="admin", password="pass123")
+        form = {"category": self.nasi.category_id, "name": self.nasi.name, "description": "",
+                "price": "20000", "stock_qty": "15", "initial-stock_qty": "10", "is_active": "on"}
+        # form dibuka saat stok 10, lalu terjual 2 sebelum disimpan
+        deduct_stock([(self.nasi.id, 2)], self.user)
+        self.client.post(reverse("catalog:menu_update", args=[self.nasi.pk]), form)
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 13)
+        self.assertEqual(StockMovement.objects.get(move_type="ADJUST").qty, 5)
+        self.assertEqual(ledger.find_drift(), [])
+
+        # lewat admin: stok dibuka 13, terjual 3, diisi 10 -> 13 - 3 - 3 = 7
+        deduct_stock([(self.nasi.id, 3)], self.user)
+        form.update({"stock_qty": "10", "initial-stock_qty": "13", "_save": "Save"})
+        res = self.client.post(reverse("admin:catalog_menuitem_change", args=[self.nasi.pk]), form)
+        self.assertEqual(res.status_code, 302)
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 7)
+        self.assertEqual(ledger.find_drift(), [])
+
+        # stok tidak boleh jadi negatif: form ditolak, stok tetap
+        form.update({"stock_qty": "0", "initial-stock_qty": "10"})
+        res = self.client.post(reverse("catalog:menu_update", args=[self.nasi.pk]), form)
+        self.assertContains(res, "Stok sudah berubah")
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 7)
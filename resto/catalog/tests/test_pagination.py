@@ -0,0 +1,68 @@
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from catalog.models import Category, MenuItem
+from catalog.pagination import CursorPaginator
+
+
+class CursorPaginationTests(TestCase):
+    """
+    Menguji pagination cursor:
+    - Maju sampai habis lalu mundur lagi menghasilkan urutan yang sama (termasuk nilai kembar)
+    - Tidak ada COUNT(*) / OFFSET di halaman dalam
+    - Link Next/Prev tersedia di menu_list dan menu publik
+    """
+    def setUp(self):
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        for i in range(25):
+            MenuItem.objects.create(category=cat, name=f"Menu {i:02d}",
+                                    price=Decimal(1000 * (i % 4)), stock_qty=i + 1)
+
+    def _walk(self, ordering):
+        paginator = CursorPaginator(MenuItem.objects.all(), ordering, 7)
+        page = paginator.get_page()
+        forward = [list(page)]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            forward.append(list(page))
+        backward = [list(page)]
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            backward.insert(0, list(page))
+        return forward, backward
+
+    def test_forward_and_backward_match_order_by(self):
+        forward, backward = self._walk(["-price"])
+        expected = list(MenuItem.objects.order_by("-price", "id"))
+        self.assertEqual(sum(forward, []), expected)
+        self.assertEqual(backward, forward)
+        self.assertEqual([len(p) for p in forward], [7, 7, 7, 4])
+
+    def test_deep_page_has_no_count_or_offset(self):
+        paginator = CursorPaginator(MenuItem.objects.all(), ["name"], 7)
+        cursor = paginator.get_page().next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            paginator.get_page(paginator.get_page(cursor).next_cursor)
+        sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_views_render_cursor_links(self):
+        staff = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.client.force_login(staff)
+        res = self.client.get(reverse("catalog:menu_list"), {"sort": "-stock_qty"})
+        self.assertContains(res, "Menu 24")
+        next_cursor = res.context["items"].next_cursor
+        res = self.client.get(reverse("catalog:menu_list"), {"sort": "-stock_qty", "cursor": next_cursor})
+        self.assertContains(res, "Menu 14")
+        self.assertNotContains(res, "Menu 24")
+
+        res = self.client.get(reverse("catalog:public_menu"))
+        self.assertContains(res, "cursor=")
+        res = self.client.get(reverse("catalog:public_menu"), {"cursor": res.context["items"].next_cursor})
+        self.assertContains(res, "Menu 12")
+        self.assertNotContains(res, "Menu 11<")
@@ -0,0 +1,65 @@
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from catalog import reservations
+from catalog.models import Category, MenuItem
+
+
+class PublicMenuCacheTests(TestCase):
+    """
+    Menguji snapshot menu publik:
+    - Response membawa ETag & Last-Modified
+    - GET kondisional dengan ETag yang sama dibalas 304
+    - Perubahan stok/menu mengganti versi snapshot
+    - Stok yang ditampilkan = stok dikurangi reservasi; reserve/release mengganti versi
+    """
+    def setUp(self):
+        self.client = Client()
+        self.cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.item = MenuItem.objects.create(
+            category=self.cat, name="Nasi Goreng", price=Decimal("20000"), stock_qty=20,
+        )
+        self.url = reverse("catalog:public_menu")
+
+    def test_conditional_get_returns_304(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("Last-Modified", res)
+        etag = res["ETag"]
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_menu_change_invalidates_snapshot(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.item.name = "Nasi Goreng Spesial"
+        self.item.save()
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "Nasi Goreng Spesial")
+
+    def test_restock_invalidates_snapshot(self):
+        staff = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.item.stock_qty = 0
+        self.item.save()
+        self.assertNotContains(self.client.get(self.url), "Nasi Goreng")
+
+        self.client.force_login(staff)
+        self.client.post(reverse("catalog:menu_restock", args=[self.item.id]), {"qty": 5})
+        self.assertContains(self.client.get(self.url), "Nasi Goreng")
+
+    def test_snapshot_shows_available_stock(self):
+        etag = self.client.get(self.url)["ETag"]
+        reservations.reserve("cart:lain", {self.item.id: 20})
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotContains(res, "Nasi Goreng")
+
+        reservations.reserve("cart:lain", {self.item.id: 15})
+        self.assertContains(self.client.get(self.url), "Stok: 5")
+        reservations.release("cart:lain")
+        self.assertContains(self.client.get(self.url), "Stok: 20")
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from catalog import menu_cache
+from catalog.models import Category, MenuItem
+from resto.testing import QueryBudgetMixin
+
+
+class CatalogQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Menguji anggaran query halaman katalog:
+    - Jumlah query tidak ikut naik saat jumlah menu bertambah (tanpa N+1)
+    - Header Server-Timing dari middleware profil ikut terkirim
+    """
+    def setUp(self):
+        self.client = Client()
+        self.staff = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.add_items(3)
+
+    def add_items(self, n):
+        start = MenuItem.objects.count()
+        for i in range(start, start + n):
+            MenuItem.objects.create(category=self.cat, name=f"Menu {i}",
+                                    price=Decimal("10000"), stock_qty=5)
+
+    def test_menu_list_budget(self):
+        self.client.login(username="admin", password="pass123")
+        url = reverse("catalog:menu_list")
+        with self.assertMaxQueries(6):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertScalesFlat(lambda: self.client.get(url), lambda: self.add_items(5))
+
+    def test_public_menu_budget(self):
+        url = reverse("catalog:public_menu")
+        self.client.get(url)  # snapshot sudah di cache
+        with self.assertMaxQueries(0):
+            self.client.get(url)
+
+        def cold_get():
+            menu_cache.invalidate()
+            self.client.get(url)
+        self.assertScalesFlat(cold_get, lambda: self.add_items(5))
+
+    def test_server_timing_header(self):
+        self.client.login(username="admin", password="pass123")
+        res = self.client.get(reverse("catalog:category_list"))
+        timing = res["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("tpl;dur=", timing)
+        self.assertIn("total;dur=", timing)
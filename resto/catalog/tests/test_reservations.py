@@ -0,0 +1,68 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog import reservations
+from catalog.models import Category, MenuItem, StockReservation
+from orders.models import Order, OrderItem
+from orders.services import add_items
+
+
+class ReservationTests(TestCase):
+    """
+    Menguji reservasi stok:
+    - tersedia = stok - reservasi aktif pihak lain; reservasi dipotong ke sisa
+    - keranjang dan order POS saling berebut porsi yang sama
+    - URL keranjang lama ikut memegang/melepas stok; kosongkan hanya lewat POST
+    - reservasi kedaluwarsa tidak dihitung dan dibersihkan per batch
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123")
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=3)
+
+    def test_reserve_clamps_to_available(self):
+        self.assertEqual(reservations.reserve("cart:a", {self.nasi.id: 2}), {self.nasi.id: 2})
+        self.assertEqual(reservations.reserve("cart:b", {self.nasi.id: 2}), {self.nasi.id: 1})
+        self.assertEqual(reservations.available([self.nasi.id]), {self.nasi.id: 0})
+        # holder sendiri tidak dihitung sebagai pihak lain
+        self.assertEqual(reservations.available([self.nasi.id], exclude_holder="cart:a"), {self.nasi.id: 2})
+        reservations.reserve("cart:a", {self.nasi.id: 0})
+        self.assertEqual(reservations.available([self.nasi.id]), {self.nasi.id: 2})
+
+    def test_cart_hold_blocks_pos_order(self):
+        self.client.post(reverse("catalog:cart_add", args=[self.nasi.id]), {"qty": 2})
+        order = Order.objects.create(user=self.user, order_no="T0001")
+        result = add_items(order, [(self.nasi.id, 3)])
+        self.assertEqual(result.clamped, [(self.nasi, 3, 1)])
+        self.assertEqual(OrderItem.objects.get(order=order).qty, 1)
+        self.assertEqual(reservations.available([self.nasi.id]), {self.nasi.id: 0})
+
+    def test_legacy_cart_urls_hold_and_release(self):
+        held = StockReservation.objects.filter(holder__startswith="cart:")
+        self.client.post(reverse("cart_add", args=[self.nasi.id]), {"qty": 2})
+        self.assertEqual(held.get().qty, 2)
+        self.client.post(reverse("cart_remove", args=[self.nasi.id]))
+        self.assertFalse(held.exists())
+
+        self.client.post(reverse("cart_add", args=[self.nasi.id]), {"qty": 1})
+        self.assertEqual(self.client.get(reverse("cart_clear")).status_code, 405)
+        self.assertTrue(held.exists())
+        res = self.client.post(reverse("cart_clear"))
+        self.assertRedirects(res, reverse("catalog:cart_view"))
+        self.assertFalse(held.exists())
+        self.assertContains(self.client.get(reverse("cart_view")), "Keranjang kosong.")
+
+    def test_expired_reservations_ignored_and_purged(self):
+        reservations.reserve("cart:a", {self.nasi.id: 3})
+        StockReservation.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(reservations.available([self.nasi.id]), {self.nasi.id: 3})
+        call_command("expire_reservations", batch_size=1, stdout=StringIO())
+        self.assertFalse(StockReservation.objects.exists())
@@ -0,0 +1,59 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from catalog import search
+from catalog.models import Category, MenuItem
+
+
+class MenuSearchTests(TestCase):
+    """
+    Menguji indeks pencarian menu:
+    - Prefix (type-ahead) dan variasi ejaan (satay/sate)
+    - Kecocokan di nama diurutkan lebih dulu
+    - Indeks ikut berubah saat menu / kategori diubah
+    """
+    def setUp(self):
+        self.cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.drink = Category.objects.create(name="Minuman", code="DRINK")
+        self.sate = MenuItem.objects.create(category=self.cat, name="Sate Ayam",
+                                            price=Decimal("25000"), stock_qty=10)
+        self.satay = MenuItem.objects.create(category=self.cat, name="Satay Kambing",
+                                             price=Decimal("30000"), stock_qty=10)
+        self.nasi = MenuItem.objects.create(category=self.cat, name="Nasi Goreng",
+                                            description="Dengan sate ayam dan telur",
+                                            price=Decimal("20000"), stock_qty=10)
+        self.teh = MenuItem.objects.create(category=self.drink, name="Es Teh",
+                                           price=Decimal("5000"), stock_qty=10)
+
+    def test_prefix_and_spelling_variants(self):
+        self.assertEqual(search.search_ids("nasi gor"), [self.nasi.id])
+        hits = search.search_ids("satay")
+        self.assertEqual(set(hits), {self.sate.id, self.satay.id, self.nasi.id})
+        # yang cocok di nama harus di atas yang cocok di deskripsi
+        self.assertEqual(hits[-1], self.nasi.id)
+
+    def test_index_follows_changes(self):
+        self.teh.name = "Es Jeruk"
+        self.teh.save()
+        self.assertEqual(search.search_ids("jeruk"), [self.teh.id])
+        self.assertEqual(search.search_ids("teh"), [])
+
+        self.drink.name = "Beverages"
+        self.drink.save()
+        self.assertEqual(search.search_ids("bever"), [self.teh.id])
+
+        self.teh.delete()
+        self.assertEqual(search.search_ids("jeruk"), [])
+
+    def test_views_use_index(self):
+        res = self.client.get(reverse("catalog:public_menu"), {"q": "satay"})
+        self.assertContains(res, "Sate Ayam")
+        self.assertNotContains(res, "Es Teh")
+
+        staff = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.client.force_login(staff)
+        res = self.client.get(reverse("catalog:menu_list"), {"q": "es t"})
+        self.assertContains(res, "Es Teh")
+        self.assertNotContains(res, "Sate Ayam")
@@ -0,0 +1,113 @@
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from catalog.models import Category, MenuItem, StockMovement
+from catalog.stock import InsufficientStock, deduct_stock, restock, stock_take
+
+
+class DeductStockTests(TestCase):
+    """
+    Menguji service pengurangan stok:
+    - Baris item yang sama digabung, stok berkurang, movement OUT tercatat
+    - Oversell ditolak dan tidak ada stok yang berubah
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123")
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=5)
+        self.teh = MenuItem.objects.create(category=cat, name="Es Teh",
+                                           price=Decimal("5000"), stock_qty=10)
+
+    def test_deduct_merges_lines_and_writes_movements(self):
+        deduct_stock([(self.nasi.id, 2), (self.teh.id, 3), (self.nasi.id, 1)], self.user, note="Sale X")
+        self.nasi.refresh_from_db()
+        self.teh.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 2)
+        self.assertEqual(self.teh.stock_qty, 7)
+        moves = dict(StockMovement.objects.values_list("menu_item_id", "qty"))
+        self.assertEqual(moves, {self.nasi.id: 3, self.teh.id: 3})
+
+    def test_oversell_refused_without_partial_update(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            deduct_stock([(self.nasi.id, 6), (self.teh.id, 1)], self.user)
+        self.assertIn("stock", ctx.exception.message_dict)
+        self.nasi.refresh_from_db()
+        self.teh.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 5)
+        self.assertEqual(self.teh.stock_qty, 10)
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class BulkStockTests(TestCase):
+    """
+    Menguji restock & stok opname massal:
+    - Restock menambah stok banyak menu + movement IN, ledger tetap cocok
+    - Stok opname hanya menyesuaikan item yang selisih (ADJUST bertanda)
+    - Upload CSV (kolom berlebih diabaikan) dan API JSON; menu tak dikenal menggagalkan seluruh batch
+    - Restock satu menu dari UI memakai jalur restock yang sama
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=5)
+        self.teh = MenuItem.objects.create(category=cat, name="Es Teh",
+                                           price=Decimal("5000"), stock_qty=10)
+        self.url = reverse("catalog:menu_bulk_stock")
+        self.client.login(username="admin", password="pass123")
+
+    def test_restock_and_stock_take(self):
+        restock([(self.nasi.id, 10), (self.teh.id, 2)], self.user)
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 15)
+        moves = stock_take([(self.nasi.id, 14), (self.teh.id, 12)], self.user)
+        self.assertEqual([(m.menu_item_id, m.move_type, m.qty) for m in moves],
+                         [(self.nasi.id, "ADJUST", -1)])
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 14)
+
+    def test_unknown_item_rolls_back(self):
+        with self.assertRaises(ValidationError):
+            restock([(self.nasi.id, 3), (99999, 1)], self.user)
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 5)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_form_with_csv_upload(self):
+        self.assertContains(self.client.get(self.url), f'name="qty_{self.nasi.id}"')
+        csv_file = SimpleUploadedFile("opname.csv", f"menu_item_id,name,qty\n{self.teh.id},Es Teh,7\n".encode())
+        res = self.client.post(self.url, {"mode": "count", "note": "", "csv_file": csv_file,
+                                          f"qty_{self.nasi.id}": "5"})
+        self.assertRedirects(res, reverse("catalog:menu_list"))
+        self.teh.refresh_from_db()
+        self.assertEqual(self.teh.stock_qty, 7)
+        self.assertEqual(StockMovement.objects.get().qty, -3)
+
+    def test_csv_with_extra_fields(self):
+        csv_file = SimpleUploadedFile("restock.csv", f"menu_item_id,qty\n{self.nasi.id},5,\n".encode())
+        res = self.client.post(self.url, {"mode": "restock", "note": "", "csv_file": csv_file})
+        self.assertRedirects(res, reverse("catalog:menu_list"))
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 10)
+
+    def test_single_restock_view(self):
+        res = self.client.post(reverse("catalog:menu_restock", args=[self.teh.id]), {"qty": 3})
+        self.assertRedirects(res, reverse("catalog:menu_list"))
+        self.teh.refresh_from_db()
+        self.assertEqual(self.teh.stock_qty, 13)
+        move = StockMovement.objects.get()
+        self.assertEqual((move.move_type, move.qty, move.note), ("IN", 3, "Restock via UI"))
+
+    def test_json_api(self):
+        res = self.client.post(self.url, {"mode": "restock", "lines": [
+            {"menu_item_id": self.nasi.id, "qty": 4}]}, content_type="application/json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["movements"][0]["stock_qty"], 9)
+        res = self.client.post(self.url, {"mode": "restock", "lines": [
+            {"menu_item_id": self.nasi.id, "qty": -4}]}, content_type="application/json")
+        self.assertEqual(res.status_code, 400)
@@ -15,6 +15,7 @@ urlpatterns = [
     path("menu/<int:pk>/edit/", views.menu_update, name="menu_update"),
     path("menu/<int:pk>/delete/", views.menu_delete, name="menu_delete"),
     path("menu/<int:pk>/restock/", views.menu_restock, name="menu_restock"),
+    path("menu/stock/", views.menu_bulk_stock, name="menu_bulk_stock"),
 
     # PUBLIC menu + CART (pelanggan)
     path("public/menu/", views.public_menu, name="public_menu"),
@@ -22,5 +23,6 @@ urlpatterns = [
     path("public/cart/add/<int:pk>/", views.cart_add, name="cart_add"),
     path("public/cart/update/<int:pk>/", views.cart_update, name="cart_update"),
     path("public/cart/remove/<int:pk>/", views.cart_remove, name="cart_remove"),
+    path("public/cart/clear/", views.cart_clear, name="cart_clear"),
     path("public/cart/checkout/", views.cart_checkout, name="cart_checkout"),
 ]
@@ -1,18 +1,30 @@
+import hashlib
+import json
+from calendar import timegm
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from .models import Category, MenuItem, StockMovement
-from .forms import CategoryForm, MenuItemForm
-from django.db.models import Q
+from . import cart as cart_store, images, ledger, menu_cache, reservations, search, stock
+from .models import Category, MenuItem
+from .forms import BulkStockForm, CategoryForm, MenuItemForm
+from .pagination import CursorPaginator
+from orders.idempotency import idempotent
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_POST
+from django.views.static import serve
 from decimal import Decimal
-from orders.models import Order, OrderItem, Customer
+from orders.services import checkout_cart
 
 staff_required = user_passes_test(lambda u: u.is_staff)
 
-CART_KEY = 'cart'  # session key
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
 # ---------- CATEGORY ----------
 @login_required
@@ -29,11 +41,8 @@ def category_list(request):
     allowed = {"name", "code", "-name", "-code"}
     if sort not in allowed:
         sort = "name"
-    qs = qs.order_by(sort)
 
-    paginator = Paginator(qs, 10)
-    page = request.GET.get("page")
-    categories = paginator.get_page(page)
+    categories = CursorPaginator(qs, [sort, "id"], 10).get_page(request.GET.get("cursor"))
     return render(request, "catalog/category_list.html", {
         "categories": categories, "q": q, "sort": sort
     })
@@ -81,17 +90,13 @@ def menu_list(request):
     sort = request.GET.get("sort", "name")  # name | price | stock_qty | -price | -stock_qty
     qs = MenuItem.objects.select_related("category")
     if q:
-        qs = (MenuItem.objects.filter(name__icontains=q) |
-              MenuItem.objects.filter(category__name__icontains=q))
+        qs = qs.filter(pk__in=search.search_ids(q))
 
     allowed = {"name", "price", "stock_qty", "-name", "-price", "-stock_qty"}
     if sort not in allowed:
         sort = "name"
-    qs = qs.order_by(sort, "id")
 
-    paginator = Paginator(qs, 10)
-    page = request.GET.get("page")
-    items = paginator.get_page(page)
+    items = CursorPaginator(qs, [sort, "id"], 10).get_page(request.GET.get("cursor"))
     return render(request, "catalog/menu_list.html", {"items": items, "q": q, "sort": sort})
 
 @login_required
@@ -99,7 +104,10 @@ def menu_list(request):
 def menu_create(request):
     form = MenuItemForm(request.POST or None, request.FILES or None)
     if request.method == "POST" and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            item = form.save()
+            # stok awal ikut tercatat di ledger
+            ledger.record_adjustment(item, 0, request.user, "Stok awal")
         messages.success(request, "Menu berhasil ditambahkan.")
         return redirect("catalog:menu_list")
     return render(request, "catalog/menu_form.html",
@@ -111,9 +119,16 @@ def menu_update(request, pk):
     obj = get_object_or_404(MenuItem, pk=pk)
     form = MenuItemForm(request.POST or None, request.FILES or None, instance=obj)
     if request.method == "POST" and form.is_valid():
-        form.save()
-        messages.success(request, "Menu diperbarui.")
-        return redirect("catalog:menu_list")
+        try:
+            with transaction.atomic():
+                # stok diubah sebesar selisih dari yang ditampilkan, tidak ditimpa (checkout bersamaan)
+                stock.adjust(obj.pk, form.stock_delta(), request.user, "Edit stok via form menu")
+                form.save_except_stock()
+        except ValidationError as ve:
+            form.add_error(None, ve)
+        else:
+            messages.success(request, "Menu diperbarui.")
+            return redirect("catalog:menu_list")
     return render(request, "catalog/menu_form.html",
                   {"form": form, "title": "Edit Menu"})
 
@@ -141,64 +156,148 @@ def menu_restock(request, pk):
             messages.error(request, "Qty restock harus lebih dari 0.")
             return redirect("catalog:menu_list")
 
-        with transaction.atomic():
-            item.stock_qty += qty
-            item.save(update_fields=["stock_qty"])
-            StockMovement.objects.create(
-                menu_item=item,
-                user=request.user,
-                move_type=StockMovement.MOVE_IN,
-                qty=qty,
-                note="Restock via UI"
-            )
+        # UPDATE stock_qty = stock_qty + qty di database, tidak menimpa pengurangan stok bersamaan
+        stock.restock([(item.pk, qty)], request.user, "Restock via UI")
         messages.success(request, f"Restock {item.name} +{qty} berhasil.")
         return redirect("catalog:menu_list")
 
     return render(request, "catalog/restock_form.html", {"item": item})
 
+
+def _apply_bulk_stock(mode, lines, user, note):
+    if mode == BulkStockForm.MODE_COUNT:
+        return stock.stock_take(lines, user, note or "Stok opname")
+    if any(qty < 0 for _, qty in lines):
+        raise ValidationError({"lines": ["Qty restock tidak boleh negatif; pakai stok opname untuk koreksi."]})
+    return stock.restock(lines, user, note or "Restock massal")
+
+
+def _bulk_stock_json(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+        mode = payload.get("mode", BulkStockForm.MODE_RESTOCK)
+        lines = [(int(line["menu_item_id"]), int(line["qty"])) for line in payload["lines"]]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({"errors": {"lines": ["Format baris tidak valid."]}}, status=400)
+    if mode not in dict(BulkStockForm.MODE_CHOICES):
+        return JsonResponse({"errors": {"mode": [f"Mode tidak dikenal: {mode}"]}}, status=400)
+    try:
+        movements = _apply_bulk_stock(mode, lines, request.user, str(payload.get("note") or ""))
+    except ValidationError as ve:
+        return JsonResponse({"errors": ve.message_dict}, status=400)
+    stock_now = dict(MenuItem.objects.filter(pk__in=[m.menu_item_id for m in movements])
+                     .values_list("pk", "stock_qty"))
+    return JsonResponse({
+        "mode": mode,
+        "movements": [{"menu_item_id": m.menu_item_id, "move_type": m.move_type, "qty": m.qty,
+                       "stock_qty": stock_now.get(m.menu_item_id)} for m in movements],
+    })
+
+
+@login_required
+@staff_required
+def menu_bulk_stock(request):
+    """
+    Restock / stok opname banyak menu dalam satu transaksi (satu UPDATE +
+    satu bulk INSERT StockMovement). Input dari tabel, upload CSV, atau JSON:
+    ``{"mode": "restock"|"count", "note": "...", "lines": [{"menu_item_id": 1, "qty": 5}]}``.
+    """
+    if request.method == "POST" and request.content_type == "application/json":
+        return _bulk_stock_json(request)
+
+    form = BulkStockForm(request.POST or None, request.FILES or None)
+    if request.method == "POST" and form.is_valid():
+        mode = form.cleaned_data["mode"]
+        try:
+            lines = form.lines()
+            movements = _apply_bulk_stock(mode, lines, request.user, form.cleaned_data["note"])
+        except ValidationError as ve:
+            for msg in ve.messages:
+                messages.error(request, msg)
+        else:
+            if not lines:
+                messages.error(request, "Tidak ada qty yang diisi.")
+            elif mode == BulkStockForm.MODE_COUNT:
+                messages.success(request, f"Stok opname disimpan: {len(movements)} menu disesuaikan "
+                                          f"dari {len(lines)} baris.")
+                return redirect("catalog:menu_list")
+            else:
+                messages.success(request, f"Restock {len(movements)} menu berhasil.")
+                return redirect("catalog:menu_list")
+
+    items = MenuItem.objects.select_related("category").order_by("category__name", "name")
+    return render(request, "catalog/bulk_stock_form.html", {"form": form, "items": items})
+
 # ---------- PUBLIC ----------
+def _menu_etag(request, version):
+    # HTML ikut berisi navbar user & token CSRF, jadi keduanya masuk ke ETag
+    raw = "|".join([
+        str(version),
+        str(request.user.pk or ""),
+        request.META.get("CSRF_COOKIE", ""),
+    ])
+    return '"menu-%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def _menu_last_modified(version):
+    return timegm(menu_cache.version_datetime(version).utctimetuple())
+
+
 def public_menu(request):
     """
     Halaman publik untuk customer melihat menu yang tersedia.
     Fitur: search, filter kategori, pagination. Hanya item aktif (is_active=True) dan stock > 0.
+    Data diambil dari snapshot menu di cache (catalog.menu_cache) dan mendukung
+    conditional GET (ETag/Last-Modified -> 304).
     """
     q = request.GET.get("q", "").strip()
     cat = request.GET.get("cat", "").strip()
-    page = request.GET.get("page")
+    cursor = request.GET.get("cursor")
+
+    version = menu_cache.get_version()
+    etag = _menu_etag(request, version)
+    last_modified = _menu_last_modified(version)
 
-    categories = Category.objects.order_by("name")
-    items = MenuItem.objects.select_related("category").filter(is_active=True, stock_qty__gt=0)
+    # Jangan balas 304 kalau ada flash message yang harus ditampilkan
+    if not len(messages.get_messages(request)):
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            patch_cache_control(not_modified, private=True, no_cache=True)
+            return not_modified
 
+    snapshot = menu_cache.get_snapshot()
+    items = snapshot["items"]
     if cat:
-        items = items.filter(category__id=cat)
+        items = [m for m in items if str(m["category"]["id"]) == cat]
     if q:
-        items = items.filter(
-            Q(name__icontains=q) |
-            Q(description__icontains=q) |
-            Q(category__name__icontains=q)
-        )
-
-    items = items.order_by("category__name", "name")
-    paginator = Paginator(items, 12)
-    items_page = paginator.get_page(page)
-
-    return render(request, "public/menu.html", {
-        "categories": categories,
+        # hasil pencarian diurutkan berdasarkan relevansi
+        rank = {pk: pos for pos, pk in enumerate(search.search_ids(q))}
+        items = sorted((m for m in items if m["id"] in rank), key=lambda m: rank[m["id"]])
+        paginator = CursorPaginator(items, ["rank", "id"], 12,
+                                    key=lambda m: (rank[m["id"]], m["id"]))
+    else:
+        # snapshot sudah urut kategori lalu nama
+        paginator = CursorPaginator(items, ["category__name", "name", "id"], 12,
+                                    key=menu_cache.sort_key)
+    items_page = paginator.get_page(cursor)
+
+    response = render(request, "public/menu.html", {
+        "categories": snapshot["categories"],
         "items": items_page,
         "q": q,
         "cat": cat,
     })
+    response["ETag"] = _menu_etag(request, snapshot["version"])
+    response["Last-Modified"] = http_date(_menu_last_modified(snapshot["version"]))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-# ========= CART (Session) =========
-def _get_cart(session):
-    return session.get(CART_KEY, {})
-
-def _save_cart(session, cart):
-    session[CART_KEY] = cart
-    session.modified = True
+# ========= CART (cache, lihat catalog.cart) =========
+def _reserve_cart(request, wanted):
+    return reservations.reserve(reservations.cart_holder(cart_store.cart_id(request)), wanted)
 
 def cart_add(request, pk):
-    """Tambah 1 item (atau qty dari form) ke keranjang session."""
+    """Tambah 1 item (atau qty dari form) ke keranjang."""
     try:
         qty = int(request.POST.get('qty', 1))
     except ValueError:
@@ -207,13 +306,16 @@ def cart_add(request, pk):
         qty = 1
 
     item = get_object_or_404(MenuItem, pk=pk, is_active=True, stock_qty__gt=0)
-    cart = _get_cart(request.session)
-    current = int(cart.get(str(pk), 0))
-    qty = min(qty, item.stock_qty)  # clamp ke stok
-
-    cart[str(pk)] = current + qty
-    _save_cart(request.session, cart)
-    messages.success(request, f"Tambahkan {item.name} × {qty} ke keranjang.")
+    cart = cart_store.get_cart(request)
+    current = cart.get(pk, 0)
+    # pegang stok untuk keranjang ini; dipotong ke sisa yang belum dipegang orang lain
+    held = _reserve_cart(request, {pk: current + qty})[pk]
+    if held <= current:
+        messages.error(request, f"Stok {item.name} sedang habis dipesan.")
+    else:
+        cart[pk] = held
+        cart_store.save_cart(request, cart)
+        messages.success(request, f"Tambahkan {item.name} × {held - current} ke keranjang.")
 
     # Kembali ke halaman sebelumnya, fallback ke public_menu (namespaced!)
     return redirect(request.META.get('HTTP_REFERER') or reverse('catalog:public_menu'))
@@ -221,7 +323,7 @@ def cart_add(request, pk):
 def cart_view(request):
     """Tampilkan isi keranjang + subtotal, pajak, grand total."""
     from decimal import Decimal  # pastikan Decimal tersedia di fungsi ini juga
-    cart = _get_cart(request.session)
+    cart = cart_store.get_cart(request)
     if not cart:
         return render(request, 'public/cart.html', {
             'rows': [],
@@ -230,13 +332,12 @@ def cart_view(request):
             'grand': Decimal('0.00'),
         })
 
-    ids = [int(k) for k in cart.keys()]
-    items = MenuItem.objects.filter(id__in=ids).select_related('category')
+    items = MenuItem.objects.filter(id__in=list(cart)).select_related('category')
 
     rows = []
     subtotal = Decimal('0.00')
     for m in items:
-        q = int(cart[str(m.id)])
+        q = cart[m.id]
         line = (m.price * q)
         rows.append({'item': m, 'qty': q, 'line': line})
         subtotal += line
@@ -257,31 +358,43 @@ def cart_update(request, pk):
     if qty < 1:
         qty = 1
     item = get_object_or_404(MenuItem, pk=pk, is_active=True)
-    qty = min(qty, item.stock_qty)
 
-    cart = _get_cart(request.session)
-    if str(pk) in cart:
-        cart[str(pk)] = qty
-        _save_cart(request.session, cart)
+    cart = cart_store.get_cart(request)
+    if pk in cart:
+        held = _reserve_cart(request, {pk: qty})[pk]
+        if held < qty:
+            messages.warning(request, f"Stok {item.name} tersisa {held}.")
+        cart[pk] = held
+        cart_store.save_cart(request, cart)
         messages.success(request, "Qty diperbarui.")
     return redirect('catalog:cart_view')
 
 def cart_remove(request, pk):
     """Hapus item dari keranjang."""
-    cart = _get_cart(request.session)
-    if str(pk) in cart:
-        del cart[str(pk)]
-        _save_cart(request.session, cart)
+    cart = cart_store.get_cart(request)
+    if pk in cart:
+        del cart[pk]
+        _reserve_cart(request, {pk: 0})
+        cart_store.save_cart(request, cart)
         messages.success(request, "Item dihapus dari keranjang.")
     return redirect('catalog:cart_view')
 
+@require_POST
+def cart_clear(request):
+    """Kosongkan keranjang dan lepas semua stok yang dipegangnya."""
+    reservations.release(reservations.cart_holder(cart_store.cart_id(request)))
+    cart_store.clear_cart(request)
+    messages.success(request, "Keranjang dikosongkan.")
+    return redirect('catalog:cart_view')
+
 @login_required
+@idempotent('cart_checkout')
 def cart_checkout(request):
     """
     Buat Order dari isi keranjang (butuh login staff/kasir).
     Redirect ke halaman checkout POS untuk proses pembayaran.
     """
-    cart = _get_cart(request.session)
+    cart = cart_store.get_cart(request)
     if not cart:
         messages.error(request, "Keranjang kosong.")
         return redirect('catalog:public_menu')
@@ -289,22 +402,32 @@ def cart_checkout(request):
     if request.method == 'POST':
         name = (request.POST.get('name') or '').strip() or 'Guest'
         phone = (request.POST.get('phone') or '').strip()
-        customer, _ = Customer.objects.get_or_create(name=name, phone=phone)
-
-        import uuid
-        order_no = uuid.uuid4().hex[:10].upper()
-        o = Order.objects.create(user=request.user, customer=customer, order_no=order_no)
-
-        items = MenuItem.objects.filter(id__in=[int(k) for k in cart.keys()])
-        for m in items:
-            q = min(int(cart[str(m.id)]), m.stock_qty)
-            OrderItem.objects.create(order=o, menu_item=m, qty=q, price=m.price)
-
-        o.recalc_totals()
-        _save_cart(request.session, {})  # kosongkan keranjang
+        holder = reservations.cart_holder(cart_store.cart_id(request))
+        try:
+            o, shortages = checkout_cart(request.user, cart, holder, name=name, phone=phone)
+        except stock.InsufficientStock as e:
+            for msg in e.messages:
+                messages.error(request, msg)
+            return redirect('catalog:cart_view')
+        for item, wanted, got in shortages:
+            messages.warning(request, f"Stok {item.name} tidak cukup, dipesan {got} dari {wanted}.")
+        cart_store.clear_cart(request)  # kosongkan keranjang
         messages.success(request, f"Order {o.order_no} dibuat. Lanjut ke pembayaran.")
         return redirect('pos_checkout', order_no=o.order_no)
 
     # GET → tampilkan form singkat data pelanggan
     return render(request, 'public/checkout.html')
 # ========= END CART =========
+
+
+# ========= MEDIA (DEBUG) =========
+def media_file(request, path):
+    """
+    Sajikan file MEDIA saat DEBUG. Gambar menu berbasis hash isinya tidak
+    pernah berubah, jadi boleh di-cache browser/CDN selama setahun.
+    Di produksi, atur header yang sama di web server (nginx) untuk /media/menu/.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if images.is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=MEDIA_IMMUTABLE_MAX_AGE, immutable=True)
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, Order, OrderItem
+from .models import Customer, Order, OrderItem, OrderSequence
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -15,4 +15,8 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ('id','name','phone','email','created_at')
-    search_fields = ('name','phone','email')
\ No newline at end of file
+    search_fields = ('name','phone','phone_normalized','email')
+@admin.register(OrderSequence)
+class OrderSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix','last_value')
+    search_fields = ('prefix',)
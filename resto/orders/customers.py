@@ -0,0 +1,113 @@
+"""
+Pencarian dan perapian data pelanggan berdasarkan nomor telepon
+ternormalisasi (lihat orders.phones).
+
+- ``find_or_create_customer``: pelanggan lama ditemukan lewat index
+  (phone_normalized, name); tamu tanpa nomor dan tanpa nama tidak lagi dibuat
+  sebagai baris "Guest" baru.
+- ``merge_duplicates``: gabungkan pelanggan dengan nomor yang sama per batch
+  (order dipindah ke pelanggan tertua dalam satu UPDATE per batch).
+"""
+from django.db import transaction
+from django.db.models import Case, Count, Min, Value, When
+
+from .models import Customer, Order
+from .phones import normalize_phone
+
+GUEST_NAMES = ('', 'Guest')
+
+
+def find_or_create_customer(name, phone=''):
+    """
+    Pelanggan untuk checkout. Kunci utama nomor telepon ternormalisasi;
+    tanpa nomor, dicari per nama. Tamu anonim (tanpa nomor & nama) -> None.
+    """
+    name = (name or '').strip()
+    phone = (phone or '').strip()
+    key = normalize_phone(phone)
+    if key:
+        existing = Customer.objects.filter(phone_normalized=key).order_by('id').first()
+    elif name in GUEST_NAMES:
+        return None
+    else:
+        existing = Customer.objects.filter(phone_normalized='', name=name).order_by('id').first()
+    if existing is not None:
+        return existing
+    return Customer.objects.create(name=name or 'Guest', phone=phone)
+
+
+def backfill_phone_keys(batch_size=2000):
+    """Isi phone_normalized yang kosong (mis. baris hasil INSERT mentah)."""
+    updated = 0
+    last = 0
+    while True:
+        rows = list(Customer.objects.filter(pk__gt=last, phone_normalized='').exclude(phone='')
+                    .order_by('pk').only('id', 'phone')[:batch_size])
+        if not rows:
+            return updated
+        last = rows[-1].pk
+        changed = []
+        for c in rows:
+            c.phone_normalized = normalize_phone(c.phone)
+            if c.phone_normalized:
+                changed.append(c)
+        Customer.objects.bulk_update(changed, ['phone_normalized'])
+        updated += len(changed)
+
+
+def duplicate_groups():
+    """Queryset (phone_normalized, n, keep) untuk nomor yang dipakai > 1 pelanggan."""
+    return (Customer.objects.exclude(phone_normalized='').order_by()
+            .values('phone_normalized').annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1)
+            .order_by('phone_normalized'))
+
+
+def _merge_batch(groups):
+    keep_by_key = {g['phone_normalized']: g['keep'] for g in groups}
+    dupes = list(Customer.objects.filter(phone_normalized__in=list(keep_by_key))
+                 .exclude(pk__in=list(keep_by_key.values())).order_by('pk'))
+    keepers = Customer.objects.in_bulk(list(keep_by_key.values()))
+    target = {}
+    for d in dupes:
+        keeper = keepers[keep_by_key[d.phone_normalized]]
+        target[d.pk] = keeper.pk
+        # lengkapi data yang kosong di pelanggan yang dipertahankan
+        for field in ('email', 'address'):
+            if not getattr(keeper, field) and getattr(d, field):
+                setattr(keeper, field, getattr(d, field))
+        if keeper.name in GUEST_NAMES and d.name not in GUEST_NAMES:
+            keeper.name = d.name
+    with transaction.atomic():
+        Order.objects.filter(customer_id__in=list(target)).update(customer_id=Case(
+            *[When(customer_id=dupe, then=Value(keep)) for dupe, keep in target.items()]))
+        Customer.objects.bulk_update(list(keepers.values()), ['name', 'email', 'address'])
+        Customer.objects.filter(pk__in=list(target)).delete()
+    return len(target)
+
+
+def merge_duplicates(batch_size=500):
+    """
+    Gabungkan pelanggan yang nomornya sama: yang tertua (id terkecil)
+    dipertahankan, order milik duplikat dipindah, lalu duplikat dihapus.
+    Mengembalikan (jumlah grup, jumlah pelanggan dihapus).
+    """
+    groups_done = removed = 0
+    while True:
+        groups = list(duplicate_groups()[:batch_size])
+        if not groups:
+            return groups_done, removed
+        removed += _merge_batch(groups)
+        groups_done += len(groups)
+
+
+def purge_guests(batch_size=2000):
+    """Hapus baris "Guest" tanpa nomor; order-nya jadi tanpa pelanggan."""
+    removed = 0
+    while True:
+        ids = list(Customer.objects.filter(phone_normalized='', name__in=GUEST_NAMES)
+                   .order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        with transaction.atomic():
+            Order.objects.filter(customer_id__in=ids).update(customer=None)
+            removed += Customer.objects.filter(pk__in=ids).delete()[0]
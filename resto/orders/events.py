@@ -0,0 +1,117 @@
+"""
+Event bus in-process untuk layar dapur (Server-Sent Events lewat ASGI).
+
+- ``publish_order(order, kind)`` dipanggil dari service (placed/paid/
+  cancelled). Event baru dikirim setelah transaksi commit, payload dibangun
+  sekali lalu disebar ke semua layar; layar tidak pernah mem-poll tabel Order.
+- Setiap koneksi SSE berlangganan lewat ``bus.subscribe()`` dan mendapat
+  asyncio.Queue miliknya sendiri. Publish dari thread view sinkron aman
+  (``loop.call_soon_threadsafe``).
+- ``RECENT_EVENTS`` event terakhir disimpan (ring buffer) supaya layar yang
+  tersambung ulang dengan header ``Last-Event-ID`` tidak kehilangan pesanan.
+
+Bus ini per proses: jalankan server ASGI dengan satu worker (mis.
+``uvicorn resto.asgi:application``), atau ganti dengan pub/sub bersama
+(Redis) kalau worker lebih dari satu.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+
+from django.db import transaction
+from django.utils import timezone
+
+EVENT_PLACED = 'placed'
+EVENT_PAID = 'paid'
+EVENT_CANCELLED = 'cancelled'
+RECENT_EVENTS = 200
+SUBSCRIBER_QUEUE_SIZE = 500
+
+
+class Event:
+    def __init__(self, event_id, kind, data):
+        self.id = event_id
+        self.kind = kind
+        self.data = data
+
+    def sse(self):
+        """Format satu pesan SSE."""
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class _Subscriber:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event):
+        # dipanggil di loop milik subscriber; layar yang macet kehilangan event lama
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    def __init__(self, history=RECENT_EVENTS):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._recent = deque(maxlen=history)
+        self._subscribers = set()
+
+    def publish(self, kind, data):
+        with self._lock:
+            event = Event(next(self._ids), kind, data)
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # loop sudah ditutup (koneksi putus tanpa unsubscribe)
+                self.unsubscribe(sub)
+        return event
+
+    def subscribe(self):
+        sub = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def replay(self, after_id):
+        """Event dengan id > after_id yang masih ada di buffer."""
+        with self._lock:
+            return [e for e in self._recent if e.id > after_id]
+
+    @property
+    def last_id(self):
+        with self._lock:
+            return self._recent[-1].id if self._recent else 0
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+bus = EventBus()
+
+
+def order_payload(order):
+    items = list(order.items.order_by('id').values_list('menu_item__name', 'qty'))
+    return {
+        'order_no': order.order_no,
+        'status': order.status,
+        'customer': order.customer.name if order.customer_id else '',
+        'items': [{'name': name, 'qty': qty} for name, qty in items],
+        'at': timezone.localtime().isoformat(timespec='seconds'),
+    }
+
+
+def publish_order(order, kind):
+    """Kirim event order ke semua layar setelah transaksi yang sedang berjalan commit."""
+    transaction.on_commit(lambda: bus.publish(kind, order_payload(order)))
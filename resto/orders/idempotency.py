@@ -0,0 +1,117 @@
+"""
+Kunci idempotensi untuk POST checkout.
+
+Kasir yang menekan "Bayar" dua kali, atau browser yang mengulang request
+karena Wi-Fi putus, mengirim POST yang sama dua kali. Form checkout memuat
+field tersembunyi ``idempotency_key`` (template tag ``{% idempotency_field %}``);
+client API boleh memakai header ``Idempotency-Key``.
+
+- Request pertama mengklaim kunci dengan INSERT (unik per scope) yang langsung
+  commit, menjalankan view, lalu menyimpan hasil redirect-nya.
+- Request ulang hanya membaca baris itu (SELECT ber-index) dan langsung
+  mengembalikan redirect yang sama: tanpa lock, validasi Payment, atau
+  pengurangan stok. Kalau request pertama masih berjalan, ditunggu sebentar.
+- Hasil selain redirect (mis. form error) tidak disimpan; kuncinya dilepas
+  supaya request berikutnya diproses normal.
+- Kunci kedaluwarsa setelah ``IDEMPOTENCY_TTL`` detik dan dibersihkan oleh
+  ``manage.py purge_idempotency_keys``.
+"""
+import datetime
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+FIELD = 'idempotency_key'
+HEADER = 'Idempotency-Key'
+TTL = datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_TTL', 60 * 60 * 24))
+IN_PROGRESS_WAIT = 5.0
+POLL_INTERVAL = 0.1
+_VALID_KEY = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+def request_key(request):
+    key = request.headers.get(HEADER) or request.POST.get(FIELD) or ''
+    return key if _VALID_KEY.match(key) else None
+
+
+def _claim(scope, key, user):
+    """(record, True) kalau kunci baru diklaim request ini, (record, False) kalau sudah ada."""
+    now = timezone.now()
+    while True:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    scope=scope, key=key, user=user if user.is_authenticated else None,
+                    expires_at=now + TTL), True
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is None:
+            continue            # dilepas request pertama barusan, klaim ulang
+        if record.expires_at <= now:
+            record.delete()
+            continue
+        return record, False
+
+
+def _replay(record):
+    response = HttpResponseRedirect(record.location)
+    response.status_code = record.status_code
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """Decorator view POST: request dengan kunci yang sama hanya diproses sekali."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request_key(request) if request.method == 'POST' else None
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            deadline = time.monotonic() + IN_PROGRESS_WAIT
+            while True:
+                record, created = _claim(scope, key, request.user)
+                if created:
+                    break
+                if record.user_id not in (None, request.user.pk):
+                    return HttpResponse("Kunci idempotensi milik pengguna lain.", status=422)
+                if record.status_code:
+                    return _replay(record)
+                if time.monotonic() >= deadline:
+                    return HttpResponse("Permintaan yang sama masih diproses.", status=409)
+                time.sleep(POLL_INTERVAL)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            if 300 <= response.status_code < 400 and response.has_header('Location'):
+                record.status_code = response.status_code
+                record.location = response['Location'][:255]
+                record.save(update_fields=['status_code', 'location'])
+            else:
+                record.delete()
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired(now=None, batch_size=1000):
+    now = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now)
+                   .order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from orders import customers
+from orders.models import Customer
+
+
+class Command(BaseCommand):
+    help = ("Rapikan tabel Customer: isi kunci nomor telepon ternormalisasi, gabungkan "
+            "pelanggan dengan nomor yang sama (order dipindah ke yang tertua), dan "
+            "opsional hapus baris 'Guest' tanpa nomor.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--guests', action='store_true',
+                            help="hapus pelanggan 'Guest'/tanpa nama yang tidak punya nomor")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='hanya hitung, tidak mengubah data')
+
+    def handle(self, *args, guests=False, batch_size=500, dry_run=False, **opts):
+        if dry_run:
+            groups = customers.duplicate_groups()
+            extra = (groups.aggregate(total=Sum('n'))['total'] or 0) - groups.count()
+            self.stdout.write(f"{groups.count()} nomor ganda, {extra} pelanggan akan digabung.")
+            if guests:
+                n = Customer.objects.filter(phone_normalized='', name__in=customers.GUEST_NAMES).count()
+                self.stdout.write(f"{n} pelanggan Guest tanpa nomor akan dihapus.")
+            return
+
+        filled = customers.backfill_phone_keys(batch_size=max(batch_size, 1000))
+        self.stdout.write(f"Kunci nomor diisi: {filled} pelanggan.")
+        groups, removed = customers.merge_duplicates(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{groups} nomor ganda digabung, {removed} pelanggan dihapus."))
+        if guests:
+            purged = customers.purge_guests(batch_size=max(batch_size, 1000))
+            self.stdout.write(self.style.SUCCESS(f"{purged} pelanggan Guest tanpa nomor dihapus."))
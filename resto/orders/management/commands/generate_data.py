@@ -0,0 +1,318 @@
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from catalog import menu_cache
+from catalog.models import MenuItem, StockMovement
+from orders.models import Customer, Order, OrderItem, OrderSequence
+from orders.phones import normalize_phone
+from orders.numbering import day_prefix, format_order_no, outlet_code
+from payments.models import Payment, PaymentMethod
+from resto import loadtest
+
+TAX_RATE = Decimal('0.10')
+CENT = Decimal('0.01')
+
+# Bobot per hari (Senin=0) dan per jam buka (10.00-21.59): ramai saat makan siang/malam & akhir pekan
+WEEKDAY_WEIGHTS = [0.85, 0.8, 0.85, 0.9, 1.15, 1.35, 1.25]
+HOUR_WEIGHTS = {10: 3, 11: 9, 12: 14, 13: 10, 14: 4, 15: 3, 16: 4, 17: 7, 18: 12, 19: 13, 20: 8, 21: 3}
+# (kode, bobot)
+PAYMENT_MIX = [('CASH', 50), ('QRIS', 35), ('CARD', 15)]
+CANCEL_RATE = 0.02
+FIRST_NAMES = ['Budi', 'Siti', 'Agus', 'Dewi', 'Rina', 'Andi', 'Wati', 'Joko', 'Sri', 'Dian',
+               'Putri', 'Eko', 'Ayu', 'Hendra', 'Lina', 'Rudi', 'Maya', 'Fajar', 'Nur', 'Yuni']
+LAST_NAMES = ['Santoso', 'Wijaya', 'Saputra', 'Lestari', 'Hidayat', 'Kusuma', 'Pratama',
+              'Susanto', 'Rahayu', 'Setiawan', 'Nugroho', 'Siregar', 'Harahap', 'Gunawan']
+
+
+class RowWriter:
+    """
+    INSERT massal langsung lewat cursor.executemany, tanpa membuat instance
+    model (bulk_create menghabiskan sebagian besar waktunya untuk menyusun SQL
+    per nilai). ``fields`` = nama field model, urutannya sama dengan tuple di
+    ``add``. Nilai datetime/decimal diadaptasi seperti ORM.
+    """
+    def __init__(self, model, fields, batch_size=5000):
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+        ops = connection.ops
+        meta_fields = [model._meta.get_field(name) for name in fields]
+        columns = ', '.join(ops.quote_name(f.column) for f in meta_fields)
+        placeholders = ', '.join(['%s'] * len(meta_fields))
+        self.sql = f"INSERT INTO {ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+        self.adapters = []
+        for i, f in enumerate(meta_fields):
+            if isinstance(f, models.DateTimeField):
+                self.adapters.append((i, ops.adapt_datetimefield_value))
+            elif isinstance(f, models.DecimalField):
+                self.adapters.append((i, lambda v, f=f: ops.adapt_decimalfield_value(v, f.max_digits, f.decimal_places)))
+
+    def add(self, *values):
+        if self.adapters:
+            values = list(values)
+            for i, adapt in self.adapters:
+                if values[i] is not None:
+                    values[i] = adapt(values[i])
+        self.rows.append(values)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            with connection.cursor() as cur:
+                cur.executemany(self.sql, self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def _next_id(model):
+    return (model.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = ("Isi database dengan data sintetis skala besar (menu, pelanggan, order + item, "
+            "payment, StockMovement) selama N hari terakhir, dengan pola jam & hari yang "
+            "realistis. Ditulis per chunk dengan INSERT massal, memori tetap kecil.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, default=500)
+        parser.add_argument('--categories', type=int, default=15)
+        parser.add_argument('--customers', type=int, default=200_000)
+        parser.add_argument('--orders', type=int, default=2_000_000, help='total order selama --days')
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--end', type=datetime.date.fromisoformat,
+                            help='hari terakhir (YYYY-MM-DD, default kemarin)')
+        parser.add_argument('--cashiers', type=int, default=6)
+        parser.add_argument('--max-lines', type=int, default=6, help='maks. jenis menu per order')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='order per transaksi/bulk insert')
+        parser.add_argument('--seed', type=int, default=2024)
+        parser.add_argument('--no-rollup', action='store_true',
+                            help='jangan bangun ulang DailySales setelah selesai')
+
+    def handle(self, *args, **opts):
+        if opts['days'] < 1 or opts['orders'] < 0 or opts['chunk_size'] < 1:
+            raise CommandError("--days dan --chunk-size minimal 1, --orders tidak boleh negatif.")
+        self.rng = random.Random(opts['seed'])
+        self.opts = opts
+        started = time.perf_counter()
+
+        self.menu = self.ensure_menu()
+        self.cashier_ids = self.ensure_cashiers()
+        self.methods = self.ensure_methods()
+        self.customer_range = self.create_customers()
+
+        end = opts['end'] or timezone.localdate() - datetime.timedelta(days=1)
+        start = end - datetime.timedelta(days=opts['days'] - 1)
+        days = [start + datetime.timedelta(days=i) for i in range(opts['days'])]
+        per_day = self.orders_per_day(days)
+
+        # total keluar per menu, untuk restock harian & stok akhir
+        self.stock_out = dict.fromkeys(self.menu, 0)
+        self.stock_in = dict.fromkeys(self.menu, 0)
+        self.ids = {m: _next_id(m) for m in (Order, OrderItem, Payment, StockMovement)}
+
+        batch = opts['chunk_size']
+        self.writers = {
+            Order: RowWriter(Order, ['id', 'order_no', 'outlet', 'user', 'customer', 'status', 'subtotal',
+                                     'tax_amount', 'discount_amount', 'grand_total', 'placed_at', 'created_at',
+                                     'updated_at'],
+                             batch),
+            OrderItem: RowWriter(OrderItem, ['id', 'order', 'menu_item', 'qty', 'price', 'line_total'], batch),
+            Payment: RowWriter(Payment, ['id', 'order', 'payment_method', 'amount_paid', 'ref_no',
+                                         'card_last4', 'paid_at'], batch),
+            StockMovement: RowWriter(StockMovement, ['id', 'menu_item', 'user', 'move_type', 'qty', 'note',
+                                                     'created_at'], batch),
+        }
+        total = 0
+        for day, n in zip(days, per_day):
+            total += self.generate_day(day, n)
+            if day.day == 1 or day == end:
+                self.stdout.write(f"{day}: {total} order ({time.perf_counter() - started:.0f} s)")
+        self.finish_stock()
+
+        if not opts['no_rollup'] and total:
+            call_command('rebuild_sales_rollup', since=start, until=end, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai: {len(self.menu)} menu, {self.customer_range[1] - self.customer_range[0]} pelanggan "
+            f"baru, {total} order dalam {time.perf_counter() - started:.0f} s."
+        ))
+
+    # ---------- master data ----------
+    def ensure_menu(self):
+        existing = MenuItem.objects.count()
+        missing = self.opts['menu_items'] - existing
+        if missing > 0:
+            prefix = f"G{int(time.time()) % 100000}-"
+            loadtest.seed_catalog(self.opts['categories'], missing, self.rng, stock=0, code_prefix=prefix)
+        # id -> harga; harga dianggap tetap selama periode data
+        return dict(MenuItem.objects.filter(is_active=True).values_list('id', 'price')[:self.opts['menu_items']])
+
+    def ensure_cashiers(self):
+        User = get_user_model()
+        ids = []
+        for i in range(self.opts['cashiers']):
+            user, created = User.objects.get_or_create(username=f'kasir_gen{i + 1}', defaults={'is_staff': True})
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            ids.append(user.id)
+        return ids
+
+    def ensure_methods(self):
+        for code, name in (('CASH', 'Cash'), ('CARD', 'Kartu'), ('QRIS', 'QRIS')):
+            PaymentMethod.objects.get_or_create(code=code, defaults={'name': name})
+        by_code = dict(PaymentMethod.objects.values_list('code', 'id'))
+        return [(code, by_code[code], weight) for code, weight in PAYMENT_MIX]
+
+    def create_customers(self):
+        first = _next_id(Customer)
+        n = self.opts['customers']
+        chunk = self.opts['chunk_size']
+        rng = self.rng
+        writer = RowWriter(Customer, ['id', 'name', 'phone', 'phone_normalized', 'email', 'address', 'created_at'],
+                           chunk)
+        created_at = timezone.now() - datetime.timedelta(days=self.opts['days'])
+        with transaction.atomic():
+            for i in range(n):
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                phone = f"08{rng.randrange(10**9, 10**10)}"
+                writer.add(first + i, name, phone, normalize_phone(phone),
+                           f"{name.split()[0].lower()}{first + i}@contoh.id", '', created_at)
+            writer.flush()
+        return first, first + n
+
+    # ---------- distribusi ----------
+    def orders_per_day(self, days):
+        weights = [WEEKDAY_WEIGHTS[d.weekday()] * self.rng.uniform(0.9, 1.1) for d in days]
+        scale = self.opts['orders'] / sum(weights)
+        counts = [int(w * scale) for w in weights]
+        # sisa pembulatan dibagi ke hari-hari awal supaya totalnya pas
+        for i in range(self.opts['orders'] - sum(counts)):
+            counts[i % len(counts)] += 1
+        return counts
+
+    def order_times(self, day, n):
+        tz = timezone.get_current_timezone()
+        hours = self.rng.choices(list(HOUR_WEIGHTS), weights=list(HOUR_WEIGHTS.values()), k=n)
+        times = [datetime.datetime.combine(day, datetime.time(h, self.rng.randrange(60), self.rng.randrange(60)),
+                                           tzinfo=tz)
+                 for h in hours]
+        times.sort()
+        return times
+
+    def pick_customer(self):
+        first, end = self.customer_range
+        if end == first or self.rng.random() < 0.4:
+            return None  # walk-in tanpa data pelanggan
+        if self.rng.random() < 0.3:
+            # pelanggan tetap: 5% pelanggan pertama
+            return first + self.rng.randrange(max((end - first) // 20, 1))
+        return self.rng.randrange(first, end)
+
+    # ---------- order ----------
+    def generate_day(self, day, n):
+        self.restock(day, n)
+        if n <= 0:
+            return 0
+        prefix = day_prefix(day)
+        seq = OrderSequence.objects.filter(prefix=prefix).values_list('last_value', flat=True).first() or 0
+        times = self.order_times(day, n)
+        chunk = self.opts['chunk_size']
+        for offset in range(0, n, chunk):
+            with transaction.atomic():
+                self.write_chunk(prefix, seq + offset, times[offset:offset + chunk])
+                for writer in self.writers.values():
+                    writer.flush()
+        # allocator (orders.numbering) melanjutkan setelah nomor terakhir ini
+        OrderSequence.objects.update_or_create(prefix=prefix, defaults={'last_value': seq + n})
+        return n
+
+    def write_chunk(self, prefix, seq, times):
+        rng = self.rng
+        menu_ids = list(self.menu)
+        orders, items = self.writers[Order], self.writers[OrderItem]
+        payments, moves = self.writers[Payment], self.writers[StockMovement]
+        zero = Decimal('0.00')
+        outlet = outlet_code()
+        for i, placed_at in enumerate(times, 1):
+            cashier = rng.choice(self.cashier_ids)
+            order_id = self.next_id(Order)
+            order_no = format_order_no(prefix, seq + i)
+
+            lines = []
+            subtotal = zero
+            for menu_id in rng.sample(menu_ids, min(rng.randint(1, self.opts['max_lines']), len(menu_ids))):
+                qty = rng.choices((1, 2, 3, 4), weights=(70, 20, 7, 3))[0]
+                price = self.menu[menu_id]
+                items.add(self.next_id(OrderItem), order_id, menu_id, qty, price, price * qty)
+                lines.append((menu_id, qty))
+                subtotal += price * qty
+            tax = (subtotal * TAX_RATE).quantize(CENT)
+            grand_total = subtotal + tax
+
+            if rng.random() < CANCEL_RATE:
+                # batal: tanpa payment & tanpa mutasi stok
+                orders.add(order_id, order_no, outlet, cashier, self.pick_customer(), Order.STATUS_CANCELLED,
+                           subtotal, tax, zero, grand_total, None, placed_at, placed_at)
+                continue
+
+            paid_at = placed_at + datetime.timedelta(minutes=rng.randint(1, 40))
+            orders.add(order_id, order_no, outlet, cashier, self.pick_customer(), Order.STATUS_PAID,
+                       subtotal, tax, zero, grand_total, paid_at, placed_at, paid_at)
+            code, method_id, _ = rng.choices(self.methods, weights=[m[2] for m in self.methods])[0]
+            card = code == 'CARD'
+            payments.add(self.next_id(Payment), order_id, method_id, grand_total,
+                         f"{rng.randrange(10**6):06d}" if card else None,
+                         f"{rng.randrange(10**4):04d}" if card else None, paid_at)
+            note = f'Sale {order_no}'
+            for menu_id, qty in lines:
+                self.stock_out[menu_id] += qty
+                moves.add(self.next_id(StockMovement), menu_id, cashier, StockMovement.MOVE_OUT, qty, note, paid_at)
+
+    def next_id(self, model):
+        # pk diisi sendiri supaya baris anak bisa langsung menunjuk ke order
+        value = self.ids[model]
+        self.ids[model] += 1
+        return value
+
+    def restock(self, day, n_orders):
+        """
+        Restock pagi (IN): isi ulang menu yang persediaannya di bawah perkiraan
+        kebutuhan hari itu, supaya ledger IN/OUT masuk akal.
+        """
+        avg_units = (self.opts['max_lines'] + 1) / 2 * 1.45 / max(len(self.menu), 1)
+        par = int(n_orders * avg_units * 3) + 10
+        tz = timezone.get_current_timezone()
+        at = datetime.datetime.combine(day, datetime.time(8, 0), tzinfo=tz)
+        moves = self.writers[StockMovement]
+        with transaction.atomic():
+            for menu_id in self.menu:
+                on_hand = self.stock_in[menu_id] - self.stock_out[menu_id]
+                if on_hand >= par:
+                    continue
+                qty = par - on_hand
+                self.stock_in[menu_id] += qty
+                moves.add(self.next_id(StockMovement), menu_id, self.cashier_ids[0], StockMovement.MOVE_IN,
+                          qty, 'Restock (data sintetis)', at)
+            moves.flush()
+
+    def finish_stock(self):
+        """Stok akhir menu = stok awal + IN - OUT yang dibuat di sini."""
+        changed = []
+        for item in MenuItem.objects.filter(pk__in=list(self.menu)).only('id', 'stock_qty'):
+            delta = self.stock_in[item.id] - self.stock_out[item.id]
+            if delta:
+                item.stock_qty += delta
+                changed.append(item)
+        with transaction.atomic():
+            MenuItem.objects.bulk_update(changed, ['stock_qty'], batch_size=500)
+        menu_cache.invalidate()
@@ -0,0 +1,111 @@
+import random
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from payments.models import PaymentMethod
+from resto import loadtest
+from resto.bench import run_threads, throwaway_database
+
+
+class Command(BaseCommand):
+    help = ("Load test in-process: kasir (buat order -> tambah item -> bayar) dan "
+            "pelanggan (menu publik -> keranjang) bersamaan di database sementara. "
+            "Hasil (throughput, p50/p95/p99, query per endpoint) disimpan sebagai JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cashiers', type=int, default=4)
+        parser.add_argument('--customers', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=10, help='order per kasir')
+        parser.add_argument('--items-per-order', type=int, default=4)
+        parser.add_argument('--visits', type=int, default=20, help='kunjungan menu per pelanggan')
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--menu-items', type=int, default=300)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='file JSON hasil (default: benchmarks/loadtest-<waktu>.json)')
+        parser.add_argument('--compare', help='file JSON hasil sebelumnya untuk dibandingkan')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='persen kenaikan p95 yang dianggap regresi')
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts['seed'])
+        setup_test_environment()   # ALLOWED_HOSTS 'testserver' untuk test Client
+        try:
+            with throwaway_database() as conn:
+                vendor = conn.vendor
+                result = self.run(opts, rng)
+        finally:
+            teardown_test_environment()
+
+        result['meta'] = {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'git': loadtest.git_revision(),
+            'database': vendor,
+            'options': {k: opts[k] for k in ('cashiers', 'customers', 'orders', 'items_per_order',
+                                             'visits', 'categories', 'menu_items', 'seed')},
+        }
+        self.report(result)
+
+        output = Path(opts['output'] or Path(settings.BASE_DIR) / 'benchmarks'
+                      / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json")
+        loadtest.save_result(output, result)
+        self.stdout.write(f"Hasil disimpan ke {output}")
+
+        if opts['compare']:
+            self.report_compare(result, loadtest.load_result(opts['compare']), opts['threshold'])
+
+    def run(self, opts, rng):
+        item_ids, category_ids = loadtest.seed_catalog(opts['categories'], opts['menu_items'], rng)
+        cash_id = PaymentMethod.objects.get(code='CASH').id
+        User = get_user_model()
+        cashiers = [User.objects.create_user(username=f'kasir{i}', password='bench', is_staff=True)
+                    for i in range(opts['cashiers'])]
+
+        recorder = loadtest.Recorder()
+        n_cashiers = opts['cashiers']
+
+        def worker(i):
+            # rng per thread supaya skenario bisa diulang dengan --seed yang sama
+            thread_rng = random.Random(opts['seed'] * 1000 + i)
+            tc = loadtest.TimedClient(recorder)
+            if i < n_cashiers:
+                tc.client.force_login(cashiers[i])
+                loadtest.cashier_session(tc, thread_rng, item_ids, opts['orders'],
+                                         opts['items_per_order'], cash_id)
+            else:
+                loadtest.customer_session(tc, thread_rng, item_ids, category_ids, opts['visits'])
+
+        _, elapsed = run_threads(worker, n_cashiers + opts['customers'])
+        return loadtest.summarize(recorder, elapsed)
+
+    def report(self, result):
+        self.stdout.write(f"{result['requests']} request dalam {result['elapsed_s']:.2f} s "
+                          f"({result['rps']:.1f} req/s)")
+        header = f"{'endpoint':<40} {'n':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q avg':>6} {'q max':>6}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for endpoint, s in result['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<40} {s['requests']:>6} {s['errors']:>4} {s['rps']:>8.1f} "
+                f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} "
+                f"{s['queries_avg']:>6.1f} {s['queries_max']:>6}"
+            )
+
+    def report_compare(self, result, baseline, threshold):
+        self.stdout.write(f"\nDibanding {baseline.get('meta', {}).get('git') or 'hasil sebelumnya'}:")
+        regressions = 0
+        for endpoint, metric, old, new, worse in loadtest.compare(result, baseline, threshold):
+            line = f"{endpoint:<40} {metric:<12} {old:>8} -> {new:>8}"
+            if worse:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + "  REGRESI"))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.ERROR(f"{regressions} regresi."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Tidak ada regresi."))
@@ -0,0 +1,42 @@
+import datetime
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders import receipts
+from orders.models import Order, Receipt
+from reports.exports import day_bounds
+
+
+class Command(BaseCommand):
+    help = ("Gabungkan struk ESC/POS tersimpan semua order PAID pada satu tanggal "
+            "(cetak ulang akhir hari). Struk yang belum ada dirender sekali dan disimpan.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='YYYY-MM-DD (default: hari ini)')
+        parser.add_argument('--output', default='-', help="file tujuan atau '-' untuk stdout (mis. pipe ke /dev/usb/lp0)")
+
+    def handle(self, *args, date=None, output='-', **opts):
+        try:
+            day = datetime.date.fromisoformat(date) if date else datetime.date.today()
+        except ValueError:
+            raise CommandError(f"Tanggal tidak valid: {date}")
+        start, end = day_bounds(day, day)
+        paid = Order.objects.filter(status=Order.STATUS_PAID, placed_at__gte=start, placed_at__lt=end)
+
+        # order PAID lama (sebelum struk disimpan) dirender sekali di sini
+        for order_no in paid.filter(receipt__isnull=True).values_list('order_no', flat=True).iterator():
+            receipts.store_receipt(receipts.load_order(order_no))
+
+        rows = (Receipt.objects.filter(order__in=paid).order_by('order__placed_at', 'order_id')
+                .values_list('escpos', flat=True))
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        count = 0
+        try:
+            for data in rows.iterator(chunk_size=500):
+                stream.write(bytes(data))
+                count += 1
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        self.stderr.write(f"{count} struk ({day.isoformat()}).")
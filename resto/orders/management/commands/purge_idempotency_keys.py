@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = ("Hapus kunci idempotensi checkout yang sudah kedaluwarsa (IDEMPOTENCY_TTL). "
+            "Jadwalkan via cron, mis. sekali sehari.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size=1000, **opts):
+        deleted = purge_expired(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} kunci idempotensi dihapus."))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+def backfill_phone_keys(apps, schema_editor):
+    from orders.phones import normalize_phone
+    Customer = apps.get_model('orders', 'Customer')
+    batch = []
+    for customer in Customer.objects.exclude(phone='').only('id', 'phone').iterator(chunk_size=2000):
+        customer.phone_normalized = normalize_phone(customer.phone)
+        if customer.phone_normalized:
+            batch.append(customer)
+        if len(batch) >= 2000:
+            Customer.objects.bulk_update(batch, ['phone_normalized'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['phone_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_ordersequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_normalized', 'name'], name='customer_phone_name_idx'),
+        ),
+        migrations.RunPython(backfill_phone_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:54
+
+import orders.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_user_status_placed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='outlet',
+            field=models.CharField(default=orders.models.default_outlet, max_length=10),
+        ),
+    ]
@@ -3,15 +3,38 @@ from django.conf import settings
 from catalog.models import MenuItem
 from decimal import Decimal
 
+from .phones import normalize_phone
+
 class Customer(models.Model):
     name = models.CharField(max_length=120)
     phone = models.CharField(max_length=120, blank=True)
+    # kunci pencarian dari phone (orders.phones), diisi otomatis saat save
+    phone_normalized = models.CharField(max_length=16, blank=True, editable=False)
     email = models.EmailField(blank=True)
     address = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # lookup pelanggan lama per nomor; nomor kosong + nama untuk tamu tanpa telepon
+            models.Index(fields=['phone_normalized', 'name'], name='customer_phone_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized'}
+        super().save(*args, **kwargs)
+
+
+def default_outlet():
+    return getattr(settings, 'RESTO_OUTLET_CODE', 'RST')
+
+
 class Order(models.Model):
     STATUS_DRAFT = 'DRAFT'
     STATUS_PLACED = 'PLACED'
@@ -27,6 +50,7 @@ class Order(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)  # kasir yang input
     customer = models.ForeignKey('orders.Customer', on_delete=models.SET_NULL, null=True, blank=True)
     order_no = models.CharField(max_length=30, unique=True)
+    outlet = models.CharField(max_length=10, default=default_outlet)
     # status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_PLACED)
     status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_DRAFT)
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -37,21 +61,85 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Z-report shift: order PAID/CANCELLED seorang kasir dalam rentang waktu
+            models.Index(fields=['user', 'status', 'placed_at'], name='order_user_status_placed_idx'),
+        ]
+
     def __str__(self):
         return self.order_no
 
-    def recalc_totals(self):
-        # Ambil dari line_total (Decimal) agar aman
-        agg = self.items.aggregate(subtotal=models.Sum('line_total'))
-        self.subtotal = agg['subtotal'] or Decimal('0.00')
+    def set_totals(self, subtotal):
+        """Hitung pajak & grand total dari subtotal (tanpa query)."""
+        self.subtotal = subtotal
         # pajak 10% pakai Decimal, bukan float
         self.tax_amount = (self.subtotal * Decimal('0.10')).quantize(Decimal('0.01'))
         # pastikan discount_amount sudah Decimal
         if self.discount_amount is None:
             self.discount_amount = Decimal('0.00')
         self.grand_total = (self.subtotal + self.tax_amount - self.discount_amount).quantize(Decimal('0.01'))
+
+    def recalc_totals(self):
+        # Ambil dari line_total (Decimal) agar aman
+        agg = self.items.aggregate(subtotal=models.Sum('line_total'))
+        self.set_totals(agg['subtotal'] or Decimal('0.00'))
+        self.save(update_fields=['subtotal', 'tax_amount', 'grand_total'])
+
+    def apply_subtotal_delta(self, delta):
+        """Update total secara inkremental (tanpa SUM ulang semua item)."""
+        self.set_totals((self.subtotal or Decimal('0.00')) + delta)
         self.save(update_fields=['subtotal', 'tax_amount', 'grand_total'])
 
+class OrderSequence(models.Model):
+    """
+    Counter nomor order per prefix (outlet + tanggal), mis. ``RST-251018``.
+    Diambil per blok oleh orders.numbering, bukan per order, supaya baris ini
+    tidak jadi titik rebutan.
+    """
+    prefix = models.CharField(max_length=20, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix} ({self.last_value})"
+
+class Receipt(models.Model):
+    """
+    Struk order PAID yang sudah dirender (HTML + ESC/POS) saat pembayaran
+    commit. Order PAID tidak berubah lagi, jadi cetak ulang cukup mengambil
+    baris ini berdasarkan order_no tanpa query ke order/item/payment.
+    """
+    order = models.OneToOneField('orders.Order', on_delete=models.CASCADE, related_name='receipt')
+    order_no = models.CharField(max_length=30, unique=True)
+    html = models.TextField()
+    escpos = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.order_no
+
+class IdempotencyKey(models.Model):
+    """
+    Kunci idempotensi POST (checkout). Request pertama mengklaim kunci lalu
+    menyimpan hasilnya (redirect); request ulang dengan kunci yang sama
+    langsung dijawab dari baris ini (lihat orders.idempotency).
+    """
+    scope = models.CharField(max_length=40)
+    key = models.CharField(max_length=64)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # kosong = masih diproses
+    location = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='uniq_idempotency_scope_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
 class OrderItem(models.Model):
     order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name='items')
     menu_item = models.ForeignKey(MenuItem, on_delete=models.PROTECT)
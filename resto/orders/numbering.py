@@ -0,0 +1,131 @@
+"""
+Alokasi nomor order: ``<OUTLET>-<YYMMDD>-<urut>``, mis. ``RST-251018-00042``.
+
+- Prefix outlet + tanggal lokal, lalu nomor urut 5 digit per prefix.
+  Nomor naik seiring waktu, jadi insert ke index unik ``order_no`` selalu di
+  ujung B-tree (tidak acak seperti potongan uuid).
+- Setiap worker (proses) mengambil satu blok nomor sekaligus dari
+  OrderSequence (``ORDER_NO_BLOCK_SIZE``, default 20) dan membagikannya dari
+  memori. Baris counter hanya disentuh sekali per blok.
+- Konsekuensinya: antar worker nomor tidak berurutan ketat, dan sisa blok
+  saat proses restart tidak dipakai (ada nomor yang terlewat). Nomor tetap
+  unik.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import Order, OrderSequence, default_outlet
+
+DEFAULT_BLOCK_SIZE = 20
+SEQUENCE_DIGITS = 5
+MAX_ATTEMPTS = 5
+
+
+def outlet_code():
+    return default_outlet()
+
+
+def day_prefix(day=None):
+    day = day or timezone.localdate()
+    return f"{outlet_code()}-{day:%y%m%d}"
+
+
+def format_order_no(prefix, value):
+    return f"{prefix}-{value:0{SEQUENCE_DIGITS}d}"
+
+
+class OrderNumberAllocator:
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {}   # prefix -> [berikutnya, terakhir]
+
+    def _block_size(self):
+        return self.block_size or getattr(settings, 'ORDER_NO_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+
+    def _reserve(self, prefix, size):
+        """Ambil blok [start, end] dari DB (baris counter dikunci sebentar)."""
+        with transaction.atomic():
+            seq, _ = OrderSequence.objects.select_for_update().get_or_create(prefix=prefix)
+            start = seq.last_value + 1
+            seq.last_value += size
+            seq.save(update_fields=['last_value'])
+        return start, seq.last_value
+
+    def _store(self, prefix, start, end):
+        if start <= end:
+            with self._lock:
+                self._blocks[prefix] = [start, end]
+
+    def discard(self, prefix=None):
+        """Buang blok di memori (semua, atau satu prefix)."""
+        with self._lock:
+            if prefix is None:
+                self._blocks.clear()
+            else:
+                self._blocks.pop(prefix, None)
+
+    def resync(self, prefix):
+        """
+        Majukan counter melewati nomor terbesar yang sudah ada di tabel Order
+        untuk prefix ini, lalu buang blok di memori.
+        """
+        self.discard(prefix)
+        used = 0
+        for order_no in Order.objects.filter(order_no__startswith=prefix + '-').values_list('order_no', flat=True):
+            tail = order_no[len(prefix) + 1:]
+            if tail.isdigit():
+                used = max(used, int(tail))
+        with transaction.atomic():
+            seq, _ = OrderSequence.objects.select_for_update().get_or_create(prefix=prefix)
+            if seq.last_value < used:
+                seq.last_value = used
+                seq.save(update_fields=['last_value'])
+
+    def next_value(self, prefix):
+        with self._lock:
+            block = self._blocks.get(prefix)
+            if block and block[0] <= block[1]:
+                value = block[0]
+                block[0] += 1
+                return value
+
+        start, end = self._reserve(prefix, self._block_size())
+        if connection.in_atomic_block:
+            # blok diambil di dalam transaksi luar: kalau transaksi itu
+            # di-rollback, blok ini bisa diambil worker lain. Sisanya baru
+            # dipakai setelah commit.
+            transaction.on_commit(lambda: self._store(prefix, start + 1, end))
+        else:
+            self._store(prefix, start + 1, end)
+        return start
+
+    def next_order_no(self, day=None):
+        prefix = day_prefix(day)
+        return format_order_no(prefix, self.next_value(prefix))
+
+
+allocator = OrderNumberAllocator()
+
+
+def next_order_no(day=None):
+    return allocator.next_order_no(day)
+
+
+def create_order(**fields):
+    """
+    Order.objects.create dengan order_no dari allocator. Kalau bentrok
+    (mis. counter di-reset manual), counter dimajukan dan dicoba nomor baru.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        order_no = next_order_no()
+        try:
+            with transaction.atomic():
+                return Order.objects.create(order_no=order_no, **fields)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1 or not Order.objects.filter(order_no=order_no).exists():
+                raise
+            allocator.resync(order_no.rsplit('-', 1)[0])
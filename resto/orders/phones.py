@@ -0,0 +1,30 @@
+"""
+Normalisasi nomor telepon Indonesia jadi satu kunci pencarian.
+
+    '0812-3456-7890', '+62 812 3456 7890', '62812...', '(0812) 3456 7890',
+    '812 3456 7890'  ->  '6281234567890'
+
+Kunci ini disimpan di Customer.phone_normalized (ber-index) sehingga
+pelanggan lama ditemukan dengan satu lookup apa pun format yang diketik.
+"""
+import re
+
+_NON_DIGIT = re.compile(r'\D')
+MIN_DIGITS = 9    # 62 + kode area + nomor telepon rumah terpendek
+MAX_DIGITS = 15   # batas E.164
+
+
+def normalize_phone(raw):
+    """Kunci nomor (digit saja, awalan 62) atau '' kalau kosong/tidak dikenali."""
+    digits = _NON_DIGIT.sub('', raw or '')
+    if digits.startswith('00'):
+        digits = digits[2:]          # awalan internasional 00
+    if digits.startswith('62'):
+        pass
+    elif digits.startswith('0'):
+        digits = '62' + digits[1:]
+    elif digits.startswith('8'):
+        digits = '62' + digits       # nomor HP tanpa 0 di depan
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS:
+        return ''
+    return digits
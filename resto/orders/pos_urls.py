@@ -5,6 +5,8 @@ urlpatterns = [
     path('', v.dashboard, name='pos_dashboard'),
     path('create/', v.pos_create_order, name='pos_create_order'),
     path('<str:order_no>/add-item/', v.pos_add_item, name='pos_add_item'),
+    path('<str:order_no>/add-items/', v.pos_add_items, name='pos_add_items'),
     path('<str:order_no>/checkout/', v.pos_checkout, name='pos_checkout'),
+    path('<str:order_no>/cancel/', v.pos_cancel_order, name='pos_cancel_order'),
     path('<str:order_no>/receipt/', v.order_receipt, name='pos_receipt'),
 ]
@@ -0,0 +1,158 @@
+"""
+Struk sekali render: HTML untuk browser dan byte ESC/POS untuk printer
+thermal.
+
+Order PAID tidak berubah lagi, jadi struk dirender SEKALI saat pembayaran
+commit (``store_receipt`` via on_commit) dan disimpan di tabel Receipt
+(+ cache). Cetak ulang — satu struk atau batch akhir hari — hanya mengambil
+HTML/byte yang tersimpan berdasarkan order_no, tanpa query order, item, menu,
+pelanggan, kasir dan payment, dan tanpa render template.
+"""
+import textwrap
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Order, Receipt
+
+SHOP = getattr(settings, 'RESTO_SHOP', {
+    "name": "Dapur Bunda Bahagia",
+    "address": "Jl. Contoh No. 123, Jakarta",
+    "phone": "0812-0000-0000",
+})
+# kolom per baris printer: 48 untuk kertas 80 mm (Font A), 32 untuk 58 mm
+ESCPOS_COLUMNS = getattr(settings, 'RECEIPT_ESCPOS_COLUMNS', 48)
+CACHE_TTL = 60 * 60 * 24
+FORMATS = ('html', 'escpos')
+
+# ---------- perintah ESC/POS ----------
+ESC = b'\x1b'
+GS = b'\x1d'
+INIT = ESC + b'@'
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+DOUBLE_ON = GS + b'!\x11'
+DOUBLE_OFF = GS + b'!\x00'
+FEED_CUT = GS + b'V\x42\x03'   # feed 3 baris lalu potong sebagian
+
+
+def load_order(order_no):
+    """Order beserta semua yang dibutuhkan struk, dalam dua query."""
+    return (Order.objects.select_related('customer', 'user', 'payment__payment_method')
+            .prefetch_related('items__menu_item').get(order_no=order_no))
+
+
+def render_html(order):
+    return render_to_string('orders/receipt.html', {'order': order, 'shop': SHOP})
+
+
+# ---------- helper ESC/POS (juga dipakai Z-report, reports.shifts) ----------
+def escpos_text(value):
+    """Teks -> byte untuk printer thermal (umumnya hanya ASCII/CP437): aksen & karakter lain dibuang."""
+    return unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore')
+
+
+def money(value):
+    """Format rupiah struk: ``Rp 12.500``."""
+    return 'Rp ' + f'{value:,.0f}'.replace(',', '.')
+
+
+def cols(left, right, width):
+    """Satu baris ``width`` kolom: ``left`` rata kiri (dipotong bila perlu), ``right`` rata kanan."""
+    left = str(left)[:max(width - len(str(right)) - 1, 1)]
+    return f'{left}{" " * (width - len(left) - len(str(right)))}{right}'
+
+
+def render_escpos(order, width=None):
+    width = width or ESCPOS_COLUMNS
+    rule = '-' * width
+    out = [INIT, ALIGN_CENTER, BOLD_ON, DOUBLE_ON, escpos_text(SHOP['name']), b'\n', DOUBLE_OFF, BOLD_OFF]
+    out += [escpos_text(SHOP['address']), b'\n', escpos_text(SHOP['phone']), b'\n', ALIGN_LEFT]
+
+    def line(text=''):
+        out.extend([escpos_text(text), b'\n'])
+
+    line(rule)
+    line(cols('No. Order', order.order_no, width))
+    if order.placed_at:
+        line(cols('Tanggal', timezone.localtime(order.placed_at).strftime('%d %b %Y %H:%M'), width))
+    line(cols('Kasir', order.user.get_username(), width))
+    if order.customer_id:
+        line(cols('Pelanggan', order.customer.name, width))
+    line(rule)
+    for item in order.items.all():
+        for part in textwrap.wrap(item.menu_item.name, width) or ['']:
+            line(part)
+        line(cols(f'  {item.qty} x {money(item.price)}', money(item.line_total), width))
+    line(rule)
+    line(cols('Subtotal', money(order.subtotal), width))
+    line(cols('PPN (10%)', money(order.tax_amount), width))
+    if order.discount_amount:
+        line(cols('Diskon', '-' + money(order.discount_amount), width))
+    out.append(BOLD_ON)
+    line(cols('Grand Total', money(order.grand_total), width))
+    out.append(BOLD_OFF)
+    payment = getattr(order, 'payment', None)
+    if payment is not None:
+        line(cols('Metode', payment.payment_method.name, width))
+    line(rule)
+    out.append(ALIGN_CENTER)
+    line(f"Terima kasih telah berbelanja di {SHOP['name']}")
+    out.append(FEED_CUT)
+    return b''.join(out)
+
+
+def _cache_key(fmt, order_no):
+    return f'receipt:{fmt}:{order_no}'
+
+
+def store_receipt(order):
+    """Render & simpan struk order PAID (idempoten, hasil load_order). Mengembalikan Receipt."""
+    order_no = order.order_no
+    receipt = Receipt(order=order, order_no=order.order_no,
+                      html=render_html(order), escpos=render_escpos(order))
+    try:
+        with transaction.atomic():
+            receipt.save()
+    except IntegrityError:
+        receipt = Receipt.objects.get(order_no=order_no)
+    cache.set_many({_cache_key('html', order_no): receipt.html,
+                    _cache_key('escpos', order_no): bytes(receipt.escpos)}, CACHE_TTL)
+    return receipt
+
+
+def schedule_receipt(order):
+    """Dipanggil di dalam transaksi pembayaran: render setelah commit."""
+    transaction.on_commit(lambda: store_receipt(load_order(order.order_no)))
+
+
+def receipt_for(order_no, fmt):
+    """
+    Struk tersimpan dalam format ``fmt`` ('html' str / 'escpos' bytes):
+    cache -> tabel Receipt -> render & simpan (order PAID lama) -> render
+    langsung tanpa disimpan (order belum dibayar). None kalau order tidak ada.
+    """
+    key = _cache_key(fmt, order_no)
+    data = cache.get(key)
+    if data is not None:
+        return data
+    data = Receipt.objects.filter(order_no=order_no).values_list(fmt, flat=True).first()
+    if data is None:
+        try:
+            order = load_order(order_no)
+        except Order.DoesNotExist:
+            return None
+        if order.status != Order.STATUS_PAID:
+            return render_html(order) if fmt == 'html' else render_escpos(order)
+        receipt = store_receipt(order)
+        return receipt.html if fmt == 'html' else bytes(receipt.escpos)
+    if fmt == 'escpos':
+        data = bytes(data)
+    cache.set(key, data, CACHE_TTL)
+    return data
@@ -0,0 +1,227 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from catalog import reservations
+from catalog.models import MenuItem
+from catalog.stock import InsufficientStock, deduct_stock
+from reports.rollup import record_sale
+from . import events, receipts
+from .customers import find_or_create_customer
+from .models import Order, OrderItem
+from .numbering import create_order
+
+
+# order yang masih boleh diubah (tambah item, batal)
+EDITABLE_STATUSES = (Order.STATUS_DRAFT, Order.STATUS_PLACED)
+
+
+class AddItemsResult:
+    def __init__(self):
+        self.added = []      # (MenuItem, qty yang benar-benar ditambahkan)
+        self.clamped = []    # (MenuItem, qty diminta, qty dipakai)
+        self.out_of_stock = []
+        self.missing = []    # id yang tidak ada
+
+
+def _merge_lines(lines):
+    merged = {}
+    for item_id, qty in lines:
+        if qty < 1:
+            qty = 1
+        merged[item_id] = merged.get(item_id, 0) + qty
+    return merged
+
+
+def add_items(order, lines):
+    """
+    Tambahkan banyak (menu_item_id, qty) ke order dalam satu transaksi.
+
+    - baris untuk menu yang sama digabung, termasuk dengan baris yang sudah
+      ada di order (harga sama) -> qty-nya saja yang bertambah
+    - stok dipegang lewat reservasi order (catalog.reservations): yang tersedia
+      = stok dikurangi reservasi keranjang/order lain; habis ditolak, qty
+      melebihi sisa dipotong
+    - insert/update massal, total order di-update inkremental dari selisih
+      subtotal, bukan SUM ulang
+    - order yang sudah PAID/CANCELLED ditolak (ValidationError)
+    """
+    result = AddItemsResult()
+    merged = _merge_lines(lines)
+    if not merged:
+        return result
+
+    items = MenuItem.objects.in_bulk(list(merged))
+    result.missing = [pk for pk in merged if pk not in items]
+    merged = {pk: qty for pk, qty in merged.items() if pk in items}
+    if not merged:
+        return result
+
+    holder = reservations.order_holder(order)
+    with transaction.atomic():
+        # kunci baris order dulu: dua tambah item bersamaan tidak saling menimpa total,
+        # dan checkout yang berjalan bersamaan sudah selesai saat status dicek
+        locked = (Order.objects.select_for_update()
+                  .only('id', 'status', 'subtotal', 'discount_amount').get(pk=order.pk))
+        if locked.status not in EDITABLE_STATUSES:
+            raise ValidationError({'status': [f"Order {order.order_no} sudah {locked.status}, tidak bisa ditambah item."]})
+        held = dict(OrderItem.objects.filter(order=order, menu_item_id__in=list(merged))
+                    .order_by().values('menu_item_id').annotate(total=Sum('qty'))
+                    .values_list('menu_item_id', 'total'))
+        # stok dipegang untuk seluruh qty item ini di order (yang lama + tambahan)
+        granted = reservations.reserve(holder, {pk: held.get(pk, 0) + qty for pk, qty in merged.items()})
+
+        accepted = {}
+        for pk, qty in merged.items():
+            item = items[pk]
+            room = granted[pk] - held.get(pk, 0)
+            if room <= 0:
+                result.out_of_stock.append(item)
+                continue
+            if qty > room:
+                result.clamped.append((item, qty, room))
+                qty = room
+            accepted[pk] = qty
+            result.added.append((item, qty))
+        if not accepted:
+            return result
+
+        existing = {}
+        for oi in OrderItem.objects.filter(order=order, menu_item_id__in=list(accepted)).order_by('id'):
+            if oi.price == items[oi.menu_item_id].price:
+                existing.setdefault(oi.menu_item_id, oi)
+
+        to_create, to_update = [], []
+        delta = Decimal('0.00')
+        for pk, qty in accepted.items():
+            item = items[pk]
+            delta += item.price * qty
+            oi = existing.get(pk)
+            if oi is not None:
+                oi.qty += qty
+                oi.line_total = oi.qty * oi.price
+                to_update.append(oi)
+            else:
+                # bulk_create tidak memanggil save(), jadi line_total diisi di sini
+                to_create.append(OrderItem(order=order, menu_item=item, qty=qty,
+                                           price=item.price, line_total=item.price * qty))
+        if to_update:
+            OrderItem.objects.bulk_update(to_update, ['qty', 'line_total'])
+        if to_create:
+            OrderItem.objects.bulk_create(to_create)
+
+        order.subtotal = locked.subtotal
+        order.discount_amount = locked.discount_amount
+        order.apply_subtotal_delta(delta)
+    return result
+
+
+def checkout_cart(user, cart, holder, name='Guest', phone=''):
+    """
+    Buat Order DRAFT dari keranjang ``{menu_item_id: qty}`` milik ``holder``
+    (reservasi keranjang) dalam satu transaksi, dengan jumlah query tetap
+    berapa pun banyaknya item:
+
+    - pelanggan dicari lewat nomor ternormalisasi (orders.customers)
+    - stok dicek ulang sekali lewat ``reservations.reserve`` (kunci + sisa
+      tersedia untuk semua item); qty dipotong ke yang berhasil dipegang
+    - total dihitung di memori dari snapshot harga, Order dibuat langsung
+      dengan totalnya, OrderItem di-insert massal
+    - reservasi keranjang dipindah ke order (satu UPDATE)
+
+    Mengembalikan ``(order, shortages)``; shortages = list (MenuItem, diminta,
+    didapat). Kalau tidak ada satu pun item tersedia, InsufficientStock.
+    """
+    with transaction.atomic():
+        customer = find_or_create_customer(name, phone)
+        held = reservations.reserve(holder, cart)
+        items = MenuItem.objects.in_bulk(list(cart))
+
+        lines, shortages = [], []
+        subtotal = Decimal('0.00')
+        for pk, wanted in sorted(cart.items()):
+            item = items.get(pk)
+            got = held.get(pk, 0) if item else 0
+            if got < wanted:
+                shortages.append((item or MenuItem(pk=pk, name=f"#{pk}"), wanted, got))
+            if got > 0:
+                line = OrderItem(menu_item=item, qty=got, price=item.price, line_total=item.price * got)
+                subtotal += line.line_total
+                lines.append(line)
+        if not lines:
+            raise InsufficientStock(shortages)
+
+        totals = Order(discount_amount=Decimal('0.00'))
+        totals.set_totals(subtotal)
+        order = create_order(user=user, customer=customer, subtotal=totals.subtotal,
+                             tax_amount=totals.tax_amount, grand_total=totals.grand_total)
+        for line in lines:
+            line.order = order
+        OrderItem.objects.bulk_create(lines)
+        reservations.transfer(holder, reservations.order_holder(order))
+        events.publish_order(order, events.EVENT_PLACED)
+    return order, shortages
+
+
+def _not_payable(order_no, status):
+    return ValidationError({'status': [f"Order {order_no} sudah {status}, tidak bisa dibayar."]})
+
+
+def lock_payable_order(order):
+    """
+    Kunci baris order di transaksi yang sedang berjalan dan kembalikan isinya
+    yang terbaru (total bisa berubah sejak halaman dibuka). Order yang sudah
+    PAID/CANCELLED ditolak (ValidationError). Dipakai semua jalur pembayaran
+    sebelum Payment dibuat.
+    """
+    locked = Order.objects.select_for_update().get(pk=order.pk)
+    if locked.status not in EDITABLE_STATUSES:
+        raise _not_payable(locked.order_no, locked.status)
+    return locked
+
+
+def finalize_paid_order(order, payment, user):
+    """
+    Tandai order PAID, kurangi stok semua item-nya, catat ke rollup laporan
+    dan jadwalkan render struk setelah commit. Dipanggil di dalam transaction.atomic() setelah Payment tersimpan.
+    Perubahan status bersyarat: order yang sudah PAID/CANCELLED ditolak (ValidationError).
+    """
+    now = timezone.now()
+    if not Order.objects.filter(pk=order.pk, status__in=EDITABLE_STATUSES).update(
+            status=Order.STATUS_PAID, placed_at=now):
+        raise _not_payable(order.order_no, Order.objects.values_list('status', flat=True).get(pk=order.pk))
+    order.placed_at = now
+    order.status = Order.STATUS_PAID
+
+    lines = order.items.values_list('menu_item_id', 'qty')
+    deduct_stock(lines, user, note=f'Sale {order.order_no}')
+    # stok sudah benar-benar berkurang, pegangan order tidak diperlukan lagi
+    reservations.release(reservations.order_holder(order))
+    record_sale(order, payment)
+    receipts.schedule_receipt(order)
+    events.publish_order(order, events.EVENT_PAID)
+
+
+def cancel_order(order):
+    """
+    Batalkan order yang belum dibayar, lepas reservasi stoknya dan hentikan
+    intent pembayaran gateway yang masih PENDING.
+    """
+    # import di sini: payments.intents memakai modul ini
+    from payments.intents import expire_for_order
+
+    if order.status not in EDITABLE_STATUSES:
+        raise ValidationError({'status': [f"Order {order.order_no} sudah {order.status}, tidak bisa dibatalkan."]})
+    with transaction.atomic():
+        # kunci order (urutan sama dengan payments.intents.confirm_intent), cek ulang statusnya
+        status = Order.objects.select_for_update().values_list('status', flat=True).get(pk=order.pk)
+        if status not in EDITABLE_STATUSES:
+            raise ValidationError({'status': [f"Order {order.order_no} sudah {status}, tidak bisa dibatalkan."]})
+        expire_for_order(order)
+        order.status = Order.STATUS_CANCELLED
+        order.save(update_fields=['status', 'updated_at'])
+        reservations.release(reservations.order_holder(order))
+        events.publish_order(order, events.EVENT_CANCELLED)
@@ -0,0 +1,13 @@
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from orders.idempotency import FIELD
+
+register = template.Library()
+
+@register.simple_tag
+def idempotency_field():
+    """Field tersembunyi berisi kunci baru setiap form dirender (lihat orders.idempotency)."""
+    return format_html('<input type="hidden" name="{}" value="{}">', FIELD, uuid.uuid4().hex)
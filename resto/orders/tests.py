@@ -1,3 +1,415 @@
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q, Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog import reservations
+from catalog.models import Category, MenuItem, StockMovement, StockReservation
+from payments.models import Payment, PaymentMethod
+from resto.testing import QueryBudgetMixin
+from . import events
+from .customers import find_or_create_customer
+from .models import Customer, IdempotencyKey, Order, OrderItem, OrderSequence, Receipt
+from .numbering import OrderNumberAllocator, create_order
+from .phones import normalize_phone
+from .services import add_items, cancel_order
+
+
+class AddItemsTests(TestCase):
+    """
+    Menguji tambah banyak item ke order POS:
+    - baris menu yang sama digabung (juga dengan baris yang sudah ada)
+    - aturan stok: habis ditolak, melebihi stok dipotong
+    - total order sama dengan hasil SUM ulang
+    - order PAID/CANCELLED ditolak tanpa membuat reservasi
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123")
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=5)
+        self.teh = MenuItem.objects.create(category=cat, name="Es Teh",
+                                           price=Decimal("5000"), stock_qty=10)
+        self.sate = MenuItem.objects.create(category=cat, name="Sate Ayam",
+                                            price=Decimal("25000"), stock_qty=0)
+        self.order = Order.objects.create(user=self.user, order_no="T0001")
+
+    def test_merges_lines_and_updates_totals_incrementally(self):
+        add_items(self.order, [(self.nasi.id, 1)])
+        add_items(self.order, [(self.nasi.id, 1), (self.teh.id, 2), (self.teh.id, 1)])
+
+        rows = dict(OrderItem.objects.filter(order=self.order).values_list("menu_item_id", "qty"))
+        self.assertEqual(rows, {self.nasi.id: 2, self.teh.id: 3})
+        self.assertEqual(OrderItem.objects.filter(order=self.order).count(), 2)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.subtotal, Decimal("55000.00"))
+        self.assertEqual(self.order.tax_amount, Decimal("5500.00"))
+        self.assertEqual(self.order.grand_total, Decimal("60500.00"))
+        expected = Order.objects.get(pk=self.order.pk)
+        expected.recalc_totals()
+        self.assertEqual(expected.grand_total, self.order.grand_total)
+
+    def test_stock_rules(self):
+        result = add_items(self.order, [(self.nasi.id, 8), (self.sate.id, 1), (99999, 1)])
+        self.assertEqual(result.clamped, [(self.nasi, 8, 5)])
+        self.assertEqual(result.out_of_stock, [self.sate])
+        self.assertEqual(result.missing, [99999])
+        rows = dict(OrderItem.objects.filter(order=self.order).values_list("menu_item_id", "qty"))
+        self.assertEqual(rows, {self.nasi.id: 5})
+
+    def test_paid_or_cancelled_order_rejected(self):
+        for status in (Order.STATUS_PAID, Order.STATUS_CANCELLED):
+            Order.objects.filter(pk=self.order.pk).update(status=status)
+            with self.assertRaises(ValidationError):
+                add_items(self.order, [(self.nasi.id, 1)])
+        self.assertFalse(OrderItem.objects.filter(order=self.order).exists())
+        self.assertFalse(StockReservation.objects.filter(holder=reservations.order_holder(self.order)).exists())
+
+    def test_json_endpoint(self):
+        self.client.login(username="kasir", password="pass123")
+        url = reverse("pos_add_items", args=[self.order.order_no])
+        payload = {"lines": [{"menu_item_id": self.nasi.id, "qty": 2},
+                             {"menu_item_id": self.teh.id}]}
+        resp = self.client.post(url, json.dumps(payload), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["grand_total"], "49500.00")
+        self.assertEqual(len(data["added"]), 2)
+
+        resp = self.client.post(url, "{bukan json", content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_form_endpoint_redirects(self):
+        self.client.login(username="kasir", password="pass123")
+        url = reverse("pos_add_items", args=[self.order.order_no])
+        resp = self.client.post(url, {"menu_item_id": [self.nasi.id, self.teh.id], "qty": ["1", "4"]})
+        self.assertRedirects(resp, reverse("pos_add_item", args=[self.order.order_no]),
+                             fetch_redirect_response=False)
+        self.assertEqual(OrderItem.objects.filter(order=self.order).count(), 2)
+
+
+class OrderNumberTests(TestCase):
+    """
+    Menguji alokasi nomor order:
+    - format <OUTLET>-<YYMMDD>-<urut> dan naik berurutan dalam satu worker
+    - dua worker mendapat blok yang tidak tumpang tindih
+    - bentrok dengan nomor yang sudah ada ditangani (counter dimajukan)
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123")
+        self.day = datetime.date(2025, 10, 18)
+
+    def test_sequential_within_block(self):
+        alloc = OrderNumberAllocator(block_size=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = alloc.next_order_no(self.day)
+        numbers = [first] + [alloc.next_order_no(self.day) for _ in range(4)]
+        self.assertEqual(numbers[0], "RST-251018-00001")
+        self.assertEqual(numbers[-1], "RST-251018-00005")
+        # satu blok = satu kali sentuh counter
+        self.assertEqual(OrderSequence.objects.get(prefix="RST-251018").last_value, 5)
+
+    def test_workers_get_disjoint_blocks(self):
+        a, b = OrderNumberAllocator(block_size=3), OrderNumberAllocator(block_size=3)
+        seen = []
+        for _ in range(4):
+            with self.captureOnCommitCallbacks(execute=True):
+                seen.append(a.next_order_no(self.day))
+                seen.append(b.next_order_no(self.day))
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(OrderSequence.objects.get(prefix="RST-251018").last_value, 12)
+
+    def test_create_order_skips_existing_number(self):
+        from .numbering import allocator, day_prefix
+        allocator.discard()
+        prefix = day_prefix()
+        Order.objects.create(user=self.user, order_no=f"{prefix}-00001")
+        Order.objects.create(user=self.user, order_no=f"{prefix}-00002")
+        order = create_order(user=self.user)
+        self.assertTrue(order.order_no.startswith(prefix + "-"))
+        self.assertGreater(order.order_no, f"{prefix}-00002")
+
+    def test_pos_create_order_uses_allocator(self):
+        self.client.login(username="kasir", password="pass123")
+        resp = self.client.get(reverse("pos_create_order"))
+        order = Order.objects.get()
+        self.assertRegex(order.order_no, r"^RST-\d{6}-\d{5}$")
+        self.assertRedirects(resp, reverse("pos_add_item", args=[order.order_no]),
+                             fetch_redirect_response=False)
+
+
+class PosQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Menguji anggaran query halaman POS & struk: jumlah query tetap walau
+    item di order bertambah (order.items -> menu_item tidak N+1).
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123", is_staff=True)
+        self.cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.order = Order.objects.create(user=self.user, order_no="T0002")
+        self.client.login(username="kasir", password="pass123")
+        self.add_lines(2)
+
+    def add_lines(self, n):
+        start = MenuItem.objects.count()
+        items = [MenuItem.objects.create(category=self.cat, name=f"Menu {i}",
+                                         price=Decimal("10000"), stock_qty=10)
+                 for i in range(start, start + n)]
+        add_items(self.order, [(m.id, 1) for m in items])
+
+    def test_pos_add_item_page(self):
+        url = reverse("pos_add_item", args=[self.order.order_no])
+        with self.assertMaxQueries(8):
+            self.client.get(url)
+        self.assertScalesFlat(lambda: self.client.get(url), lambda: self.add_lines(4))
+
+    def test_pos_add_item_post(self):
+        item = MenuItem.objects.create(category=self.cat, name="Baru", price=Decimal("10000"), stock_qty=10)
+        url = reverse("pos_add_item", args=[self.order.order_no])
+        # POST tidak menjalankan prefetch item order maupun pencarian menu
+        with self.assertMaxQueries(17):
+            res = self.client.post(url + "?q=menu", {"menu_item_id": item.id, "qty": 1})
+        self.assertEqual(res.status_code, 302)
+        self.assertTrue(OrderItem.objects.filter(order=self.order, menu_item=item).exists())
+
+        res = self.client.post(url, {"menu_item_id": 99999, "qty": 1}, follow=True)
+        self.assertContains(res, "Menu #99999 tidak ditemukan.")
+
+    def test_receipt_page(self):
+        url = reverse("order_receipt", args=[self.order.order_no])
+        with self.assertMaxQueries(6):
+            self.client.get(url)
+        self.assertScalesFlat(lambda: self.client.get(url), lambda: self.add_lines(4))
+
+
+class GenerateDataTests(TestCase):
+    """
+    Menguji generator data sintetis (volume kecil):
+    - jumlah order/pelanggan sesuai opsi, order PAID punya payment
+    - stok akhir menu = IN - OUT di ledger StockMovement
+    - counter nomor order dimajukan sehingga allocator tidak bentrok
+    """
+    def test_generate_small_dataset(self):
+        call_command("generate_data", menu_items=20, customers=50, orders=300, days=7,
+                     end=datetime.date(2025, 10, 17), chunk_size=40, stdout=StringIO())
+
+        self.assertEqual(Order.objects.count(), 300)
+        self.assertEqual(Customer.objects.count(), 50)
+        paid = Order.objects.filter(status=Order.STATUS_PAID)
+        self.assertEqual(paid.filter(payment__isnull=True).count(), 0)
+        self.assertTrue(paid.exists())
+        first = Order.objects.order_by("created_at").first()
+        self.assertEqual(first.created_at.date(), datetime.date(2025, 10, 11))
+
+        for item in MenuItem.objects.all():
+            ledger = StockMovement.objects.filter(menu_item=item).aggregate(
+                i=Sum("qty", filter=Q(move_type="IN")), o=Sum("qty", filter=Q(move_type="OUT")))
+            self.assertEqual(item.stock_qty, (ledger["i"] or 0) - (ledger["o"] or 0))
+
+        last = OrderSequence.objects.get(prefix="RST-251017").last_value
+        self.assertTrue(Order.objects.filter(order_no=f"RST-251017-{last:05d}").exists())
+
+
+class CustomerLookupTests(TestCase):
+    """
+    Menguji pencarian & dedup pelanggan:
+    - normalisasi nomor 08.., +62.., 62.., tanpa 0
+    - pelanggan lama ditemukan walau format nomor beda; tamu anonim tidak dibuat
+    - dedupe_customers memindahkan order ke pelanggan tertua dan menghapus duplikat
+    """
+    def test_normalize_phone(self):
+        for raw in ["0812-3456-7890", "+62 812 3456 7890", "6281234567890", "(0812) 3456 7890",
+                    "812 3456 7890", "0062 812 3456 7890"]:
+            self.assertEqual(normalize_phone(raw), "6281234567890", raw)
+        self.assertEqual(normalize_phone("021-555-1234"), "62215551234")
+        self.assertEqual(normalize_phone(""), "")
+        self.assertEqual(normalize_phone("123"), "")
+
+    def test_find_or_create(self):
+        first = find_or_create_customer("Budi", "0812 3456 7890")
+        self.assertEqual(first.phone_normalized, "6281234567890")
+        self.assertEqual(find_or_create_customer("Budi S", "+6281234567890"), first)
+        self.assertIsNone(find_or_create_customer("Guest", ""))
+        self.assertEqual(find_or_create_customer("Ani", ""), find_or_create_customer("Ani", " "))
+        self.assertEqual(Customer.objects.count(), 2)
+
+    def test_dedupe_command(self):
+        user = User.objects.create_user(username="kasir", password="pass123")
+        keep = Customer.objects.create(name="Budi", phone="08123456789")
+        dupe = Customer.objects.create(name="Budi", phone="+62 8123456789", email="budi@contoh.id")
+        guest = Customer.objects.create(name="Guest", phone="")
+        Order.objects.create(user=user, order_no="T1", customer=dupe)
+        Order.objects.create(user=user, order_no="T2", customer=guest)
+
+        call_command("dedupe_customers", guests=True, stdout=StringIO())
+        self.assertEqual(list(Customer.objects.values_list("pk", flat=True)), [keep.pk])
+        keep.refresh_from_db()
+        self.assertEqual(keep.email, "budi@contoh.id")
+        self.assertEqual(Order.objects.get(order_no="T1").customer_id, keep.pk)
+        self.assertIsNone(Order.objects.get(order_no="T2").customer_id)
+
+
+class KitchenEventsTests(TestCase):
+    """
+    Menguji event dapur:
+    - event order dikirim setelah commit dan tersimpan untuk replay
+    - stream SSE mengirim event ke layar yang tersambung (tanpa query ke Order)
+    - hanya staff yang boleh berlangganan
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="dapur", password="pass123", is_staff=True)
+        self.order = Order.objects.create(user=self.user, order_no="T0001")
+
+    def test_cancel_publishes_after_commit(self):
+        before = events.bus.last_id
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_order(self.order)
+        event = events.bus.replay(before)[-1]
+        self.assertEqual((event.kind, event.data["order_no"], event.data["status"]),
+                         ("cancelled", "T0001", "CANCELLED"))
+        with self.assertRaises(ValidationError):
+            cancel_order(self.order)
+
+    async def test_sse_stream(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("kitchen_events"),
+                                                headers={"Last-Event-ID": str(events.bus.last_id)})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertIn(b"retry:", await anext(stream))
+
+        nxt = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)   # generator sudah berlangganan
+        events.bus.publish("paid", {"order_no": "T0001"})
+        chunk = await asyncio.wait_for(nxt, timeout=2)
+        self.assertIn(b"event: paid", chunk)
+        self.assertIn(b'"order_no": "T0001"', chunk)
+        await response.streaming_content.aclose()
+
+    def test_display_renders_open_orders(self):
+        Order.objects.filter(pk=self.order.pk).update(status=Order.STATUS_PAID)
+        self.client.force_login(self.user)
+        res = self.client.get(reverse("kitchen_display"))
+        self.assertContains(res, 'data-order="T0001"')
+        self.assertContains(res, reverse("kitchen_events"))
+
+    async def test_sse_requires_staff(self):
+        response = await self.async_client.get(reverse("kitchen_events"))
+        self.assertEqual(response.status_code, 403)
+
+
+class ReceiptTests(TestCase):
+    """
+    Menguji struk tersimpan:
+    - struk dirender & disimpan sekali saat pembayaran commit
+    - cetak ulang HTML/ESC/POS tidak menyentuh tabel order/item/payment
+    - batch ESC/POS akhir hari berisi semua struk hari itu
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123", is_staff=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=10)
+        self.cash = PaymentMethod.objects.create(code="CASH", name="Tunai")
+        self.client.force_login(self.user)
+
+    def _pay(self, order_no):
+        order = Order.objects.create(user=self.user, order_no=order_no)
+        add_items(order, [(self.nasi.id, 2)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("pos_checkout", args=[order_no]), {"payment_method_id": self.cash.id})
+        return order
+
+    def test_receipt_stored_once_and_reprinted_without_order_queries(self):
+        self._pay("T0001")
+        receipt = Receipt.objects.get(order_no="T0001")
+        self.assertIn("Nasi Goreng", receipt.html)
+        escpos = bytes(receipt.escpos)
+        self.assertTrue(escpos.startswith(b"\x1b@"))
+        self.assertIn(b"Rp 44.000", escpos)
+
+        cache.clear()
+        for name in ("order_receipt", "order_receipt_escpos"):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(reverse(name, args=["T0001"]))
+            self.assertEqual(res.status_code, 200)
+            touched = " ".join(q["sql"] for q in ctx.captured_queries)
+            self.assertNotIn('"orders_order"', touched)
+            self.assertNotIn("payments_payment", touched)
+        self.assertEqual(res.content, escpos)
+
+    def test_batch_reprint(self):
+        self._pay("T0001")
+        self._pay("T0002")
+        Receipt.objects.filter(order_no="T0002").delete()   # order lama tanpa struk tersimpan
+        out = os.path.join(tempfile.mkdtemp(), "struk.bin")
+        call_command("print_receipts", output=out, stderr=StringIO())
+        with open(out, "rb") as fh:
+            data = fh.read()
+        self.assertEqual(data.count(b"\x1b@"), 2)
+        self.assertLess(data.index(b"T0001"), data.index(b"T0002"))
+
+
+class IdempotentCheckoutTests(TestCase):
+    """
+    Menguji checkout idempoten:
+    - POST ulang dengan kunci sama tidak membuat Payment kedua dan diarahkan ke tujuan yang sama
+    - POST ulang tidak menyentuh tabel order/payment/stok
+    - request gagal (form error) melepas kunci sehingga perbaikan bisa dikirim ulang
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123", is_staff=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=10)
+        self.cash = PaymentMethod.objects.create(code="CASH", name="Tunai")
+        self.order = Order.objects.create(user=self.user, order_no="T0001")
+        add_items(self.order, [(self.nasi.id, 2)])
+        self.url = reverse("pos_checkout", args=["T0001"])
+        self.client.force_login(self.user)
+
+    def test_double_submit_pays_once(self):
+        data = {"payment_method_id": self.cash.id, "idempotency_key": "a" * 32}
+        first = self.client.post(self.url, data)
+        self.assertEqual(first.status_code, 302)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.post(self.url, data)
+        self.assertEqual(second.status_code, 302)
+        self.assertEqual(second.url, first.url)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        touched = " ".join(q["sql"] for q in ctx.captured_queries)
+        for table in ('"orders_order"', "payments_payment", "catalog_menuitem"):
+            self.assertNotIn(table, touched)
+
+        self.assertEqual(Payment.objects.filter(order=self.order).count(), 1)
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.nasi.stock_qty, 8)
+
+    def test_failed_attempt_releases_key(self):
+        res = self.client.post(self.url, {"idempotency_key": "b" * 32})
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        res = self.client.post(self.url, {"payment_method_id": self.cash.id, "idempotency_key": "b" * 32})
+        self.assertEqual(res.status_code, 302)
+        self.assertEqual(IdempotencyKey.objects.get().location, res.url)
 
-# Create your tests here.
+    def test_form_renders_key(self):
+        res = self.client.get(self.url)
+        self.assertContains(res, 'name="idempotency_key"')
@@ -1,4 +1,5 @@
 from django.urls import path
+from catalog import views as catalog_views
 from orders import views as v
 
 urlpatterns = [
@@ -8,14 +9,21 @@ urlpatterns = [
     # POS
     path('pos/create/', v.pos_create_order, name='pos_create_order'),
     path('pos/<str:order_no>/add-item/', v.pos_add_item, name='pos_add_item'),
+    path('pos/<str:order_no>/add-items/', v.pos_add_items, name='pos_add_items'),
     path('pos/<str:order_no>/checkout/', v.pos_checkout, name='pos_checkout'),
+    path('pos/<str:order_no>/cancel/', v.pos_cancel_order, name='pos_cancel_order'),
 
-    # Keranjang
-    path('cart/', v.cart_view, name='cart_view'),
-    path('cart/add/<int:menu_id>/', v.cart_add, name='cart_add'),
-    path('cart/remove/<int:menu_id>/', v.cart_remove, name='cart_remove'),
-    path('cart/clear/', v.cart_clear, name='cart_clear'),
+    # Layar dapur (SSE, butuh server ASGI)
+    path('kitchen/', v.kitchen_display, name='kitchen_display'),
+    path('kitchen/events/', v.kitchen_events, name='kitchen_events'),
+
+    # Keranjang: URL lama, ditangani view keranjang catalog (dengan reservasi stok)
+    path('cart/', catalog_views.cart_view, name='cart_view'),
+    path('cart/add/<int:pk>/', catalog_views.cart_add, name='cart_add'),
+    path('cart/remove/<int:pk>/', catalog_views.cart_remove, name='cart_remove'),
+    path('cart/clear/', catalog_views.cart_clear, name='cart_clear'),
 
     # Receipt
     path('orders/<str:order_no>/receipt/', v.order_receipt, name='order_receipt'),
+    path('orders/<str:order_no>/receipt.escpos', v.order_receipt_escpos, name='order_receipt_escpos'),
 ]
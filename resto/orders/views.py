@@ -1,19 +1,29 @@
-import uuid
+import asyncio
+import json
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.db import transaction
-from django.utils import timezone
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 
-from catalog.models import MenuItem, StockMovement, Category
+from catalog import search
+from catalog.models import MenuItem, Category
+from . import events, receipts
+from .idempotency import idempotent
 from .models import Order, OrderItem
-from payments.models import Payment, PaymentMethod
+from .numbering import create_order
+from .services import add_items, cancel_order, finalize_paid_order, lock_payable_order
+from payments import intents as payment_intents, registry as payment_registry
+from payments.models import Payment
 
-from django.apps import apps
-from django.db.models import Q
 from django.urls import reverse
 
+POS_SEARCH_LIMIT = 100
+KITCHEN_RECENT = 50
+SSE_KEEPALIVE = 15  # detik; komentar kosong supaya proxy tidak menutup koneksi diam
+
 @login_required
 def dashboard(request):
     return render(request, 'dashboard.html')
@@ -24,55 +34,56 @@ def pos_create_order(request):
     """
     Buat order baru lalu arahkan ke halaman tambah item.
     """
-    order_no = uuid.uuid4().hex[:10].upper()
-    order = Order.objects.create(user=request.user, order_no=order_no)
+    order = create_order(user=request.user)
     return redirect('pos_add_item', order_no=order.order_no)
 
 
 @login_required
 def pos_add_item(request, order_no):
-    order = get_object_or_404(Order, order_no=order_no)
-
-    # FILTER & SEARCH
+    # FILTER & SEARCH (dipertahankan saat redirect setelah tambah item)
     q = request.GET.get('q', '').strip()
     cat = request.GET.get('cat', '').strip()
 
-    menu = MenuItem.objects.filter(is_active=True)
-    if cat:
-        menu = menu.filter(category_id=cat)
-    if q:
-        menu = menu.filter(Q(name__icontains=q) | Q(category__name__icontains=q))
-    menu = menu.select_related('category').order_by('category__name', 'name')
-
-    categories = Category.objects.order_by('name')
-
     if request.method == 'POST':
-        item_id = request.POST.get('menu_item_id')
+        order = get_object_or_404(Order, order_no=order_no)
+        try:
+            item_id = int(request.POST.get('menu_item_id'))
+        except (TypeError, ValueError):
+            item_id = None
         try:
             qty = int(request.POST.get('qty', 1))
         except ValueError:
             qty = 1
-        if qty < 1:
-            qty = 1
-
-        item = get_object_or_404(MenuItem, pk=item_id)
 
-        # ==== VALIDASI STOK (nonaktifkan blok ini jika mau bebas tambah tanpa stok)
-        if item.stock_qty <= 0:
-            messages.error(request, f"Stok {item.name} habis.")
-            return redirect('pos_add_item', order_no=order_no)
-        if qty > item.stock_qty:
-            messages.warning(request, f"Qty melebihi stok. Maksimum {item.stock_qty}.")
-            qty = item.stock_qty
-        # ==== akhir validasi stok
-
-        # Tambah / merge item (kalau mau merge qty, pakai get_or_create; di sini create baris baru)
-        OrderItem.objects.create(order=order, menu_item=item, qty=qty, price=item.price)
-        order.recalc_totals()
-        messages.success(request, f"Tambah {item.name} × {qty}")
+        if item_id is None:
+            messages.error(request, "Pilih menu terlebih dahulu.")
+        else:
+            try:
+                result = add_items(order, [(item_id, qty)])
+            except ValidationError as ve:
+                for msg in ve.messages:
+                    messages.error(request, msg)
+            else:
+                for pk in result.missing:
+                    messages.error(request, f"Menu #{pk} tidak ditemukan.")
+                _add_items_messages(request, result)
         # Kembalikan ke halaman yang sama + pertahankan filter
         return redirect(f"{reverse('pos_add_item', args=[order_no])}?q={q}&cat={cat}")
 
+    # item order ditampilkan di panel kanan (i.menu_item.name): prefetch supaya tidak N+1
+    order = get_object_or_404(Order.objects.prefetch_related('items__menu_item'), order_no=order_no)
+
+    menu = MenuItem.objects.filter(is_active=True).select_related('category')
+    if cat:
+        menu = menu.filter(category_id=cat)
+    if q:
+        # indeks pencarian (prefix, urut relevansi) untuk type-ahead kasir
+        menu = search.filter_ranked(menu, q, limit=POS_SEARCH_LIMIT)
+    else:
+        menu = menu.order_by('category__name', 'name')
+
+    categories = Category.objects.order_by('name')
+
     return render(
         request,
         'pos/add_item.html',
@@ -80,25 +91,99 @@ def pos_add_item(request, order_no):
     )
 
 
-def _ensure_payment_methods():
+def _add_items_messages(request, result):
+    # ==== VALIDASI STOK (aturan sama untuk tambah satu maupun banyak item)
+    for item in result.out_of_stock:
+        messages.error(request, f"Stok {item.name} habis.")
+    for item, _, max_qty in result.clamped:
+        messages.warning(request, f"Qty {item.name} melebihi stok. Maksimum {max_qty}.")
+    for item, qty in result.added:
+        messages.success(request, f"Tambah {item.name} × {qty}")
+
+
+def _parse_lines(request):
     """
-    Buat metode pembayaran default jika tabel masih kosong.
+    Baris dari JSON ``{"lines": [{"menu_item_id": 1, "qty": 2}, ...]}`` atau
+    form dengan field berulang ``menu_item_id`` & ``qty`` (berpasangan).
     """
-    if not PaymentMethod.objects.exists():
-        PaymentMethod.objects.bulk_create([
-            PaymentMethod(code="CASH", name="Cash"),
-            PaymentMethod(code="CARD", name="Kartu"),
-            PaymentMethod(code="QRIS", name="QRIS"),
-        ])
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+            raw = [(line['menu_item_id'], line.get('qty', 1)) for line in payload['lines']]
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise ValidationError({'lines': ["Format baris tidak valid."]})
+    else:
+        ids = request.POST.getlist('menu_item_id')
+        qtys = request.POST.getlist('qty')
+        raw = [(pk, qtys[i] if i < len(qtys) else 1) for i, pk in enumerate(ids)]
+
+    lines = []
+    for pk, qty in raw:
+        try:
+            pk = int(pk)
+        except (ValueError, TypeError):
+            raise ValidationError({'lines': [f"menu_item_id tidak valid: {pk}"]})
+        try:
+            qty = int(qty)
+        except (ValueError, TypeError):
+            qty = 1
+        lines.append((pk, qty))
+    return lines
 
 
 @login_required
+@require_POST
+def pos_add_items(request, order_no):
+    """
+    Tambah banyak item sekaligus dalam satu request (mis. pesanan satu meja).
+    Request JSON dijawab JSON (total terbaru), form dijawab redirect.
+    """
+    order = get_object_or_404(Order, order_no=order_no)
+    wants_json = request.content_type == 'application/json'
+    try:
+        lines = _parse_lines(request)
+    except ValidationError as ve:
+        if wants_json:
+            return JsonResponse({'errors': ve.message_dict}, status=400)
+        for msg in ve.message_dict['lines']:
+            messages.error(request, msg)
+        return redirect('pos_add_item', order_no=order_no)
+
+    try:
+        result = add_items(order, lines)
+    except ValidationError as ve:
+        if wants_json:
+            return JsonResponse({'errors': ve.message_dict}, status=409)
+        for msg in ve.messages:
+            messages.error(request, msg)
+        return redirect('pos_add_item', order_no=order_no)
+
+    if wants_json:
+        return JsonResponse({
+            'order_no': order.order_no,
+            'added': [{'menu_item_id': item.pk, 'qty': qty} for item, qty in result.added],
+            'clamped': [{'menu_item_id': item.pk, 'requested': req, 'qty': qty}
+                        for item, req, qty in result.clamped],
+            'out_of_stock': [item.pk for item in result.out_of_stock],
+            'missing': result.missing,
+            'subtotal': str(order.subtotal),
+            'tax_amount': str(order.tax_amount),
+            'grand_total': str(order.grand_total),
+        })
+
+    for pk in result.missing:
+        messages.error(request, f"Menu #{pk} tidak ditemukan.")
+    _add_items_messages(request, result)
+    return redirect('pos_add_item', order_no=order_no)
+
+
+@login_required
+@idempotent('pos_checkout')
 def pos_checkout(request, order_no):
     order = get_object_or_404(Order, order_no=order_no)
 
-    # Pastikan pilihan metode selalu ada
-    _ensure_payment_methods()
-    methods = PaymentMethod.objects.all()
+    # Dari registry di memori (default dibuat kalau tabel masih kosong)
+    methods = payment_registry.methods()
 
     if request.method == 'POST':
         method_id = request.POST.get('payment_method_id')
@@ -109,11 +194,26 @@ def pos_checkout(request, order_no):
             messages.error(request, "Pilih metode pembayaran terlebih dahulu.")
             return render(request, 'pos/checkout.html', {'order': order, 'methods': methods})
 
-        pm = get_object_or_404(PaymentMethod, pk=method_id)
+        pm = payment_registry.get(method_id)
+        if pm is None:
+            raise Http404("Metode pembayaran tidak dikenal.")
+
+        if payment_registry.handler_for(pm.code).gateway:
+            # QRIS dsb.: tampilkan QR dan tunggu callback gateway (payments.intents)
+            try:
+                intent = payment_intents.create_intent(order, pm, request.user)
+            except ValidationError as ve:
+                for msg in ve.messages:
+                    messages.error(request, msg)
+                return render(request, 'pos/checkout.html', {'order': order, 'methods': methods})
+            return redirect('payment_intent', reference=intent.reference)
 
         try:
             with transaction.atomic():
-                # Buat payment (validasi logic khusus per metode ada di model Payment)
+                # kunci order & cek status: order yang sudah dibatalkan/dibayar tidak bisa dibayar lagi
+                order = lock_payable_order(order)
+                # Buat payment (validasi khusus per metode ada di handler registry),
+                # divalidasi sekali oleh save()
                 payment = Payment(
                     order=order,
                     payment_method=pm,
@@ -121,27 +221,14 @@ def pos_checkout(request, order_no):
                     ref_no=ref_no or None,
                     card_last4=card_last4 or None
                 )
-                payment.full_clean()   # supaya bisa tangkap ValidationError lebih rapi
                 payment.save()
 
-                # Finalisasi order & mutasi stok
-                order.placed_at = timezone.now()
-                order.status = Order.STATUS_PAID
-                order.save(update_fields=['placed_at', 'status'])
-
-                for oi in order.items.select_related('menu_item'):
-                    oi.menu_item.stock_qty -= oi.qty
-                    oi.menu_item.save(update_fields=['stock_qty'])
-                    StockMovement.objects.create(
-                        menu_item=oi.menu_item,
-                        user=request.user,
-                        move_type=StockMovement.MOVE_OUT,
-                        qty=oi.qty,
-                        note=f'Sale {order.order_no}'
-                    )
+                # Finalisasi order & mutasi stok (satu UPDATE, tolak oversell)
+                finalize_paid_order(order, payment, request.user)
 
         except ValidationError as ve:
             # Tampilkan error per field dari Payment model (mis. wajib ref_no/card_last4 untuk CARD)
+            # atau stok kurang (InsufficientStock, field "stock")
             for field, errs in ve.message_dict.items():
                 for msg in errs:
                     messages.error(request, f"{field}: {msg}")
@@ -154,95 +241,95 @@ def pos_checkout(request, order_no):
 
 
 @login_required
-def order_receipt(request, order_no):
+@require_POST
+def pos_cancel_order(request, order_no):
+    """Batalkan order yang belum dibayar (reservasi stok dilepas, dapur diberi tahu)."""
+    order = get_object_or_404(Order, order_no=order_no)
+    try:
+        cancel_order(order)
+    except ValidationError as ve:
+        for msg in ve.messages:
+            messages.error(request, msg)
+        return redirect('pos_add_item', order_no=order_no)
+    messages.success(request, f"Order {order.order_no} dibatalkan.")
+    return redirect('pos_create_order')
+
+
+@login_required
+def kitchen_display(request):
     """
-    Halaman struk untuk dicetak. Hanya staff/kasir yang boleh.
+    Layar dapur: order PLACED/PAID terakhir dirender sekali, perubahan
+    berikutnya didorong server lewat kitchen_events (SSE), tanpa polling.
     """
     if not request.user.is_staff:
         return redirect('dashboard')
+    orders = (Order.objects.filter(status__in=[Order.STATUS_PLACED, Order.STATUS_PAID])
+              .select_related('customer').prefetch_related('items__menu_item')
+              .order_by('-id')[:KITCHEN_RECENT])
+    return render(request, 'orders/kitchen.html', {
+        'orders': list(reversed(orders)),
+        'last_event_id': events.bus.last_id,
+    })
 
-    order = get_object_or_404(
-        Order.objects.select_related('customer', 'user').prefetch_related('items__menu_item'),
-        order_no=order_no
-    )
-    shop = {
-        "name": "Dapur Bunda Bahagia",
-        "address": "Jl. Contoh No. 123, Jakarta",
-        "phone": "0812-0000-0000",
-    }
-    return render(request, "orders/receipt.html", {"order": order, "shop": shop})
 
-
-# ================== Ambil model Menu tanpa circular import ==================
-def get_menu_model():
-    for name in ["Menu", "MenuItem", "Product", "Item", "Food"]:
+async def kitchen_events(request):
+    """
+    Stream Server-Sent Events (placed/paid/cancelled) untuk layar dapur.
+    Harus dilayani server ASGI (resto.asgi): tiap layar hanya memegang satu
+    koneksi yang diam menunggu event dari orders.events.bus, tanpa query.
+    """
+    user = await request.auser()
+    if not user.is_authenticated or not user.is_staff:
+        return HttpResponseForbidden()
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.GET.get('after') or 0)
+    except ValueError:
+        after = 0
+
+    async def stream():
+        sub = events.bus.subscribe()
         try:
-            return apps.get_model("catalog", name)
-        except LookupError:
-            continue
-    raise LookupError(
-        "Model menu tidak ditemukan di app 'catalog'. "
-        "Pastikan ada model bernama salah satu dari: Menu, MenuItem, Product, Item, Food"
-    )
+            yield "retry: 3000\n\n"
+            for event in events.bus.replay(after):
+                yield event.sse()
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield event.sse()
+        finally:
+            events.bus.unsubscribe(sub)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: jangan buffer stream
+    return response
+
+
+@login_required
+def order_receipt(request, order_no):
+    """
+    Halaman struk untuk dicetak. Hanya staff/kasir yang boleh.
+    """
+    if not request.user.is_staff:
+        return redirect('dashboard')
+    # struk order PAID diambil dari bentuk tersimpan (orders.receipts), tanpa render ulang
+    html = receipts.receipt_for(order_no, 'html')
+    if html is None:
+        raise Http404("Order tidak ditemukan.")
+    return HttpResponse(html)
+
 
-# ================== Util keranjang berbasis session ==================
-def _get_cart(request):
-    return request.session.get("cart", {})
-
-def _save_cart(request, cart):
-    request.session["cart"] = cart
-    request.session.modified = True
-
-# ================== Views Keranjang (untuk halaman publik, terpisah dari POS) ==================
-def cart_add(request, menu_id):
-    MenuModel = get_menu_model()
-    get_object_or_404(MenuModel, id=menu_id)
-
-    cart = _get_cart(request)
-    key = str(menu_id)
-    cart[key] = cart.get(key, 0) + 1
-    _save_cart(request, cart)
-
-    return redirect("catalog:public_menu")
-
-def cart_remove(request, menu_id):
-    cart = _get_cart(request)
-    key = str(menu_id)
-    if key in cart:
-        cart[key] -= 1
-        if cart[key] <= 0:
-            cart.pop(key)
-        _save_cart(request, cart)
-    return redirect("cart_view")
-
-def cart_clear(request):
-    _save_cart(request, {})
-    return redirect("cart_view")
-
-def cart_view(request):
-    MenuModel = get_menu_model()
-    cart = _get_cart(request)
-
-    ids = [int(i) for i in cart.keys()]
-    items, total = [], 0
-
-    if ids:
-        menus = {m.id: m for m in MenuModel.objects.filter(id__in=ids)}
-        for sid, qty in cart.items():
-            mid = int(sid)
-            m = menus.get(mid)
-            if not m:
-                continue
-            price = getattr(m, "price", 0) or 0
-            name = getattr(m, "name", str(m))
-            subtotal = price * qty
-            total += subtotal
-            items.append({
-                "id": mid,
-                "name": name,
-                "price": price,
-                "qty": qty,
-                "subtotal": subtotal,
-            })
-
-    return render(request, "public/cart.html", {"items": items, "total": total})
+@login_required
+def order_receipt_escpos(request, order_no):
+    """Byte ESC/POS struk untuk dikirim langsung ke printer thermal."""
+    if not request.user.is_staff:
+        return redirect('dashboard')
+    data = receipts.receipt_for(order_no, 'escpos')
+    if data is None:
+        raise Http404("Order tidak ditemukan.")
+    response = HttpResponse(data, content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="{order_no}.bin"'
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PaymentMethod, Payment
+from .models import PaymentMethod, Payment, PaymentIntent
 
 @admin.register(PaymentMethod)
 class PaymentMethodAdmin(admin.ModelAdmin):
@@ -8,4 +8,11 @@ class PaymentMethodAdmin(admin.ModelAdmin):
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('id','order','payment_method','amount_paid','paid_at')
-    list_filter = ('payment_method',)
\ No newline at end of file
+    list_filter = ('payment_method', 'paid_at', 'order__user')
+    date_hierarchy = 'paid_at'
+@admin.register(PaymentIntent)
+class PaymentIntentAdmin(admin.ModelAdmin):
+    list_display = ('reference','order','payment_method','amount','status','created_at','expires_at')
+    list_filter = ('status','payment_method')
+    search_fields = ('reference','order__order_no')
+    raw_id_fields = ('order',)
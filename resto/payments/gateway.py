@@ -0,0 +1,74 @@
+"""
+Format pesan gateway QRIS/EDC: payload QR dan callback bertanda tangan.
+
+- ``qr_payload`` membentuk string QR dinamis bergaya QRIS (TLV EMVCo, CRC16
+  CCITT di tag 63) berisi nominal dan reference intent.
+- Callback dikirim gateway sebagai JSON dengan header ``X-Gateway-Signature``
+  = HMAC-SHA256(``PAYMENT_GATEWAY_SECRET``, body). Simulator lokal
+  (``manage.py simulate_gateway``) memakai fungsi yang sama.
+"""
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+
+from orders.receipts import SHOP
+
+SIGNATURE_HEADER = 'X-Gateway-Signature'
+SECRET = getattr(settings, 'PAYMENT_GATEWAY_SECRET', settings.SECRET_KEY)
+MERCHANT_ID = getattr(settings, 'PAYMENT_MERCHANT_ID', 'ID1020000000001')
+MERCHANT_CITY = getattr(settings, 'PAYMENT_MERCHANT_CITY', 'JAKARTA')
+MCC_RESTAURANT = '5812'
+CURRENCY_IDR = '360'
+
+
+def _tlv(tag, value):
+    return f'{tag}{len(value):02d}{value}'
+
+
+def crc16(data):
+    """CRC16-CCITT (poly 0x1021, awal 0xFFFF) seperti di spesifikasi QRIS."""
+    crc = 0xFFFF
+    for byte in data.encode('ascii'):
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return f'{crc:04X}'
+
+
+def qr_payload(reference, amount):
+    body = ''.join([
+        _tlv('00', '01'),                       # format payload
+        _tlv('01', '12'),                       # QR dinamis (sekali pakai)
+        _tlv('26', _tlv('00', 'ID.CO.RESTO.WWW') + _tlv('01', MERCHANT_ID)),
+        _tlv('52', MCC_RESTAURANT),
+        _tlv('53', CURRENCY_IDR),
+        _tlv('54', f'{amount:.0f}'),
+        _tlv('58', 'ID'),
+        _tlv('59', SHOP['name'][:25]),
+        _tlv('60', MERCHANT_CITY[:15]),
+        _tlv('62', _tlv('05', reference)),      # reference label
+    ])
+    body += '6304'
+    return body + crc16(body)
+
+
+def sign(body):
+    return hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify(body, signature):
+    return bool(signature) and hmac.compare_digest(sign(body), signature)
+
+
+def callback_body(reference, amount, status='PAID', ref_no='', card_last4=''):
+    """Body JSON callback (bytes), seperti yang dikirim gateway."""
+    return json.dumps({
+        'reference': reference,
+        'status': status,
+        'amount': f'{amount:.2f}',
+        'ref_no': ref_no,
+        'card_last4': card_last4,
+    }, sort_keys=True).encode()
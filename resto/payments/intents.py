@@ -0,0 +1,227 @@
+"""
+Alur pembayaran gateway (QRIS/EDC) tanpa menahan worker.
+
+1. ``create_intent`` (POST checkout kasir): simpan PaymentIntent PENDING,
+   nominal diambil dari order, QR dinamis dibentuk (payments.gateway).
+2. Layar kasir menampilkan QR lalu long-poll ``payment_intent_status``
+   (view async di resto.asgi). Tiap request yang menunggu hanya sebuah
+   asyncio.Event di ``waiters``, bukan thread/worker yang diblok atau query
+   yang diulang.
+3. Gateway memanggil callback -> ``confirm_intent``: Payment dibuat, order
+   difinalisasi (stok, rollup, struk, dapur) dalam satu transaksi, lalu semua
+   yang menunggu reference itu dibangunkan setelah commit.
+4. Intent yang tidak dibayar sampai ``expires_at`` ditandai EXPIRED oleh
+   ``manage.py expire_payment_intents``.
+
+Seperti orders.events, ``waiters`` per proses: callback dan long-poll harus
+dilayani proses yang sama, atau ganti dengan pub/sub bersama (Redis).
+"""
+import asyncio
+import datetime
+import secrets
+import threading
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import Order
+from orders.services import EDITABLE_STATUSES, finalize_paid_order
+from . import gateway
+from .models import Payment, PaymentIntent
+
+TTL = datetime.timedelta(seconds=getattr(settings, 'PAYMENT_INTENT_TTL', 5 * 60))
+
+
+class IntentWaiters:
+    """reference -> asyncio.Event milik request yang sedang long-poll."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting = {}
+
+    def add(self, reference):
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiting.setdefault(reference, set()).add(entry)
+        return entry
+
+    def discard(self, reference, entry):
+        with self._lock:
+            entries = self._waiting.get(reference)
+            if entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del self._waiting[reference]
+
+    def notify(self, reference):
+        with self._lock:
+            entries = list(self._waiting.get(reference, ()))
+        for loop, event in entries:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                self.discard(reference, (loop, event))
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(e) for e in self._waiting.values())
+
+
+waiters = IntentWaiters()
+
+
+def _notify_on_commit(reference):
+    transaction.on_commit(lambda: waiters.notify(reference))
+
+
+def create_intent(order, method, user):
+    """
+    Intent PENDING untuk order ini. Intent PENDING yang masih berlaku untuk
+    metode dan nominal yang sama dipakai ulang (kasir membuka ulang layar QR).
+    """
+    if order.status not in EDITABLE_STATUSES:
+        raise ValidationError({'status': [f"Order {order.order_no} sudah {order.status}."]})
+    if order.grand_total <= 0:
+        raise ValidationError({'amount': ["Order masih kosong."]})
+    now = timezone.now()
+    with transaction.atomic():
+        pending = (PaymentIntent.objects.select_for_update()
+                   .filter(order=order, status=PaymentIntent.STATUS_PENDING))
+        for intent in pending:
+            if (intent.payment_method_id == method.pk and intent.amount == order.grand_total
+                    and intent.expires_at > now):
+                return intent
+        stale = [i.reference for i in pending]
+        if stale:
+            PaymentIntent.objects.filter(reference__in=stale).update(
+                status=PaymentIntent.STATUS_EXPIRED, completed_at=now)
+            for reference in stale:
+                _notify_on_commit(reference)
+        reference = secrets.token_hex(12)
+        return PaymentIntent.objects.create(
+            order=order, payment_method=method, created_by=user, reference=reference,
+            amount=order.grand_total, qr_payload=gateway.qr_payload(reference, order.grand_total),
+            expires_at=now + TTL)
+
+
+def confirm_intent(reference, status, amount, ref_no='', card_last4=''):
+    """
+    Proses callback gateway. Callback ulang (gateway retry) untuk intent yang
+    sudah selesai dikembalikan apa adanya. PaymentIntent.DoesNotExist kalau
+    reference tidak dikenal; ValidationError kalau nominal/status tidak cocok.
+    Kalau total order berubah sejak QR dibuat (item ditambah), intent ditandai
+    EXPIRED dan pembayaran ditolak sebagai kasus refund.
+    """
+    order_id = PaymentIntent.objects.values_list('order_id', flat=True).get(reference=reference)
+    total_changed = False
+    with transaction.atomic():
+        # kunci order dulu lalu intent (urutan sama dengan cancel_order), jadi
+        # callback dan pembatalan order tidak bisa saling mendahului
+        order = Order.objects.select_for_update().get(pk=order_id)
+        intent = (PaymentIntent.objects.select_for_update()
+                  .select_related('payment_method', 'created_by')
+                  .get(reference=reference))
+        intent.order = order
+        if intent.status != PaymentIntent.STATUS_PENDING:
+            if intent.status == PaymentIntent.STATUS_EXPIRED and status == PaymentIntent.STATUS_PAID:
+                raise ValidationError({'status': ["Intent sudah kedaluwarsa, dana harus dikembalikan."]})
+            return intent
+
+        now = timezone.now()
+        if status != PaymentIntent.STATUS_PAID:
+            intent.status = PaymentIntent.STATUS_FAILED
+            intent.completed_at = now
+            intent.save(update_fields=['status', 'completed_at'])
+            _notify_on_commit(reference)
+            return intent
+
+        try:
+            paid = Decimal(str(amount))
+        except (InvalidOperation, TypeError):
+            paid = None
+        if paid != intent.amount:
+            raise ValidationError({'amount': [f"Nominal {amount} tidak sama dengan {intent.amount}."]})
+        if order.grand_total != intent.amount:
+            # disimpan (tidak di-rollback) supaya layar QR berhenti menunggu
+            intent.status = PaymentIntent.STATUS_EXPIRED
+            intent.completed_at = now
+            intent.save(update_fields=['status', 'completed_at'])
+            _notify_on_commit(reference)
+            total_changed = True
+        else:
+            payment = Payment(order=order, payment_method=intent.payment_method, amount_paid=paid,
+                              ref_no=ref_no or None, card_last4=card_last4 or None)
+            payment.save()
+            finalize_paid_order(order, payment, intent.created_by)
+
+            intent.status = PaymentIntent.STATUS_PAID
+            intent.ref_no = ref_no or ''
+            intent.completed_at = now
+            intent.save(update_fields=['status', 'ref_no', 'completed_at'])
+            _notify_on_commit(reference)
+    if total_changed:
+        raise ValidationError({'amount': [f"Total order {order.order_no} berubah menjadi {order.grand_total}, "
+                                          "dana harus dikembalikan."]})
+    return intent
+
+
+def expire_for_order(order, now=None):
+    """
+    Intent PENDING milik order (mis. order dibatalkan) ditandai EXPIRED; layar
+    QR yang sedang menunggu dibangunkan setelah commit. Callback PAID yang
+    datang belakangan ditolak sebagai kasus refund.
+    """
+    now = now or timezone.now()
+    pending = PaymentIntent.objects.filter(order=order, status=PaymentIntent.STATUS_PENDING)
+    refs = list(pending.values_list('reference', flat=True))
+    if not refs:
+        return 0
+    updated = pending.update(status=PaymentIntent.STATUS_EXPIRED, completed_at=now)
+    for reference in refs:
+        _notify_on_commit(reference)
+    return updated
+
+
+async def _snapshot(reference):
+    return await (PaymentIntent.objects.filter(reference=reference)
+                  .values('reference', 'status', 'order__order_no').afirst())
+
+
+async def wait_for_status(reference, timeout):
+    """
+    Status intent (dict reference/status/order__order_no, None kalau tidak
+    ada). Kalau masih PENDING, tunggu notifikasi sampai ``timeout`` detik tanpa
+    query; waiter didaftarkan sebelum status dibaca supaya tidak terlewat.
+    """
+    entry = waiters.add(reference)
+    try:
+        snapshot = await _snapshot(reference)
+        if snapshot is None or snapshot['status'] != PaymentIntent.STATUS_PENDING:
+            return snapshot
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return snapshot
+        return await _snapshot(reference)
+    finally:
+        waiters.discard(reference, entry)
+
+
+def expire_intents(now=None, batch_size=1000):
+    """Tandai intent PENDING yang lewat expires_at sebagai EXPIRED (per batch)."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        refs = list(PaymentIntent.objects
+                    .filter(status=PaymentIntent.STATUS_PENDING, expires_at__lte=now)
+                    .order_by('expires_at').values_list('reference', flat=True)[:batch_size])
+        if not refs:
+            return total
+        with transaction.atomic():
+            total += PaymentIntent.objects.filter(
+                reference__in=refs, status=PaymentIntent.STATUS_PENDING,
+            ).update(status=PaymentIntent.STATUS_EXPIRED, completed_at=now)
+            for reference in refs:
+                _notify_on_commit(reference)
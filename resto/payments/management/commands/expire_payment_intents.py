@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from payments import intents
+
+
+class Command(BaseCommand):
+    help = ("Tandai PaymentIntent PENDING yang lewat masa berlaku sebagai EXPIRED; "
+            "layar kasir yang menunggu langsung diberi tahu. Jadwalkan via cron, mis. tiap menit.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size=1000, **opts):
+        expired = intents.expire_intents(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{expired} intent kedaluwarsa."))
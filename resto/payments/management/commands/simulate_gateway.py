@@ -0,0 +1,173 @@
+import asyncio
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.models import MenuItem
+from orders.models import Order, OrderItem
+from payments import gateway, intents
+from payments import registry as payment_registry
+from payments.models import PaymentIntent
+from resto import loadtest
+from resto.bench import throwaway_database
+
+
+class Command(BaseCommand):
+    help = ("Simulator gateway QRIS lokal. Dengan --url: kirim callback bertanda tangan "
+            "untuk intent PENDING di database ke server yang sedang berjalan. Tanpa --url: "
+            "load test offline di database sementara; --intents layar kasir long-poll "
+            "bersamaan lewat handler ASGI in-process sementara gateway mengirim callback.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='base URL server, mis. http://127.0.0.1:8000')
+        parser.add_argument('--reference', action='append', default=[],
+                            help='hanya intent ini (boleh berulang; mode --url)')
+        parser.add_argument('--intents', type=int, default=1000, help='jumlah intent (load test)')
+        parser.add_argument('--concurrency', type=int, default=50, help='callback bersamaan')
+        parser.add_argument('--max-delay', type=float, default=2.0,
+                            help='jeda acak maksimum (detik) sebelum pelanggan "membayar"')
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='porsi callback FAILED')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts['seed'])
+        if opts['url']:
+            return self.send_pending(opts, rng)
+
+        setup_test_environment()   # ALLOWED_HOSTS 'testserver' untuk AsyncClient
+        try:
+            with throwaway_database():
+                user, refs = self.seed(opts['intents'], rng)
+                result = asyncio.run(self.simulate(user, refs, opts, rng))
+        finally:
+            teardown_test_environment()
+        self.report(result)
+
+    # ---------- mode server ----------
+    def _outcome(self, rng, fail_rate):
+        return PaymentIntent.STATUS_FAILED if rng.random() < fail_rate else PaymentIntent.STATUS_PAID
+
+    def send_pending(self, opts, rng):
+        pending = PaymentIntent.objects.filter(status=PaymentIntent.STATUS_PENDING,
+                                               expires_at__gt=timezone.now())
+        if opts['reference']:
+            pending = pending.filter(reference__in=opts['reference'])
+        rows = list(pending.values_list('reference', 'amount'))
+        if not rows:
+            raise CommandError("Tidak ada intent PENDING.")
+        url = opts['url'].rstrip('/') + reverse('payment_gateway_callback')
+
+        def send(row):
+            body = gateway.callback_body(row[0], row[1], status=self._outcome(rng, opts['fail_rate']),
+                                         ref_no=f"SIM{rng.randrange(10**6):06d}")
+            req = urllib.request.Request(url, data=body, method='POST', headers={
+                'Content-Type': 'application/json', gateway.SIGNATURE_HEADER: gateway.sign(body)})
+            try:
+                with urllib.request.urlopen(req, timeout=30) as res:
+                    return res.status
+            except urllib.error.HTTPError as exc:
+                return exc.code
+            except urllib.error.URLError:
+                return 'error'
+
+        with ThreadPoolExecutor(max_workers=opts['concurrency']) as pool:
+            statuses = list(pool.map(send, rows))
+        for status in sorted(set(statuses), key=str):
+            self.stdout.write(f"HTTP {status}: {statuses.count(status)}")
+
+    # ---------- mode load test ----------
+    def seed(self, n, rng):
+        item_ids, _ = loadtest.seed_catalog(2, 20, rng, code_prefix='S')
+        user = get_user_model().objects.create_user(username='kasir_sim', password='sim', is_staff=True)
+        prices = dict(MenuItem.objects.filter(pk__in=item_ids).values_list('pk', 'price'))
+        orders = []
+        lines = []
+        for i in range(n):
+            order = Order(user=user, order_no=f'SIM-{i:06d}', status=Order.STATUS_PLACED)
+            picked = rng.sample(item_ids, 2)
+            order.set_totals(sum(prices[pk] for pk in picked))
+            orders.append(order)
+            lines.append(picked)
+        Order.objects.bulk_create(orders, batch_size=500)
+        by_no = dict(Order.objects.filter(order_no__startswith='SIM-').values_list('order_no', 'pk'))
+        OrderItem.objects.bulk_create([
+            OrderItem(order_id=by_no[o.order_no], menu_item_id=pk, qty=1,
+                      price=prices[pk], line_total=prices[pk])
+            for o, picked in zip(orders, lines) for pk in picked
+        ], batch_size=1000)
+        qris = next(m for m in payment_registry.methods() if m.code == 'QRIS')
+        refs = []
+        for order in Order.objects.filter(pk__in=by_no.values()).order_by('pk'):
+            intent = intents.create_intent(order, qris, user)
+            refs.append((intent.reference, intent.amount))
+        return user, refs
+
+    async def simulate(self, user, refs, opts, rng):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        sent_at = {}
+        woke = []
+        callbacks = []
+        statuses = {}
+        peak = 0
+        sem = asyncio.Semaphore(opts['concurrency'])
+
+        async def screen(reference):
+            # layar kasir: long-poll sampai status bukan PENDING lagi
+            url = reverse('payment_intent_status', args=[reference])
+            while True:
+                res = await client.get(url, {'wait': 1})
+                status = res.json()['status']
+                if status != PaymentIntent.STATUS_PENDING:
+                    woke.append(time.perf_counter() - sent_at[reference])
+                    statuses[status] = statuses.get(status, 0) + 1
+                    return
+
+        async def pay(reference, amount):
+            await asyncio.sleep(rng.uniform(0, opts['max_delay']))
+            body = gateway.callback_body(reference, amount, status=self._outcome(rng, opts['fail_rate']),
+                                         ref_no=f"SIM{rng.randrange(10**6):06d}")
+            async with sem:
+                sent_at[reference] = start = time.perf_counter()
+                res = await client.post(reverse('payment_gateway_callback'), body,
+                                        content_type='application/json',
+                                        headers={gateway.SIGNATURE_HEADER: gateway.sign(body)})
+                callbacks.append((time.perf_counter() - start, res.status_code))
+
+        async def watch_waiters():
+            nonlocal peak
+            while True:
+                peak = max(peak, len(intents.waiters))
+                await asyncio.sleep(0.05)
+
+        watcher = asyncio.create_task(watch_waiters())
+        started = time.perf_counter()
+        screens = [asyncio.create_task(screen(ref)) for ref, _ in refs]
+        await asyncio.sleep(0.2)   # semua layar sudah menunggu sebelum callback pertama
+        await asyncio.gather(*(pay(ref, amount) for ref, amount in refs))
+        await asyncio.gather(*screens)
+        elapsed = time.perf_counter() - started
+        watcher.cancel()
+        return {'elapsed': elapsed, 'intents': len(refs), 'peak_waiting': peak,
+                'statuses': statuses, 'callbacks': callbacks, 'woke': woke}
+
+    def report(self, result):
+        cb = sorted(c[0] * 1000 for c in result['callbacks'])
+        woke = sorted(w * 1000 for w in result['woke'])
+        errors = sum(1 for c in result['callbacks'] if c[1] != 200)
+        self.stdout.write(f"{result['intents']} intent dalam {result['elapsed']:.2f} detik, "
+                          f"puncak {result['peak_waiting']} layar menunggu bersamaan")
+        self.stdout.write(f"status akhir: {result['statuses']}, callback gagal (non-200): {errors}")
+        for label, values in (('callback', cb), ('callback -> layar', woke)):
+            self.stdout.write(f"{label:<18} p50 {loadtest.percentile(values, 50):8.2f} ms  "
+                              f"p95 {loadtest.percentile(values, 95):8.2f} ms  "
+                              f"p99 {loadtest.percentile(values, 99):8.2f} ms")
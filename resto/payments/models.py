@@ -1,6 +1,7 @@
 from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
+from django.conf import settings
 from django.db import models
 from orders.models import Order
 
@@ -62,25 +63,72 @@ class Payment(models.Model):
     def __str__(self):
         return f"Payment #{self.pk} - {self.payment_method.code} - {self.amount_paid}"
 
-    # Validasi logika bisnis: field khusus kartu wajib hanya jika method= CARD
+    # Validasi logika bisnis per metode ada di handler (payments.registry)
     def clean(self):
         super().clean()
-        method_code = (self.payment_method.code if self.payment_method_id else "").upper()
-
-        if method_code == "CARD":
-            # Wajib ada ref_no dan card_last4
-            if not self.ref_no:
-                raise ValidationError({"ref_no": "Wajib diisi untuk pembayaran kartu."})
-            if not self.card_last4:
-                raise ValidationError({"card_last4": "Wajib diisi untuk pembayaran kartu."})
-        elif method_code == "CASH":
-            # Untuk tunai, pastikan field kartu tidak diisi
-            if self.ref_no:
-                raise ValidationError({"ref_no": "Untuk tunai, ref_no harus kosong."})
-            if self.card_last4:
-                raise ValidationError({"card_last4": "Untuk tunai, card_last4 harus kosong."})
-
-    # Opsional: jaga-jaga kalau disave tanpa full_clean() dari form/admin
+        from .registry import handler_for
+        handler_for(self.payment_method.code if self.payment_method_id else "").validate(self)
+
+    def clean_fields(self, exclude=None):
+        # FK yang sudah berupa instance tersimpan (order dari view, metode dari
+        # registry) tidak perlu dicek keberadaannya lagi ke database
+        exclude = set(exclude or ())
+        for name in ("order", "payment_method"):
+            field = self._meta.get_field(name)
+            if field.is_cached(self) and getattr(self, name).pk is not None:
+                exclude.add(name)
+        super().clean_fields(exclude=exclude)
+
+    def full_clean(self, *args, **kwargs):
+        super().full_clean(*args, **kwargs)
+        self._validated = True
+
+    # Jaga-jaga kalau disave tanpa full_clean() dari form/admin; yang sudah
+    # divalidasi tidak divalidasi dua kali
     def save(self, *args, **kwargs):
-        self.full_clean()
+        if not getattr(self, "_validated", False):
+            self.full_clean()
+        self._validated = False
         return super().save(*args, **kwargs)
+
+
+class PaymentIntent(models.Model):
+    """
+    Pembayaran lewat gateway (QRIS/EDC) yang menunggu konfirmasi. Dibuat saat
+    kasir memilih metode gateway, QR ditampilkan, lalu callback gateway
+    membuat Payment dan memfinalisasi order (lihat payments.intents).
+    """
+    STATUS_PENDING = "PENDING"
+    STATUS_PAID = "PAID"
+    STATUS_FAILED = "FAILED"
+    STATUS_EXPIRED = "EXPIRED"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Menunggu"),
+        (STATUS_PAID, "Lunas"),
+        (STATUS_FAILED, "Gagal"),
+        (STATUS_EXPIRED, "Kedaluwarsa"),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="payment_intents")
+    payment_method = models.ForeignKey(PaymentMethod, on_delete=models.PROTECT, related_name="+")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+")
+    # token yang dikirim ke gateway dan kembali di callback
+    reference = models.CharField(max_length=32, unique=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    qr_payload = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    ref_no = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # expire_payment_intents & cari intent PENDING per order
+            models.Index(fields=["status", "expires_at"], name="payintent_status_exp_idx"),
+            models.Index(fields=["order", "status"], name="payintent_order_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.reference} ({self.status})"
@@ -0,0 +1,151 @@
+"""
+Registry PaymentMethod di memori proses + handler per metode.
+
+Tabel PaymentMethod kecil dan hampir tidak pernah berubah, tapi dibaca di
+setiap GET/POST checkout. Isinya dimuat sekali per proses dan ditandai dengan
+nomor versi di cache bersama; setiap save/delete PaymentMethod (signal) mem-bump
+versi sehingga semua worker memuat ulang pada request berikutnya. Biaya per
+request tinggal satu ``cache.get`` versi, tanpa query.
+
+Validasi khusus tiap metode (mis. kartu wajib ref_no & 4 digit terakhir) ada di
+kelas handler, bukan if/elif di model. Metode baru cukup menambah subclass
+``PaymentHandler`` dan ``register()``; ``gateway = True`` membuat checkout
+memakai alur PaymentIntent (payments.intents).
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import PaymentMethod
+
+VERSION_KEY = 'payments:methods:version'
+DEFAULT_METHODS = [("CASH", "Cash"), ("CARD", "Kartu"), ("QRIS", "QRIS")]
+
+
+# ---------- handler ----------
+class PaymentHandler:
+    """Handler dasar: tanpa aturan tambahan."""
+    code = None
+    # True: dibayar lewat gateway (PaymentIntent + callback), bukan langsung di form kasir
+    gateway = False
+
+    def validate(self, payment):
+        """Raise ValidationError (dict per field) kalau data Payment tidak cocok dengan metodenya."""
+
+
+class CashHandler(PaymentHandler):
+    code = "CASH"
+
+    def validate(self, payment):
+        # Untuk tunai, pastikan field kartu tidak diisi
+        if payment.ref_no:
+            raise ValidationError({"ref_no": "Untuk tunai, ref_no harus kosong."})
+        if payment.card_last4:
+            raise ValidationError({"card_last4": "Untuk tunai, card_last4 harus kosong."})
+
+
+class CardHandler(PaymentHandler):
+    code = "CARD"
+
+    def validate(self, payment):
+        # Wajib ada ref_no (approval code EDC) dan card_last4
+        if not payment.ref_no:
+            raise ValidationError({"ref_no": "Wajib diisi untuk pembayaran kartu."})
+        if not payment.card_last4:
+            raise ValidationError({"card_last4": "Wajib diisi untuk pembayaran kartu."})
+
+
+class QrisHandler(PaymentHandler):
+    code = "QRIS"
+    gateway = True
+
+    def validate(self, payment):
+        if payment.card_last4:
+            raise ValidationError({"card_last4": "Untuk QRIS, card_last4 harus kosong."})
+
+
+_handlers = {}
+_default_handler = PaymentHandler()
+
+
+def register(handler_class):
+    _handlers[handler_class.code] = handler_class()
+    return handler_class
+
+
+for _cls in (CashHandler, CardHandler, QrisHandler):
+    register(_cls)
+
+
+def handler_for(code):
+    return _handlers.get((code or "").upper(), _default_handler)
+
+
+# ---------- registry ----------
+_lock = threading.Lock()
+_state = {'version': None, 'methods': [], 'by_id': {}}
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _now_us(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    version = max(_now_us(), (cache.get(VERSION_KEY) or 0) + 1)
+    cache.set(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def invalidate():
+    """Bump sekarang dan setelah commit (sama seperti catalog.menu_cache)."""
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def ensure_defaults():
+    """Buat metode pembayaran default jika tabel masih kosong."""
+    if PaymentMethod.objects.exists():
+        return False
+    PaymentMethod.objects.bulk_create([PaymentMethod(code=code, name=name)
+                                       for code, name in DEFAULT_METHODS])
+    invalidate()   # bulk_create tidak memicu signal
+    return True
+
+
+def _load():
+    version = get_version()
+    if _state['version'] == version:
+        return _state
+    with _lock:
+        if _state['version'] != version:
+            methods = list(PaymentMethod.objects.order_by('name'))
+            if not methods and ensure_defaults():
+                version = get_version()
+                methods = list(PaymentMethod.objects.order_by('name'))
+            _state.update(version=version, methods=methods,
+                          by_id={m.pk: m for m in methods})
+    return _state
+
+
+def methods():
+    """Semua PaymentMethod (urut nama); default dibuat kalau tabel kosong."""
+    return _load()['methods']
+
+
+def get(method_id):
+    """PaymentMethod dengan id ini, atau None (id tidak dikenal/bukan angka)."""
+    try:
+        return _load()['by_id'].get(int(method_id))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import registry
+from .models import PaymentMethod
+
+
+@receiver([post_save, post_delete], sender=PaymentMethod)
+def invalidate_registry(sender, **kwargs):
+    registry.invalidate()
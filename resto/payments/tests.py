@@ -1,3 +1,220 @@
+import asyncio
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.models import Category, MenuItem
+from orders.models import Order
+from orders.services import add_items, cancel_order, finalize_paid_order
+from reports.models import DailySales
+
+from . import gateway, intents, registry
+from .models import Payment, PaymentIntent, PaymentMethod
+
+
+class PaymentRegistryTests(TestCase):
+    """
+    Menguji registry metode pembayaran & handler:
+    - metode dimuat sekali per versi, berikutnya tanpa query
+    - perubahan PaymentMethod langsung terlihat (signal mem-bump versi)
+    - default dibuat kalau tabel kosong
+    - validasi per metode oleh handler (kartu wajib ref_no/card_last4, tunai tanpa field kartu)
+    """
+    def setUp(self):
+        self.cash = PaymentMethod.objects.create(code="CASH", name="Tunai")
+        self.card = PaymentMethod.objects.create(code="CARD", name="Kartu")
+
+    def test_cached_and_invalidated(self):
+        registry.methods()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(registry.get(self.card.id).code, "CARD")
+            self.assertIsNone(registry.get("abc"))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        self.card.name = "Kartu Debit"
+        self.card.save()
+        self.assertEqual(registry.get(self.card.id).name, "Kartu Debit")
+
+    def test_defaults_created_when_empty(self):
+        PaymentMethod.objects.all().delete()
+        self.assertEqual({m.code for m in registry.methods()}, {"CASH", "CARD", "QRIS"})
+
+    def test_handlers(self):
+        order = Order.objects.create(user=User.objects.create_user("kasir"), order_no="T0001")
+        with self.assertRaisesMessage(ValidationError, "Wajib diisi"):
+            Payment(order=order, payment_method=self.card, ref_no="A1").full_clean()
+        with self.assertRaisesMessage(ValidationError, "harus kosong"):
+            Payment(order=order, payment_method=self.cash, card_last4="1234").full_clean()
+        Payment(order=order, payment_method=self.card, ref_no="A1", card_last4="1234").full_clean()
+
+
+class CheckoutValidationTests(TestCase):
+    """
+    Menguji POST checkout:
+    - Payment divalidasi sekali, tanpa query ulang ke tabel metode pembayaran
+      maupun cek keberadaan order
+    - order yang sudah dibatalkan tidak bisa dibayar tunai/kartu
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123", is_staff=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                                   price=Decimal("20000"), stock_qty=10)
+        self.cash = PaymentMethod.objects.create(code="CASH", name="Tunai")
+        self.order = Order.objects.create(user=self.user, order_no="T0001")
+        add_items(self.order, [(nasi.id, 2)])
+        self.client.force_login(self.user)
+
+    def test_single_validation_no_method_lookup(self):
+        registry.methods()
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(reverse("pos_checkout", args=["T0001"]),
+                                   {"payment_method_id": self.cash.id})
+        self.assertEqual(res.status_code, 302)
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        self.assertFalse([s for s in sqls if "payments_paymentmethod" in s])
+        # validate_unique order (OneToOne) cukup sekali
+        self.assertEqual(len([s for s in sqls if s.startswith("SELECT") and 'FROM "payments_payment"' in s]), 1)
+        self.assertEqual(Payment.objects.get().payment_method_id, self.cash.id)
+
+    def test_cancelled_order_cannot_be_paid(self):
+        cancel_order(self.order)
+        res = self.client.post(reverse("pos_checkout", args=["T0001"]), {"payment_method_id": self.cash.id})
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "tidak bisa dibayar")
+        self.assertFalse(Payment.objects.exists())
+        self.order.refresh_from_db()
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.order.status, Order.STATUS_CANCELLED)
+        self.assertEqual(self.nasi.stock_qty, 10)
+        self.assertFalse(DailySales.objects.exists())
+
+        # pemanggil lain yang melewati view juga ditolak finalize_paid_order
+        payment = Payment(order=self.order, payment_method=self.cash, amount_paid=self.order.grand_total)
+        with self.assertRaises(ValidationError):
+            finalize_paid_order(self.order, payment, self.user)
+
+
+class PaymentIntentTests(TestCase):
+    """
+    Menguji alur pembayaran gateway (QRIS):
+    - checkout QRIS membuat intent PENDING + QR, belum ada Payment
+    - callback bertanda tangan memfinalisasi order sekali (callback ulang aman)
+    - tanda tangan/nominal salah ditolak
+    - long-poll status bangun saat intent dinotifikasi, intent lewat masa berlaku jadi EXPIRED
+    - order dibatalkan: intent ikut EXPIRED, callback PAID ditolak tanpa efek ke order/stok
+    - total order berubah setelah QR dibuat: intent EXPIRED, callback ditolak
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username="kasir", password="pass123", is_staff=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=10)
+        self.qris = PaymentMethod.objects.create(code="QRIS", name="QRIS")
+        self.order = Order.objects.create(user=self.user, order_no="T0001")
+        add_items(self.order, [(self.nasi.id, 2)])
+        self.order.refresh_from_db()
+        self.client.force_login(self.user)
+
+    def _callback(self, intent, amount=None, status="PAID", signature=None):
+        body = gateway.callback_body(intent.reference, amount or intent.amount, status=status, ref_no="RRN1")
+        return self.client.post(reverse("payment_gateway_callback"), body, content_type="application/json",
+                                headers={gateway.SIGNATURE_HEADER: signature or gateway.sign(body)})
+
+    def test_checkout_creates_intent(self):
+        res = self.client.post(reverse("pos_checkout", args=["T0001"]), {"payment_method_id": self.qris.id})
+        intent = PaymentIntent.objects.get()
+        self.assertRedirects(res, reverse("payment_intent", args=[intent.reference]))
+        self.assertEqual(intent.amount, self.order.grand_total)
+        self.assertIn(intent.reference, intent.qr_payload)
+        self.assertEqual(gateway.crc16(intent.qr_payload[:-4]), intent.qr_payload[-4:])
+        self.assertFalse(Payment.objects.exists())
+        self.assertContains(self.client.get(res.url), "qr-payload")
+
+    def test_cancelled_order_rejects_callback(self):
+        intent = intents.create_intent(self.order, self.qris, self.user)
+        with mock.patch.object(intents.waiters, "notify") as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                cancel_order(self.order)
+        notify.assert_called_once_with(intent.reference)
+        intent.refresh_from_db()
+        self.assertEqual(intent.status, PaymentIntent.STATUS_EXPIRED)
+
+        # intent lain yang masih PENDING untuk order yang sudah batal juga ditolak
+        other = PaymentIntent.objects.create(
+            order=self.order, payment_method=self.qris, created_by=self.user, reference="r2",
+            amount=intent.amount, qr_payload="", expires_at=intent.expires_at)
+        for pending in (intent, other):
+            self.assertEqual(self._callback(pending).status_code, 409)
+
+        self.order.refresh_from_db()
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.order.status, Order.STATUS_CANCELLED)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(self.nasi.stock_qty, 10)
+        self.assertFalse(DailySales.objects.exists())
+
+    def test_items_added_after_intent_rejects_callback(self):
+        intent = intents.create_intent(self.order, self.qris, self.user)
+        add_items(self.order, [(self.nasi.id, 1)])
+        res = self._callback(intent)
+        self.assertEqual(res.status_code, 409)
+        self.assertIn("berubah", str(res.json()))
+        intent.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(intent.status, PaymentIntent.STATUS_EXPIRED)
+        self.assertEqual(self.order.status, Order.STATUS_DRAFT)
+        self.assertFalse(Payment.objects.exists())
+
+        # intent baru memakai total terbaru dan bisa dibayar
+        fresh = intents.create_intent(self.order, self.qris, self.user)
+        self.assertEqual(fresh.amount, self.order.grand_total)
+        self.assertEqual(self._callback(fresh).json()["status"], "PAID")
+
+    def test_callback_finalizes_once(self):
+        intent = intents.create_intent(self.order, self.qris, self.user)
+        self.assertEqual(self._callback(intent, signature="salah").status_code, 403)
+        self.assertEqual(self._callback(intent, amount=Decimal("1")).status_code, 409)
+
+        res = self._callback(intent)
+        self.assertEqual(res.json()["status"], "PAID")
+        self.assertEqual(self._callback(intent).status_code, 200)   # gateway retry
+
+        self.order.refresh_from_db()
+        self.nasi.refresh_from_db()
+        self.assertEqual(self.order.status, Order.STATUS_PAID)
+        self.assertEqual(self.nasi.stock_qty, 8)
+        payment = Payment.objects.get()
+        self.assertEqual((payment.payment_method_id, payment.ref_no), (self.qris.id, "RRN1"))
+
+    async def test_long_poll_wakes_on_notify(self):
+        intent = await PaymentIntent.objects.acreate(
+            order=self.order, payment_method=self.qris, created_by=self.user, reference="ref1",
+            amount=Decimal("44000"), expires_at=timezone.now() + datetime.timedelta(minutes=5))
+        waiting = asyncio.ensure_future(intents.wait_for_status(intent.reference, timeout=5))
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(intents.waiters), 1)
+        await PaymentIntent.objects.filter(pk=intent.pk).aupdate(status=PaymentIntent.STATUS_PAID)
+        intents.waiters.notify(intent.reference)
+        snapshot = await asyncio.wait_for(waiting, timeout=1)
+        self.assertEqual(snapshot["status"], "PAID")
+        self.assertEqual(len(intents.waiters), 0)
+
+        await self.async_client.aforce_login(self.user)
+        res = await self.async_client.get(reverse("payment_intent_status", args=["ref1"]), {"wait": 1})
+        self.assertEqual(res.json()["receipt_url"], reverse("order_receipt", args=["T0001"]))
 
-# Create your tests here.
+    def test_expire(self):
+        intent = intents.create_intent(self.order, self.qris, self.user)
+        self.assertEqual(intents.expire_intents(now=intent.expires_at), 1)
+        intent.refresh_from_db()
+        self.assertEqual(intent.status, PaymentIntent.STATUS_EXPIRED)
+        self.assertEqual(self._callback(intent).status_code, 409)
@@ -0,0 +1,9 @@
+from django.urls import path
+from payments import views as v
+
+urlpatterns = [
+    # Pembayaran gateway (QRIS/EDC): layar QR, long-poll status (ASGI), callback gateway
+    path('pos/pay/<str:reference>/', v.payment_intent_page, name='payment_intent'),
+    path('payments/intents/<str:reference>/status/', v.payment_intent_status, name='payment_intent_status'),
+    path('payments/gateway/callback/', v.payment_gateway_callback, name='payment_gateway_callback'),
+]
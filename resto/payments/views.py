@@ -1,3 +1,75 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.http import HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from . import gateway, intents
+from .models import PaymentIntent
+
+# lama long-poll status (detik); klien langsung memanggil ulang setelahnya
+STATUS_WAIT = getattr(settings, 'PAYMENT_INTENT_WAIT', 25)
+
+
+def _intent_json(snapshot):
+    data = {'reference': snapshot['reference'], 'status': snapshot['status'],
+            'order_no': snapshot['order__order_no']}
+    if snapshot['status'] == PaymentIntent.STATUS_PAID:
+        data['receipt_url'] = reverse('order_receipt', args=[snapshot['order__order_no']])
+    return data
+
+
+@login_required
+def payment_intent_page(request, reference):
+    """Layar QR untuk pelanggan; berpindah ke struk begitu gateway mengonfirmasi."""
+    if not request.user.is_staff:
+        return redirect('dashboard')
+    intent = get_object_or_404(PaymentIntent.objects.select_related('order', 'payment_method'),
+                               reference=reference)
+    if intent.status == PaymentIntent.STATUS_PAID:
+        return redirect('order_receipt', order_no=intent.order.order_no)
+    return render(request, 'payments/intent.html', {'intent': intent, 'order': intent.order})
+
+
+async def payment_intent_status(request, reference):
+    """
+    Status intent dalam JSON. ``?wait=1``: long-poll sampai status berubah atau
+    PAYMENT_INTENT_WAIT detik. Dilayani server ASGI (resto.asgi), jadi ribuan
+    layar yang menunggu tidak memakan worker.
+    """
+    user = await request.auser()
+    if not user.is_authenticated or not user.is_staff:
+        return HttpResponseForbidden()
+    timeout = STATUS_WAIT if request.GET.get('wait') else 0
+    snapshot = await intents.wait_for_status(reference, timeout)
+    if snapshot is None:
+        return JsonResponse({'error': 'Intent tidak ditemukan.'}, status=404)
+    return JsonResponse(_intent_json(snapshot))
+
+
+@csrf_exempt
+@require_POST
+def payment_gateway_callback(request):
+    """Callback gateway (JSON bertanda tangan HMAC, lihat payments.gateway)."""
+    if not gateway.verify(request.body, request.headers.get(gateway.SIGNATURE_HEADER)):
+        return JsonResponse({'error': 'Tanda tangan tidak valid.'}, status=403)
+    try:
+        data = json.loads(request.body)
+        reference = data['reference']
+        status = data['status']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Body tidak valid.'}, status=400)
+    try:
+        intent = intents.confirm_intent(reference, status, data.get('amount'),
+                                        ref_no=data.get('ref_no') or '',
+                                        card_last4=data.get('card_last4') or '')
+    except PaymentIntent.DoesNotExist:
+        return JsonResponse({'error': 'Reference tidak dikenal.'}, status=404)
+    except ValidationError as ve:
+        return JsonResponse({'error': ve.message_dict}, status=409)
+    return JsonResponse({'reference': intent.reference, 'status': intent.status})
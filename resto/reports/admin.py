@@ -1,3 +1,21 @@
 from django.contrib import admin
+from .models import DailySales, Shift, ZReport
 
-# Register your models here.
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ('day','outlet','menu_item','payment_method','cashier','qty','revenue')
+    list_filter = ('outlet','payment_method')
+    date_hierarchy = 'day'
+
+@admin.register(Shift)
+class ShiftAdmin(admin.ModelAdmin):
+    list_display = ('id','cashier','opened_at','closed_at','opening_cash')
+    list_filter = ('cashier',)
+    date_hierarchy = 'opened_at'
+
+@admin.register(ZReport)
+class ZReportAdmin(admin.ModelAdmin):
+    list_display = ('id','cashier','opened_at','closed_at','order_count','grand_total','cash_variance')
+    list_filter = ('cashier',)
+    date_hierarchy = 'closed_at'
+    readonly_fields = [f.name for f in ZReport._meta.fields]
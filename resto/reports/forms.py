@@ -0,0 +1,44 @@
+from django import forms
+
+from . import queries
+
+
+class ShiftOpenForm(forms.Form):
+    opening_cash = forms.DecimalField(label="Modal awal laci", min_value=0, max_digits=12,
+                                      decimal_places=2, initial=0)
+
+
+class ShiftCloseForm(forms.Form):
+    counted_cash = forms.DecimalField(label="Uang tunai di laci (hasil hitung)", min_value=0,
+                                      max_digits=12, decimal_places=2)
+
+
+class ReportFilterForm(forms.Form):
+    """Filter wajib laporan: rentang tanggal (inklusif), outlet, dan periode."""
+    KIND_CHOICES = [('day', 'Harian'), ('week', 'Mingguan'), ('month', 'Bulanan')]
+
+    since = forms.DateField(label="Dari", widget=forms.DateInput(
+        attrs={'type': 'date', 'class': 'form-control form-control-sm'}))
+    until = forms.DateField(label="Sampai", widget=forms.DateInput(
+        attrs={'type': 'date', 'class': 'form-control form-control-sm'}))
+    outlet = forms.CharField(label="Outlet", max_length=10, widget=forms.TextInput(
+        attrs={'class': 'form-control form-control-sm', 'size': 6}))
+    kind = forms.ChoiceField(label="Periode", choices=KIND_CHOICES, widget=forms.Select(
+        attrs={'class': 'form-select form-select-sm'}))
+
+    def clean_outlet(self):
+        return self.cleaned_data['outlet'].strip().upper()
+
+    def clean(self):
+        cleaned = super().clean()
+        since, until = cleaned.get('since'), cleaned.get('until')
+        if since and until:
+            if since > until:
+                raise forms.ValidationError("Tanggal awal tidak boleh setelah tanggal akhir.")
+            if (until - since).days + 1 > queries.MAX_DAYS:
+                raise forms.ValidationError(f"Rentang laporan maksimal {queries.MAX_DAYS} hari.")
+        return cleaned
+
+    def report_range(self):
+        data = self.cleaned_data
+        return queries.ReportRange(data['since'], data['until'], data['outlet'])
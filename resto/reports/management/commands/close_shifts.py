@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from reports import shifts
+from reports.models import Shift
+
+
+class Command(BaseCommand):
+    help = ("Tutup semua shift kasir yang masih terbuka dan bekukan Z-report-nya "
+            "(tanpa hitung kas). Jadwalkan via cron di akhir hari.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cashier', help='hanya shift kasir ini (username)')
+
+    def handle(self, *args, cashier=None, **opts):
+        open_shifts = Shift.objects.filter(closed_at__isnull=True).select_related('cashier')
+        if cashier:
+            open_shifts = open_shifts.filter(cashier__username=cashier)
+        closed = 0
+        for shift in open_shifts:
+            report = shifts.close_shift(shift)
+            closed += 1
+            self.stdout.write(f"{shift.cashier.get_username()}: {report.order_count} order, "
+                              f"Rp {report.grand_total}")
+        self.stdout.write(self.style.SUCCESS(f"{closed} shift ditutup."))
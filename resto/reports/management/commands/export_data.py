@@ -0,0 +1,44 @@
+import datetime
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports import exports
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Format tanggal harus YYYY-MM-DD: {value}")
+
+
+class Command(BaseCommand):
+    help = ("Export order (dengan item & payment) atau ledger StockMovement ke CSV/XLSX. "
+            "Data dibaca per chunk dan ditulis bertahap, memori tetap konstan.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--since', type=_parse_date, help='hari pertama (YYYY-MM-DD)')
+        parser.add_argument('--until', type=_parse_date, help='hari terakhir, inklusif (YYYY-MM-DD)')
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--output', help="file tujuan ('-' untuk stdout; default nama otomatis)")
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, dataset, since=None, until=None, format='csv', output=None,
+               chunk_size=exports.DEFAULT_CHUNK_SIZE, **opts):
+        stream = exports.export_stream(dataset, format, since, until, chunk_size=chunk_size)
+        if output == '-':
+            out = sys.stdout.buffer
+            for part in stream:
+                out.write(part)
+            out.flush()
+            return
+
+        path = output or exports.export_filename(dataset, format, since, until)
+        size = 0
+        with open(path, 'wb') as fh:
+            for part in stream:
+                fh.write(part)
+                size += len(part)
+        self.stdout.write(self.style.SUCCESS(f"Export {dataset} ({format}) -> {path} ({size} bytes)"))
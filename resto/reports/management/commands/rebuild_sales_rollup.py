@@ -0,0 +1,92 @@
+import datetime
+from decimal import Decimal
+from itertools import groupby
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from reports.models import DailySales
+from reports.rollup import allocate_revenue, with_order_count
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Format tanggal harus YYYY-MM-DD: {value}")
+
+
+class Command(BaseCommand):
+    help = ("Bangun ulang / backfill tabel rollup DailySales dari Order PAID. "
+            "Tanpa --since/--until seluruh histori dihitung ulang.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=_parse_date, help='hari pertama (YYYY-MM-DD)')
+        parser.add_argument('--until', type=_parse_date, help='hari terakhir, inklusif (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def _day_bounds(self, since, until):
+        tz = timezone.get_current_timezone()
+        start = end = None
+        if since:
+            start = datetime.datetime.combine(since, datetime.time.min, tzinfo=tz)
+        if until:
+            end = datetime.datetime.combine(until + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+        return start, end
+
+    def handle(self, *args, since=None, until=None, chunk_size=2000, **opts):
+        start, end = self._day_bounds(since, until)
+
+        items = OrderItem.objects.filter(order__status=Order.STATUS_PAID,
+                                         order__placed_at__isnull=False)
+        rollup = DailySales.objects.all()
+        if start:
+            items = items.filter(order__placed_at__gte=start)
+            rollup = rollup.filter(day__gte=since)
+        if end:
+            items = items.filter(order__placed_at__lt=end)
+            rollup = rollup.filter(day__lte=until)
+
+        rows = (items.order_by('order_id')
+                .values_list('order_id', 'order__placed_at', 'order__outlet', 'order__user_id',
+                             'order__payment__payment_method_id', 'order__grand_total',
+                             'menu_item_id', 'qty', 'line_total')
+                .iterator(chunk_size=chunk_size))
+
+        # Akumulasi di memori per kunci rollup (jumlah kunci jauh lebih kecil dari jumlah order)
+        acc = {}
+        orders = skipped = 0
+        for order_id, group in groupby(rows, key=lambda r: r[0]):
+            group = list(group)
+            _, placed_at, outlet, cashier_id, method_id, grand_total = group[0][:6]
+            if method_id is None:
+                skipped += 1
+                continue
+            orders += 1
+            day = timezone.localdate(placed_at)
+            per_item = {}
+            for *_, menu_item_id, qty, line_total in group:
+                q, s = per_item.get(menu_item_id, (0, Decimal('0')))
+                per_item[menu_item_id] = (q + qty, s + line_total)
+            lines = [(mid, q, s) for mid, (q, s) in sorted(per_item.items())]
+            for menu_item_id, qty, subtotal, revenue, count in with_order_count(
+                    allocate_revenue(grand_total, lines)):
+                key = (outlet, day, menu_item_id, method_id, cashier_id)
+                q, s, r, n = acc.get(key, (0, Decimal('0'), Decimal('0'), 0))
+                acc[key] = (q + qty, s + subtotal, r + revenue, n + count)
+
+        with transaction.atomic():
+            deleted, _ = rollup.delete()
+            DailySales.objects.bulk_create(
+                (DailySales(outlet=outlet, day=day, menu_item_id=mid, payment_method_id=pmid,
+                            cashier_id=uid, qty=q, subtotal=s, revenue=r, order_count=n)
+                 for (outlet, day, mid, pmid, uid), (q, s, r, n) in acc.items()),
+                batch_size=chunk_size,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollup dibangun ulang: {orders} order, {len(acc)} baris "
+            f"(hapus {deleted} baris lama, lewati {skipped} order tanpa payment)."
+        ))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opened_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('opening_cash', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cashier', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shifts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-opened_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ZReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opened_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(db_index=True)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('grand_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('void_count', models.PositiveIntegerField(default=0)),
+                ('void_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('opening_cash', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cash_sales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expected_cash', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('counted_cash', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('cash_variance', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('payments', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('items', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cashier', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('shift', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, related_name='zreport', to='reports.shift')),
+            ],
+            options={
+                'verbose_name': 'Z-Report',
+                'verbose_name_plural': 'Z-Reports',
+                'ordering': ['-closed_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shift',
+            constraint=models.UniqueConstraint(condition=models.Q(('closed_at__isnull', True)), fields=('cashier',), name='uniq_open_shift_per_cashier'),
+        ),
+    ]
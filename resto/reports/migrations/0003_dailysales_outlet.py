@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+import orders.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_stockreservation'),
+        ('orders', '0008_order_outlet'),
+        ('payments', '0002_paymentintent'),
+        ('reports', '0002_shift_zreport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailysales',
+            name='uniq_dailysales_key',
+        ),
+        # backfill: baris lama berasal dari order yang outlet-nya diisi default yang
+        # sama (orders 0008). Histori multi-outlet: jalankan rebuild_sales_rollup.
+        migrations.AddField(
+            model_name='dailysales',
+            name='outlet',
+            field=models.CharField(default=orders.models.default_outlet, max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysales',
+            constraint=models.UniqueConstraint(fields=('outlet', 'day', 'menu_item', 'payment_method', 'cashier'), name='uniq_dailysales_key'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_dailysales_outlet'),
+    ]
+
+    # baris rollup lama berisi 0: isi ulang dengan ``manage.py rebuild_sales_rollup``
+    operations = [
+        migrations.AddField(
+            model_name='dailysales',
+            name='order_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
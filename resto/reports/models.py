@@ -1,3 +1,99 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+from orders.models import default_outlet
+
+
+class DailySales(models.Model):
+    """
+    Rollup penjualan harian per (outlet, hari, menu, metode bayar, kasir).
+    Diisi bertahap saat pembayaran sukses (reports.rollup.record_sale) dan
+    bisa dibangun ulang lewat ``manage.py rebuild_sales_rollup``.
+    """
+    outlet = models.CharField(max_length=10, default=default_outlet)
+    day = models.DateField()
+    menu_item = models.ForeignKey('catalog.MenuItem', on_delete=models.PROTECT, related_name='+')
+    payment_method = models.ForeignKey('payments.PaymentMethod', on_delete=models.PROTECT, related_name='+')
+    cashier = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='+')
+    qty = models.IntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # porsi grand_total order (termasuk pajak/diskon) yang jatuh ke menu ini
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # tiap order dihitung sekali, di barisnya dengan menu_item_id terkecil: Sum benar untuk
+    # pengelompokan yang memuat semua baris order (periode, metode bayar), tidak untuk per menu
+    order_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Daily Sales"
+        verbose_name_plural = "Daily Sales"
+        constraints = [
+            # outlet + day di depan: juga dipakai laporan (reports.queries) untuk rentang tanggal per outlet
+            models.UniqueConstraint(
+                fields=['outlet', 'day', 'menu_item', 'payment_method', 'cashier'],
+                name='uniq_dailysales_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.menu_item_id} x{self.qty}"
+
+
+class Shift(models.Model):
+    """Shift kasir: dibuka dengan modal laci, ditutup dengan hitung kas -> ZReport."""
+    cashier = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='shifts')
+    opened_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+    opening_cash = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-opened_at']
+        constraints = [
+            # paling banyak satu shift terbuka per kasir
+            models.UniqueConstraint(fields=['cashier'], condition=models.Q(closed_at__isnull=True),
+                                    name='uniq_open_shift_per_cashier'),
+        ]
+
+    def __str__(self):
+        return f"Shift {self.cashier_id} {self.opened_at:%Y-%m-%d %H:%M}"
+
+    @property
+    def is_open(self):
+        return self.closed_at is None
+
+
+class ZReport(models.Model):
+    """
+    Snapshot tutup shift (Z-report). Semua angka dibekukan saat shift ditutup
+    (reports.shifts.close_shift); melihat/mencetak ulang hanya membaca baris ini.
+    """
+    shift = models.OneToOneField(Shift, on_delete=models.PROTECT, related_name='zreport')
+    cashier = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='+')
+    opened_at = models.DateTimeField()
+    closed_at = models.DateTimeField(db_index=True)
+    order_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    grand_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    void_count = models.PositiveIntegerField(default=0)
+    void_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    opening_cash = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cash_sales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expected_cash = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    counted_cash = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    cash_variance = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    # [{code, name, count, amount}] per metode bayar
+    payments = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    # [{menu_item_id, name, qty, amount}] stok terjual, urut qty terbanyak
+    items = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Z-Report"
+        verbose_name_plural = "Z-Reports"
+        ordering = ['-closed_at']
+
+    def __str__(self):
+        return f"Z {self.cashier_id} {self.closed_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,73 @@
+"""
+Laporan penjualan per rentang tanggal dan outlet dari rollup DailySales.
+
+- Tidak ada scan Order/OrderItem/Payment: rollup sudah diisi saat checkout
+  (reports.rollup.record_sale) dan dibangun ulang lewat
+  ``manage.py rebuild_sales_rollup``.
+- Rentang tanggal dan outlet selalu wajib (``ReportRange``); kunci unik
+  rollup diawali (outlet, day), jadi setiap query hanya membaca potongan
+  index itu, bukan seluruh histori.
+- Pengelompokan memakai fungsi Trunc bawaan Django (portabel SQLite/MySQL/
+  PostgreSQL) atas kolom ``day`` yang sudah berupa tanggal lokal.
+- Hasil berupa queryset agregat yang dipaginasi di view.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailySales
+
+TRUNC = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+# rentang terpanjang satu laporan (hari)
+MAX_DAYS = getattr(settings, 'REPORT_MAX_DAYS', 366)
+
+
+class ReportRange:
+    """Tanggal awal & akhir (inklusif, lokal) dan outlet."""
+    def __init__(self, since, until, outlet):
+        self.since = since
+        self.until = until
+        self.outlet = outlet
+
+    @classmethod
+    def last_days(cls, days, outlet, today=None):
+        today = today or timezone.localdate()
+        return cls(today - datetime.timedelta(days=days - 1), today, outlet)
+
+
+def rollup_rows(rng):
+    return DailySales.objects.filter(outlet=rng.outlet, day__gte=rng.since, day__lte=rng.until)
+
+
+def sales_by_period(rng, kind='month'):
+    """Jumlah order, qty terjual, subtotal, dan omzet (termasuk pajak/diskon) per periode, terbaru dulu."""
+    return (rollup_rows(rng)
+            .annotate(period=TRUNC[kind]('day'))
+            .values('period')
+            .annotate(orders=Sum('order_count'), qty=Sum('qty'), subtotal=Sum('subtotal'),
+                      revenue=Sum('revenue'))
+            .order_by('-period'))
+
+
+def top_items(rng, kind='week'):
+    """Qty & omzet per menu per periode, terlaris dulu di setiap periode."""
+    return (rollup_rows(rng)
+            .annotate(period=TRUNC[kind]('day'))
+            .values('period', 'menu_item_id', 'menu_item__name')
+            .annotate(qty=Sum('qty'), amount=Sum('revenue'))
+            .order_by('-period', '-qty', 'menu_item__name'))
+
+
+def payments_by_method(rng, kind='day'):
+    """
+    Jumlah transaksi & nominal diterima per metode bayar per periode
+    (jumlah revenue = grand_total order).
+    """
+    return (rollup_rows(rng)
+            .annotate(period=TRUNC[kind]('day'))
+            .values('period', 'payment_method__code', 'payment_method__name')
+            .annotate(count=Sum('order_count'), amount=Sum('revenue'))
+            .order_by('-period', 'payment_method__name'))
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from .models import DailySales
+
+CENT = Decimal('0.01')
+
+
+def allocate_revenue(grand_total, lines):
+    """
+    Bagi grand_total order ke tiap baris proporsional terhadap subtotal baris.
+    ``lines`` = list (key, qty, subtotal). Sisa pembulatan masuk ke baris
+    terakhir supaya jumlahnya persis sama dengan grand_total.
+    Mengembalikan list (key, qty, subtotal, revenue).
+    """
+    total = sum((sub for _, _, sub in lines), Decimal('0'))
+    out = []
+    allocated = Decimal('0')
+    for idx, (key, qty, sub) in enumerate(lines):
+        if idx == len(lines) - 1:
+            rev = grand_total - allocated
+        elif total:
+            rev = (grand_total * sub / total).quantize(CENT)
+        else:
+            rev = Decimal('0')
+        allocated += rev
+        out.append((key, qty, sub, rev))
+    return out
+
+
+def with_order_count(lines):
+    """
+    Tambahkan hitungan order ke hasil ``allocate_revenue`` (urut menu_item_id):
+    1 di baris pertama, 0 di baris lain, supaya satu order terhitung sekali.
+    """
+    return [(*line, int(idx == 0)) for idx, line in enumerate(lines)]
+
+
+def _upsert(base, lines):
+    """
+    Tambahkan ``lines`` = list (menu_item_id, qty, subtotal, revenue, order_count) ke rollup
+    dengan kunci ``base`` (outlet, day, payment_method_id, cashier_id) dalam dua query
+    berapa pun jumlah barisnya: INSERT baris nol yang belum ada (konflik
+    diabaikan, aman bila checkout lain membuatnya bersamaan), lalu satu UPDATE
+    increment dengan CASE per menu.
+    """
+    DailySales.objects.bulk_create(
+        [DailySales(menu_item_id=mid, **base) for mid, *_ in lines], ignore_conflicts=True,
+    )
+
+    def per_item(pos, field):
+        return Case(*[When(menu_item_id=line[0], then=Value(line[pos])) for line in lines],
+                    output_field=field)
+
+    DailySales.objects.filter(menu_item_id__in=[line[0] for line in lines], **base).update(
+        qty=F('qty') + per_item(1, IntegerField()),
+        subtotal=F('subtotal') + per_item(2, DecimalField(max_digits=14, decimal_places=2)),
+        revenue=F('revenue') + per_item(3, DecimalField(max_digits=14, decimal_places=2)),
+        order_count=F('order_count') + per_item(4, IntegerField()),
+        updated_at=timezone.now(),
+    )
+
+
+def record_sale(order, payment):
+    """
+    Tambahkan order PAID ke rollup harian. Dipanggil di transaksi yang sama
+    dengan pembuatan Payment, jadi ikut rollback kalau checkout gagal.
+    """
+    rows = (order.items.values('menu_item_id')
+            .annotate(qty=Sum('qty'), subtotal=Sum('line_total'))
+            .order_by('menu_item_id'))
+    lines = [(r['menu_item_id'], r['qty'], r['subtotal']) for r in rows]
+    if not lines:
+        return
+
+    base = dict(outlet=order.outlet, day=timezone.localdate(order.placed_at),
+                payment_method_id=payment.payment_method_id, cashier_id=order.user_id)
+    _upsert(base, with_order_count(allocate_revenue(order.grand_total, lines)))
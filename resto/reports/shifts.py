@@ -0,0 +1,149 @@
+"""
+Shift kasir dan Z-report (tutup kasir).
+
+- ``open_shift``: satu shift terbuka per kasir (dijaga constraint unik).
+- ``shift_totals``: semua angka shift dalam dua query agregat. Query order
+  mengelompokkan order PAID (per metode bayar) dan order batal (void)
+  sekaligus lewat index (user, status, placed_at); query kedua menjumlah item
+  terjual per menu.
+- ``close_shift``: hitung totals sampai waktu tutup, bekukan ke ZReport.
+  Setelah itu Z-report lama cukup dibaca dari satu baris, tanpa menyentuh
+  Order/Payment lagi, untuk dilihat maupun dicetak (ESC/POS).
+
+Order masuk ke shift berdasarkan kasir yang membuat order (Order.user) dan
+waktu bayar (placed_at); order batal berdasarkan waktu dibatalkan (updated_at).
+"""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from orders import receipts
+from orders.receipts import cols, escpos_text, money
+from orders.models import Order, OrderItem
+from .models import Shift, ZReport
+
+ZERO = Decimal('0.00')
+CASH_CODE = 'CASH'
+
+
+def current_shift(cashier):
+    return Shift.objects.filter(cashier=cashier, closed_at__isnull=True).first()
+
+
+def open_shift(cashier, opening_cash=ZERO):
+    try:
+        with transaction.atomic():
+            return Shift.objects.create(cashier=cashier, opened_at=timezone.now(),
+                                        opening_cash=opening_cash or ZERO)
+    except IntegrityError:
+        raise ValidationError({'shift': ["Masih ada shift yang terbuka untuk kasir ini."]})
+
+
+def shift_totals(cashier, start, end):
+    """Angka Z-report kasir untuk rentang [start, end)."""
+    window = (Q(status=Order.STATUS_PAID, placed_at__gte=start, placed_at__lt=end)
+              | Q(status=Order.STATUS_CANCELLED, updated_at__gte=start, updated_at__lt=end))
+    rows = (Order.objects.filter(window, user=cashier)
+            .values('status', 'payment__payment_method__code', 'payment__payment_method__name')
+            .annotate(orders=Count('id'), subtotal=Sum('subtotal'), tax=Sum('tax_amount'),
+                      discount=Sum('discount_amount'), total=Sum('grand_total'),
+                      paid=Sum('payment__amount_paid'))
+            .order_by('payment__payment_method__name'))
+
+    totals = dict(order_count=0, subtotal=ZERO, tax_amount=ZERO, discount_amount=ZERO,
+                  grand_total=ZERO, void_count=0, void_total=ZERO, cash_sales=ZERO, payments=[])
+    for r in rows:
+        if r['status'] == Order.STATUS_CANCELLED:
+            totals['void_count'] += r['orders']
+            totals['void_total'] += r['total'] or ZERO
+            continue
+        totals['order_count'] += r['orders']
+        totals['subtotal'] += r['subtotal'] or ZERO
+        totals['tax_amount'] += r['tax'] or ZERO
+        totals['discount_amount'] += r['discount'] or ZERO
+        totals['grand_total'] += r['total'] or ZERO
+        code = r['payment__payment_method__code'] or ''
+        amount = r['paid'] or ZERO
+        totals['payments'].append({'code': code, 'name': r['payment__payment_method__name'] or '-',
+                                   'count': r['orders'], 'amount': amount})
+        if code.upper() == CASH_CODE:
+            totals['cash_sales'] += amount
+
+    totals['items'] = [
+        {'menu_item_id': r['menu_item_id'], 'name': r['menu_item__name'], 'qty': r['qty'], 'amount': r['amount']}
+        for r in (OrderItem.objects
+                  .filter(order__user=cashier, order__status=Order.STATUS_PAID,
+                          order__placed_at__gte=start, order__placed_at__lt=end)
+                  .values('menu_item_id', 'menu_item__name')
+                  .annotate(qty=Sum('qty'), amount=Sum('line_total'))
+                  .order_by('-qty', 'menu_item__name'))
+    ]
+    return totals
+
+
+def close_shift(shift, counted_cash=None, now=None):
+    """Tutup shift dan simpan ZReport-nya. Shift yang sudah ditutup ditolak."""
+    with transaction.atomic():
+        shift = Shift.objects.select_for_update().get(pk=shift.pk)
+        if not shift.is_open:
+            raise ValidationError({'shift': ["Shift ini sudah ditutup."]})
+        shift.closed_at = now or timezone.now()
+        totals = shift_totals(shift.cashier_id, shift.opened_at, shift.closed_at)
+        expected = shift.opening_cash + totals['cash_sales']
+        report = ZReport.objects.create(
+            shift=shift, cashier_id=shift.cashier_id, opened_at=shift.opened_at,
+            closed_at=shift.closed_at, opening_cash=shift.opening_cash, expected_cash=expected,
+            counted_cash=counted_cash,
+            cash_variance=None if counted_cash is None else counted_cash - expected,
+            **totals,
+        )
+        shift.save(update_fields=['closed_at'])
+    return report
+
+
+def render_escpos(report, width=None):
+    """Z-report untuk printer thermal (format sama dengan struk order)."""
+    width = width or receipts.ESCPOS_COLUMNS
+    rule = '-' * width
+    out = [receipts.INIT, receipts.ALIGN_CENTER, receipts.BOLD_ON, receipts.DOUBLE_ON,
+           b'Z-REPORT\n', receipts.DOUBLE_OFF, receipts.BOLD_OFF,
+           escpos_text(receipts.SHOP['name']), b'\n', receipts.ALIGN_LEFT]
+
+    def line(text=''):
+        out.extend([escpos_text(text), b'\n'])
+
+    def fmt(dt):
+        return timezone.localtime(dt).strftime('%d %b %Y %H:%M')
+
+    line(rule)
+    line(cols('Kasir', report.cashier.get_username(), width))
+    line(cols('Buka', fmt(report.opened_at), width))
+    line(cols('Tutup', fmt(report.closed_at), width))
+    line(rule)
+    line(cols('Order lunas', report.order_count, width))
+    line(cols('Subtotal', money(report.subtotal), width))
+    line(cols('PPN', money(report.tax_amount), width))
+    if report.discount_amount:
+        line(cols('Diskon', '-' + money(report.discount_amount), width))
+    out.append(receipts.BOLD_ON)
+    line(cols('Grand Total', money(report.grand_total), width))
+    out.append(receipts.BOLD_OFF)
+    line(cols(f'Void ({report.void_count})', money(report.void_total), width))
+    line(rule)
+    for p in report.payments:
+        line(cols(f"{p['name']} ({p['count']})", money(Decimal(p['amount'])), width))
+    line(rule)
+    line(cols('Modal awal', money(report.opening_cash), width))
+    line(cols('Penjualan tunai', money(report.cash_sales), width))
+    line(cols('Kas seharusnya', money(report.expected_cash), width))
+    if report.counted_cash is not None:
+        line(cols('Kas dihitung', money(report.counted_cash), width))
+        line(cols('Selisih', money(report.cash_variance), width))
+    line(rule)
+    for item in report.items:
+        line(cols(f"{item['qty']} x {item['name']}", money(Decimal(item['amount'])), width))
+    out.append(receipts.FEED_CUT)
+    return b''.join(out)
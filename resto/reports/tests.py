@@ -1,3 +1,281 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.models import Category, MenuItem
+from orders.models import Order, OrderItem
+from orders.numbering import outlet_code
+from orders.services import cancel_order
+from payments.models import PaymentMethod
+from reports import exports, queries, shifts
+from reports.models import DailySales, Shift, ZReport
+from reports.rollup import record_sale
+from resto.testing import QueryBudgetMixin
+
+
+class PaidOrderTestCase(TestCase):
+    """Data dasar: staff login, dua menu, metode CASH, helper order lunas lewat POS."""
+    def setUp(self):
+        self.client = Client()
+        self.staff = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        cat = Category.objects.create(name="Masakan", code="MAIN")
+        self.nasi = MenuItem.objects.create(category=cat, name="Nasi Goreng",
+                                            price=Decimal("20000"), stock_qty=20)
+        self.teh = MenuItem.objects.create(category=cat, name="Es Teh",
+                                           price=Decimal("5000"), stock_qty=50)
+        self.cash = PaymentMethod.objects.create(code="CASH", name="Tunai")
+        self.client.login(username="admin", password="pass123")
+
+    def _paid_order(self, no, lines, **fields):
+        order = Order.objects.create(user=self.staff, order_no=no, **fields)
+        for item, qty in lines:
+            OrderItem.objects.create(order=order, menu_item=item, qty=qty, price=item.price)
+        order.recalc_totals()
+        res = self.client.post(reverse("pos_checkout", args=[no]), {"payment_method_id": self.cash.id})
+        self.assertEqual(res.status_code, 302)
+        return order
+
+
+class SalesRollupTests(PaidOrderTestCase):
+    """
+    Menguji rollup penjualan harian:
+    - Checkout POS langsung menambah baris DailySales
+    - rebuild_sales_rollup menghasilkan angka yang sama
+    - record_sale memakai jumlah query tetap berapa pun jumlah barisnya
+    - Laporan penjualan & item terlaris menampilkan order yang lunas
+    """
+    def _snapshot(self):
+        return sorted(DailySales.objects.values_list("menu_item_id", "qty", "subtotal", "revenue"))
+
+    def test_checkout_updates_rollup_and_rebuild_matches(self):
+        self._paid_order("A1", [(self.nasi, 2), (self.teh, 1)])
+        self._paid_order("A2", [(self.nasi, 1)])
+
+        live = self._snapshot()
+        self.assertEqual(live, [
+            (self.nasi.id, 3, Decimal("60000.00"), Decimal("66000.00")),
+            (self.teh.id, 1, Decimal("5000.00"), Decimal("5500.00")),
+        ])
+
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        self.assertEqual(self._snapshot(), live)
+
+    def test_record_sale_query_count_is_flat(self):
+        order = self._paid_order("S1", [(self.nasi, 2), (self.teh, 1)])
+        order.refresh_from_db()
+        payment = order.payment
+        # agregat item + INSERT baris nol + satu UPDATE increment
+        with self.assertNumQueries(3):
+            record_sale(order, payment)
+        self.assertEqual(self._snapshot(), [
+            (self.nasi.id, 4, Decimal("80000.00"), Decimal("88000.00")),
+            (self.teh.id, 2, Decimal("10000.00"), Decimal("11000.00")),
+        ])
+
+    def test_reports_read_rollup(self):
+        self._paid_order("B1", [(self.nasi, 1)])
+        res = self.client.get(reverse("sales_monthly"))
+        self.assertContains(res, "22000")
+        # angka laporan berasal dari baris rollup, bukan dari Order
+        DailySales.objects.update(revenue=Decimal("12345"))
+        res = self.client.get(reverse("sales_monthly"))
+        self.assertContains(res, "12345")
+        self.assertNotContains(res, "22000")
+        res = self.client.get(reverse("top_items_weekly"))
+        self.assertContains(res, "Nasi Goreng")
+        self.assertContains(res, "-W")
+
+
+class ReportQueryTests(PaidOrderTestCase):
+    """
+    Menguji laporan per rentang tanggal & outlet:
+    - Filter outlet dan rentang tanggal membatasi hasil
+    - Tanggal terbalik / rentang terlalu panjang ditolak form
+    - Query plan memakai kunci rollup (outlet, day, ...), bukan scan seluruh tabel
+    - Hasil dipaginasi
+    """
+    def setUp(self):
+        super().setUp()
+        self._paid_order("R1", [(self.nasi, 1)])
+        self._paid_order("R2", [(self.nasi, 2), (self.teh, 1)], outlet="LAIN")
+        today = timezone.localdate()
+        self.rng = queries.ReportRange(today, today, outlet_code())
+
+    def test_outlet_and_range_filter(self):
+        rows = list(queries.sales_by_period(self.rng, 'day'))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['orders'], rows[0]['qty']), (1, 1))
+        self.assertEqual(rows[0]['revenue'], Decimal("22000"))
+        items = {r['menu_item__name']: r['qty'] for r in queries.top_items(self.rng, 'month')}
+        self.assertEqual(items, {"Nasi Goreng": 1})
+        paid = list(queries.payments_by_method(self.rng))
+        self.assertEqual([(r['payment_method__code'], r['count'], r['amount']) for r in paid],
+                         [("CASH", 1, Decimal("22000"))])
+        # order dua menu tetap dihitung satu order
+        lain = queries.ReportRange(self.rng.since, self.rng.until, "LAIN")
+        self.assertEqual([(r['orders'], r['qty']) for r in queries.sales_by_period(lain, 'day')], [(1, 3)])
+
+        yesterday = self.rng.since - datetime.timedelta(days=1)
+        old = queries.ReportRange(yesterday, yesterday, outlet_code())
+        self.assertFalse(queries.sales_by_period(old).exists())
+
+        res = self.client.get(reverse("sales_monthly"), {"outlet": "lain", "kind": "day"})
+        self.assertContains(res, "49500")
+        self.assertNotContains(res, "22000")
+
+        # rebuild mempertahankan outlet di kunci rollup
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        self.assertEqual(sorted(DailySales.objects.values_list("outlet", "menu_item_id", "qty", "order_count")),
+                         sorted([(outlet_code(), self.nasi.id, 1, 1), ("LAIN", self.nasi.id, 2, 1),
+                                 ("LAIN", self.teh.id, 1, 0)]))
+
+    def test_invalid_range_rejected(self):
+        today = timezone.localdate()
+        res = self.client.get(reverse("payments_by_method"),
+                              {"since": today.isoformat(), "until": (today - datetime.timedelta(days=1)).isoformat()})
+        self.assertContains(res, "Tanggal awal tidak boleh")
+        self.assertIsNone(res.context["page"])
+        res = self.client.get(reverse("payments_by_method"),
+                              {"since": "2020-01-01", "until": today.isoformat()})
+        self.assertContains(res, "maksimal")
+
+    def test_query_plans_use_rollup_key(self):
+        # SQLite menamai index UNIQUE yang ditulis di CREATE TABLE sqlite_autoindex_<tabel>_N
+        names = ("uniq_dailysales_key", "sqlite_autoindex_reports_dailysales")
+        for qs in (queries.sales_by_period(self.rng), queries.top_items(self.rng),
+                   queries.payments_by_method(self.rng)):
+            plan = qs.explain()
+            self.assertTrue(any(name in plan for name in names), plan)
+
+    @override_settings(REPORT_PAGE_SIZE=1)
+    def test_paginated(self):
+        self._paid_order("P1", [(self.teh, 1)])
+        DailySales.objects.filter(menu_item=self.teh, outlet=outlet_code()).update(
+            day=self.rng.since - datetime.timedelta(days=3))
+        res = self.client.get(reverse("sales_monthly"), {"kind": "day"})
+        self.assertEqual(res.context["page"].paginator.num_pages, 2)
+        self.assertContains(res, "?kind=day&page=2")
+
+
+class ExportTests(PaidOrderTestCase):
+    """
+    Menguji export streaming:
+    - CSV order: satu baris per item, kolom payment terisi
+    - XLSX: zip valid, baris lanjut ke sheet berikutnya saat melewati batas
+    - command export_data menulis file ledger stok
+    """
+    def test_orders_csv_streams_rows(self):
+        self._paid_order("C1", [(self.nasi, 2), (self.teh, 1)])
+        res = self.client.get(reverse("export_orders"), {"format": "csv"})
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        self.assertIn("attachment;", res["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(b"".join(res.streaming_content).decode("utf-8"))))
+        self.assertEqual(rows[0], exports.ORDER_HEADER)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({r[0] for r in rows[1:]}, {"C1"})
+        self.assertEqual({r[10] for r in rows[1:]}, {"CASH"})
+
+    def test_orders_small_chunks_cover_everything(self):
+        for i in range(5):
+            self._paid_order(f"D{i}", [(self.teh, 1)])
+        rows = list(exports.order_rows(chunk_size=2))
+        self.assertEqual(sorted(r[0] for r in rows), [f"D{i}" for i in range(5)])
+
+    def test_xlsx_is_valid_zip_with_sheet_rollover(self):
+        data = b"".join(exports.xlsx_stream(["a", "b"], ([i, f"x<{i}>"] for i in range(5)), max_rows=3))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            names = zf.namelist()
+            self.assertIn("xl/workbook.xml", names)
+            self.assertIn("xl/worksheets/sheet3.xml", names)
+            sheet1 = zf.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn("x&lt;0&gt;", sheet1)
+        self.assertIn('<c r="A2"><v>0</v></c>', sheet1)
+
+    def test_export_command_writes_movements(self):
+        self._paid_order("E1", [(self.nasi, 2)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "moves.csv")
+            call_command("export_data", "movements", output=path, stdout=StringIO())
+            with open(path, encoding="utf-8") as fh:
+                rows = list(csv.reader(fh))
+        self.assertEqual(rows[0], exports.MOVEMENT_HEADER)
+        self.assertEqual(rows[1][2:5], ["OUT", "2", "-2"])
+
+    def test_export_requires_staff(self):
+        self.client.logout()
+        res = self.client.get(reverse("export_stock_movements"))
+        self.assertEqual(res.status_code, 302)
+
+
+class ShiftTests(QueryBudgetMixin, PaidOrderTestCase):
+    """
+    Menguji shift kasir & Z-report:
+    - hanya order dalam shift yang dihitung (per metode bayar, void, item terjual)
+    - tutup shift memakai query dalam jumlah tetap dan membekukan ZReport
+    - Z-report lama dibaca tanpa menyentuh tabel order/payment
+    - satu shift terbuka per kasir
+    """
+    def test_close_shift_freezes_totals(self):
+        self._paid_order("B0", [(self.teh, 1)])             # sebelum shift dibuka
+        Order.objects.filter(order_no="B0").update(placed_at="2000-01-01T00:00:00Z")
+
+        res = self.client.post(reverse("shift_current"), {"opening_cash": "100000"})
+        self.assertRedirects(res, reverse("shift_current"))
+        card = PaymentMethod.objects.create(code="CARD", name="Kartu")
+        self._paid_order("B1", [(self.nasi, 2)])
+        order = Order.objects.create(user=self.staff, order_no="B2")
+        OrderItem.objects.create(order=order, menu_item=self.teh, qty=3, price=self.teh.price)
+        order.recalc_totals()
+        self.client.post(reverse("pos_checkout", args=["B2"]),
+                         {"payment_method_id": card.id, "ref_no": "A1", "card_last4": "1234"})
+        void = Order.objects.create(user=self.staff, order_no="B3", grand_total=Decimal("5500"))
+        cancel_order(void)
+
+        shift = shifts.current_shift(self.staff)
+        with self.assertMaxQueries(7):
+            report = shifts.close_shift(shift, counted_cash=Decimal("143000"))
+
+        self.assertEqual(report.order_count, 2)
+        self.assertEqual(report.grand_total, Decimal("60500.00"))
+        self.assertEqual((report.void_count, report.void_total), (1, Decimal("5500.00")))
+        self.assertEqual(report.cash_sales, Decimal("44000.00"))
+        self.assertEqual(report.expected_cash, Decimal("144000.00"))
+        self.assertEqual(report.cash_variance, Decimal("-1000.00"))
+        report.refresh_from_db()
+        self.assertEqual([(p["code"], p["count"]) for p in report.payments], [("CARD", 1), ("CASH", 1)])
+        self.assertEqual([(i["name"], i["qty"]) for i in report.items], [("Es Teh", 3), ("Nasi Goreng", 2)])
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("zreport_detail", args=[report.pk]))
+        self.assertContains(res, "Rp -1000.00")
+        touched = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn('"orders_order"', touched)
+        self.assertNotIn("payments_payment", touched)
+        res = self.client.get(reverse("zreport_escpos", args=[report.pk]))
+        self.assertIn(b"Z-REPORT", res.content)
+
+    def test_one_open_shift_per_cashier(self):
+        shift = shifts.open_shift(self.staff, Decimal("0"))
+        with self.assertRaises(ValidationError):
+            shifts.open_shift(self.staff)
+        shifts.close_shift(shift)
+        with self.assertRaises(ValidationError):
+            shifts.close_shift(shift)
+        call_command("close_shifts", stdout=StringIO())   # tidak ada yang terbuka lagi
+        self.assertEqual(Shift.objects.filter(closed_at__isnull=True).count(), 0)
+        self.assertEqual(ZReport.objects.count(), 1)
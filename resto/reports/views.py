@@ -1,24 +1,149 @@
-from django.contrib.auth.decorators import login_required
-from django.db.models import Sum
-from django.shortcuts import render
-from orders.models import Order, OrderItem
+import datetime
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from orders.numbering import outlet_code
+from . import exports, queries, shifts
+from .forms import ReportFilterForm, ShiftCloseForm, ShiftOpenForm
+from .models import ZReport
+
+staff_required = user_passes_test(lambda u: u.is_staff)
+
+
+def _report(request, template, build, days, kind):
+    """
+    Laporan dengan filter wajib (tanggal, outlet, periode). Parameter yang
+    tidak dikirim diisi default: ``days`` hari terakhir di outlet ini.
+    """
+    default = queries.ReportRange.last_days(days, outlet_code())
+    data = {'since': default.since, 'until': default.until, 'outlet': default.outlet, 'kind': kind}
+    data.update({k: v for k, v in request.GET.items() if k in data and v})
+    form = ReportFilterForm(data)
+    page = None
+    if form.is_valid():
+        qs = build(form.report_range(), form.cleaned_data['kind'])
+        page = Paginator(qs, getattr(settings, 'REPORT_PAGE_SIZE', 50)).get_page(request.GET.get('page'))
+    params = request.GET.copy()
+    params.pop('page', None)
+    return render(request, template, {'form': form, 'page': page, 'rows': page or [],
+                                      'query': params.urlencode()})
 
 
 @login_required
 def sales_monthly(request):
-    qs = (Order.objects.filter(status='PAID')
-    .extra(select={'ym': "DATE_FORMAT(placed_at,'%%Y-%%m')"})
-    .values('ym')
-    .annotate(revenue=Sum('grand_total'))
-    .order_by('-ym'))
-    return render(request, 'reports/sales_monthly.html', {'rows': qs})
+    """Omzet per periode (default bulanan, 12 bulan terakhir) dari rollup DailySales."""
+    return _report(request, 'reports/sales_monthly.html', queries.sales_by_period, 365, 'month')
 
 
 @login_required
 def top_items_weekly(request):
-    qs = (OrderItem.objects.filter(order__status='PAID')
-    .extra(select={'yw': "YEARWEEK(orders_order.placed_at,1)"})
-    .values('yw','menu_item__name')
-    .annotate(total_qty=Sum('qty'))
-    .order_by('-yw','-total_qty'))
-    return render(request, 'reports/top_items_weekly.html', {'rows': qs})
\ No newline at end of file
+    """Item terlaris per periode (default mingguan, 4 minggu terakhir)."""
+    return _report(request, 'reports/top_items_weekly.html', queries.top_items, 28, 'week')
+
+
+@login_required
+@staff_required
+def payments_by_method(request):
+    """Penerimaan per metode bayar per periode (default harian, 7 hari terakhir)."""
+    return _report(request, 'reports/payments_by_method.html', queries.payments_by_method, 7, 'day')
+
+
+def _export(request, dataset):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return HttpResponseBadRequest("format harus csv atau xlsx")
+    try:
+        since = datetime.date.fromisoformat(request.GET['since']) if request.GET.get('since') else None
+        until = datetime.date.fromisoformat(request.GET['until']) if request.GET.get('until') else None
+    except ValueError:
+        return HttpResponseBadRequest("Format tanggal harus YYYY-MM-DD")
+
+    content_type, _ = exports.FORMATS[fmt]
+    # streaming: baris dikirim sambil dibaca per chunk, tidak ditampung di memori
+    response = StreamingHttpResponse(exports.export_stream(dataset, fmt, since, until),
+                                     content_type=content_type)
+    filename = exports.export_filename(dataset, fmt, since, until)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+@staff_required
+def export_orders(request):
+    """Export order + item + payment (?since=&until=&format=csv|xlsx)."""
+    return _export(request, 'orders')
+
+
+@login_required
+@staff_required
+def export_stock_movements(request):
+    """Export ledger StockMovement (?since=&until=&format=csv|xlsx)."""
+    return _export(request, 'movements')
+
+
+@login_required
+@staff_required
+def shift_current(request):
+    """
+    Shift kasir yang sedang login: buka (modal laci) atau tutup (hitung kas).
+    Menutup shift membekukan Z-report lalu diarahkan ke halamannya.
+    """
+    shift = shifts.current_shift(request.user)
+    open_form = ShiftOpenForm(request.POST if request.method == 'POST' and not shift else None)
+    close_form = ShiftCloseForm(request.POST if request.method == 'POST' and shift else None)
+
+    if request.method == 'POST':
+        try:
+            if shift is None and open_form.is_valid():
+                shifts.open_shift(request.user, open_form.cleaned_data['opening_cash'])
+                messages.success(request, "Shift dibuka.")
+                return redirect('shift_current')
+            if shift is not None and close_form.is_valid():
+                report = shifts.close_shift(shift, close_form.cleaned_data['counted_cash'])
+                messages.success(request, "Shift ditutup.")
+                return redirect('zreport_detail', pk=report.pk)
+        except ValidationError as ve:
+            for msg in ve.messages:
+                messages.error(request, msg)
+            return redirect('shift_current')
+
+    # angka berjalan (belum dibekukan) untuk shift yang masih terbuka
+    totals = shifts.shift_totals(request.user, shift.opened_at, timezone.now()) if shift else None
+    return render(request, 'reports/shift.html', {
+        'shift': shift, 'totals': totals, 'open_form': open_form, 'close_form': close_form,
+    })
+
+
+def _zreports_for(user):
+    qs = ZReport.objects.select_related('cashier')
+    return qs if user.is_superuser else qs.filter(cashier=user)
+
+
+@login_required
+@staff_required
+def zreport_list(request):
+    reports = _zreports_for(request.user).defer('payments', 'items')[:100]
+    return render(request, 'reports/zreport_list.html', {'reports': reports})
+
+
+@login_required
+@staff_required
+def zreport_detail(request, pk):
+    """Z-report tersimpan (satu baris, tanpa hitung ulang dari order)."""
+    report = get_object_or_404(_zreports_for(request.user), pk=pk)
+    return render(request, 'reports/zreport_detail.html', {'report': report})
+
+
+@login_required
+@staff_required
+def zreport_escpos(request, pk):
+    report = get_object_or_404(_zreports_for(request.user), pk=pk)
+    response = HttpResponse(shifts.render_escpos(report), content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="z-{report.closed_at:%Y%m%d-%H%M}.bin"'
+    return response
@@ -0,0 +1,69 @@
+"""
+Utilitas kecil untuk benchmark (dipakai management command bench_*).
+
+Benchmark selalu jalan di database sementara (nama test DB), jadi aman
+dijalankan di mesin yang database utamanya berisi data asli.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def throwaway_database(alias=DEFAULT_DB_ALIAS, verbosity=0):
+    """
+    Buat database benchmark (seperti test runner), hapus lagi setelah selesai.
+    Untuk SQLite dipakai file sementara, bukan in-memory, supaya banyak
+    thread bisa menulis lewat koneksinya masing-masing.
+    """
+    conn = connections[alias]
+    tmpdir = None
+    if conn.vendor == 'sqlite':
+        tmpdir = tempfile.mkdtemp(prefix='resto-bench-')
+        conn.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+        # tunggu lock (bukan langsung "database is locked") dan ambil lock tulis
+        # di awal transaksi supaya thread tidak saling deadlock saat upgrade lock
+        options = conn.settings_dict.setdefault('OPTIONS', {})
+        options.setdefault('timeout', 30)
+        options.setdefault('transaction_mode', 'IMMEDIATE')
+    old_name = conn.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield conn
+    finally:
+        connections.close_all()
+        conn.creation.destroy_test_db(old_name, verbosity=verbosity)
+        if tmpdir:
+            try:
+                os.rmdir(tmpdir)
+            except OSError:
+                pass
+
+
+def run_threads(worker, n_threads):
+    """
+    Jalankan ``worker(thread_index)`` di n thread sekaligus (start bareng
+    lewat barrier). Mengembalikan (list hasil per thread, durasi detik).
+    """
+    barrier = threading.Barrier(n_threads + 1)
+    results = [None] * n_threads
+
+    def _target(i):
+        barrier.wait()
+        try:
+            results[i] = worker(i)
+        finally:
+            # setiap thread punya koneksi DB sendiri; tutup supaya tidak bocor
+            connections.close_all()
+
+    threads = [threading.Thread(target=_target, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - started
@@ -0,0 +1,185 @@
+"""
+Skenario load test in-process (dipakai ``manage.py loadtest``).
+
+Request dijalankan lewat django.test.Client di banyak thread terhadap
+database sementara (resto.bench.throwaway_database), jadi yang terukur adalah
+view + ORM + template + database, tanpa server HTTP.
+
+- kasir    : pos_create_order -> pos_add_item x k -> pos_checkout
+- pelanggan: public_menu (halaman, kategori, cari) -> cart_add -> cart_view
+
+Setiap request dicatat per endpoint (nama URL + method): latensi dan jumlah
+query. Ringkasan bisa disimpan sebagai JSON dan dibandingkan dengan hasil
+sebelumnya.
+"""
+import json
+import subprocess
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog import menu_cache, search
+from catalog.models import Category, MenuItem
+from payments import registry as payment_registry
+
+CATEGORY_NAMES = ['Nasi', 'Mie', 'Sate', 'Soto', 'Ayam', 'Ikan', 'Sayur', 'Gorengan',
+                  'Minuman', 'Jus', 'Kopi', 'Dessert', 'Sarapan', 'Paket', 'Camilan']
+DISHES = ['Goreng', 'Bakar', 'Rebus', 'Penyet', 'Rica', 'Balado', 'Kecap', 'Woku',
+          'Sambal Matah', 'Geprek', 'Kuah', 'Kremes', 'Asam Manis', 'Lada Hitam']
+VARIANTS = ['Spesial', 'Jumbo', 'Pedas', 'Original', 'Komplit', 'Mini', 'Keju', 'Telur']
+SEARCH_WORDS = ['goreng', 'sate', 'ayam', 'pedas', 'mie', 'kopi', 'bakar', 'jus', 'spesial']
+
+
+def seed_catalog(n_categories, n_items, rng, stock=100000, code_prefix='C'):
+    """Kategori + menu acak (bulk), indeks pencarian dibangun ulang sekali."""
+    categories = Category.objects.bulk_create([
+        Category(name=CATEGORY_NAMES[i % len(CATEGORY_NAMES)] + ('' if i < len(CATEGORY_NAMES) else f' {i}'),
+                 code=f'{code_prefix}{i:03d}')
+        for i in range(n_categories)
+    ])
+    # MySQL tidak mengembalikan pk dari bulk_create
+    categories = list(Category.objects.filter(code__in=[c.code for c in categories]).order_by('code'))
+    items = []
+    for i in range(n_items):
+        cat = categories[i % len(categories)]
+        name = f"{cat.name} {rng.choice(DISHES)} {rng.choice(VARIANTS)} #{i}"
+        items.append(MenuItem(category=cat, name=name, description=f"{name} khas dapur kami",
+                              price=Decimal(rng.randrange(5, 80) * 1000), stock_qty=stock))
+    MenuItem.objects.bulk_create(items, batch_size=500)
+    search.rebuild_index()
+    menu_cache.invalidate()
+    payment_registry.ensure_defaults()
+    return (list(MenuItem.objects.filter(category__in=categories).values_list('id', flat=True)),
+            [c.id for c in categories])
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}   # endpoint -> list of (detik, query, ok)
+
+    def add(self, endpoint, elapsed, queries, ok):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((elapsed, queries, ok))
+
+
+class TimedClient:
+    """Client yang mencatat setiap request ke Recorder."""
+    def __init__(self, recorder):
+        # error di view dijadikan response 500 (dicatat), bukan exception di thread
+        self.client = Client(raise_request_exception=False)
+        self.recorder = recorder
+
+    def request(self, method, path, data=None):
+        call = self.client.get if method == 'GET' else self.client.post
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = call(path, data or {})
+            elapsed = time.perf_counter() - start
+        match = response.resolver_match
+        endpoint = f"{method} {match.view_name if match else path}"
+        self.recorder.add(endpoint, elapsed, len(ctx.captured_queries), response.status_code < 400)
+        return response
+
+
+def cashier_session(tc, rng, item_ids, orders, items_per_order, cash_id):
+    for _ in range(orders):
+        res = tc.request('POST', reverse('pos_create_order'))
+        if res.status_code != 302:
+            continue
+        order_no = res.url.rstrip('/').split('/')[-2]
+        add_url = reverse('pos_add_item', args=[order_no])
+        for item_id in rng.sample(item_ids, items_per_order):
+            tc.request('POST', add_url, {'menu_item_id': item_id, 'qty': rng.randint(1, 3)})
+        tc.request('POST', reverse('pos_checkout', args=[order_no]), {'payment_method_id': cash_id})
+
+
+def customer_session(tc, rng, item_ids, category_ids, visits):
+    menu_url = reverse('catalog:public_menu')
+    for _ in range(visits):
+        roll = rng.random()
+        if roll < 0.2:
+            tc.request('GET', menu_url, {'q': rng.choice(SEARCH_WORDS)})
+        elif roll < 0.4:
+            tc.request('GET', menu_url, {'cat': rng.choice(category_ids)})
+        else:
+            tc.request('GET', menu_url)
+        if rng.random() < 0.5:
+            tc.request('POST', reverse('catalog:cart_add', args=[rng.choice(item_ids)]), {'qty': 1})
+            tc.request('GET', reverse('catalog:cart_view'))
+
+
+def percentile(sorted_values, pct):
+    """Persentil nearest-rank dari list yang sudah urut."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    total = 0
+    for endpoint, samples in sorted(recorder.samples.items()):
+        latencies = sorted(s[0] * 1000 for s in samples)
+        queries = [s[1] for s in samples]
+        total += len(samples)
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'errors': sum(1 for s in samples if not s[2]),
+            'rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'queries_avg': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+        }
+    return {'elapsed_s': round(elapsed, 3), 'requests': total,
+            'rps': round(total / elapsed, 2) if elapsed else 0.0, 'endpoints': endpoints}
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                             capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(current, baseline, threshold_pct):
+    """
+    Bandingkan dua hasil; kembalikan list (endpoint, metrik, lama, baru, regresi?).
+    Regresi = p95 naik lebih dari threshold_pct persen, atau query rata-rata naik (>= 0.5).
+    """
+    rows = []
+    for endpoint, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if before is None:
+            continue
+        for metric in ('p95_ms', 'queries_avg'):
+            old, new = before[metric], now[metric]
+            if metric == 'p95_ms':
+                worse = old > 0 and (new - old) / old * 100 > threshold_pct
+            else:
+                # rata-rata query bisa bergeser sedikit karena timing cache antar thread
+                worse = new - old >= 0.5
+            rows.append((endpoint, metric, old, new, worse))
+    return rows
+
+
+def load_result(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save_result(path, result):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(result, fh, indent=2, sort_keys=True)
@@ -0,0 +1,166 @@
+"""
+Profil per request: jumlah query, total waktu SQL, waktu render template dan
+waktu total, dikelompokkan per nama URL.
+
+- ``RequestProfileMiddleware`` memasang satu execute_wrapper permanen di tiap
+  koneksi database; query dicatat ke profil request yang aktif (contextvar,
+  ikut terbawa ke thread sync_to_async), lalu middleware menulis header ``Server-Timing``
+  (terlihat di tab Network browser) dan satu baris log ``resto.perf``.
+- ``ProfilingTemplates`` adalah backend DjangoTemplates yang mencatat waktu
+  render. Waktu template termasuk query yang dijalankan dari template
+  (mis. ``order.items.all`` yang belum di-prefetch).
+
+Waktu diukur sampai view mengembalikan response; isi StreamingHttpResponse
+yang dikirim belakangan tidak ikut terhitung.
+
+Middleware ini sync dan async: di bawah ASGI view async (SSE dapur, long-poll
+pembayaran) tidak dipaksa jalan di thread sync. Request async yang berjalan
+bersamaan bisa berbagi koneksi, karena itu wrapper tidak dipasang/dilepas per
+request (urutan push/pop akan saling menimpa).
+"""
+import contextvars
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('resto.perf')
+
+_current = contextvars.ContextVar('resto_request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.started = time.perf_counter()
+        self.total_time = None
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+
+def current_profile():
+    """Profil request yang sedang berjalan (None di luar middleware)."""
+    return _current.get()
+
+
+# ---------- template ----------
+class ProfilingTemplate(Template):
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - start
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """DjangoTemplates yang mencatat waktu render ke profil request."""
+    def from_string(self, template_code):
+        return ProfilingTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return ProfilingTemplate(template.template, self)
+
+
+# ---------- middleware ----------
+def _url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '-'
+    return match.view_name or match._func_path
+
+
+def _count_sql(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.sql_wrapper(execute, sql, params, many, context)
+
+
+def _wrap_connections():
+    """Pasang _count_sql sekali per koneksi di thread ini (di depan, supaya pop execute_wrapper lain tetap benar)."""
+    for conn in connections.all():
+        if _count_sql not in conn.execute_wrappers:
+            conn.execute_wrappers.insert(0, _count_sql)
+
+
+class RequestProfileMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        _wrap_connections()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        # koneksi database per thread: pasang di thread sync milik request ini
+        await sync_to_async(_wrap_connections)()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        profile.finish()
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = profile.server_timing()
+        self.log(request, response, profile)
+        return response
+
+    def log(self, request, response, profile):
+        data = {
+            'url_name': _url_name(request),
+            'method': request.method,
+            'status': response.status_code,
+            'queries': profile.queries,
+            'sql_ms': round(profile.sql_time * 1000, 1),
+            'tpl_ms': round(profile.template_time * 1000, 1),
+            'total_ms': round(profile.total_time * 1000, 1),
+        }
+        slow = data['total_ms'] >= getattr(settings, 'PERF_SLOW_MS', 500)
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            ' '.join(f'{k}={v}' for k, v in data.items()),
+            extra={'perf': data},
+        )
@@ -37,19 +37,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'resto.profiling.RequestProfileMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'catalog.cart.CartMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'resto.urls'
 
 TEMPLATES = [{
-'BACKEND': 'django.template.backends.django.DjangoTemplates',
+'BACKEND': 'resto.profiling.ProfilingTemplates',  # DjangoTemplates + waktu render
 'DIRS': [BASE_DIR / 'templates'],
 'APP_DIRS': True,
 'OPTIONS': {
@@ -137,3 +139,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Cache lokal per proses. Untuk banyak worker/server gunakan cache bersama
+# (Redis/Memcached) supaya versi snapshot menu konsisten di semua worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'resto-default',
+    },
+    # keranjang pelanggan (catalog.cart); produksi multi-proses: ganti ke Redis/Memcached
+    'carts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'resto-carts',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Keranjang: cookie id + isi di cache 'carts', kedaluwarsa bila tidak disentuh
+CART_COOKIE_NAME = 'resto_cart'
+CART_TTL = 60 * 60 * 24 * 3
+# Reservasi stok keranjang/order DRAFT (detik), diperpanjang setiap ada perubahan
+STOCK_RESERVATION_TTL = 15 * 60
+# Kunci idempotensi checkout (detik): POST ulang dengan kunci sama dijawab dari hasil pertama
+IDEMPOTENCY_TTL = 60 * 60 * 24
+# Pembayaran gateway (QRIS): masa berlaku QR (detik). Rahasia HMAC callback:
+# PAYMENT_GATEWAY_SECRET (default SECRET_KEY)
+PAYMENT_INTENT_TTL = 5 * 60
+
+# Nomor order: <OUTLET>-<YYMMDD>-<urut>, urutan diambil per blok per worker
+RESTO_OUTLET_CODE = 'RST'
+ORDER_NO_BLOCK_SIZE = 20
+
+# Profil per request (resto.profiling): header Server-Timing & log resto.perf
+PERF_SERVER_TIMING = True
+PERF_SLOW_MS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # WARNING: hanya request >= PERF_SLOW_MS; ganti 'INFO' untuk mencatat semua request
+        'resto.perf': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
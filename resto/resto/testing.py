@@ -0,0 +1,44 @@
+"""
+Helper test untuk anggaran query per view.
+
+    class MenuViewTests(QueryBudgetMixin, TestCase):
+        def test_budget(self):
+            with self.assertMaxQueries(6):
+                self.client.get(url)
+
+Berbeda dengan assertNumQueries (harus sama persis), di sini cukup tidak
+melebihi batas, jadi test tidak rusak kalau view jadi lebih hemat. Kalau
+melewati batas, pesan gagal memuat daftar query-nya.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        if executed > budget:
+            listing = '\n'.join(f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, 1))
+            self.fail(f"{executed} query dijalankan, anggaran {budget}:\n{listing}")
+
+    def assertScalesFlat(self, make_request, add_rows, using=DEFAULT_DB_ALIAS):
+        """
+        Jumlah query tidak boleh bertambah saat data bertambah (deteksi N+1):
+        ``make_request()`` dijalankan, ``add_rows()`` menambah data, lalu
+        ``make_request()`` lagi harus memakai query yang sama banyak.
+        """
+        with CaptureQueriesContext(connections[using]) as before:
+            make_request()
+        add_rows()
+        with CaptureQueriesContext(connections[using]) as after:
+            make_request()
+        self.assertEqual(
+            len(after.captured_queries), len(before.captured_queries),
+            "Jumlah query bertambah mengikuti jumlah data (N+1?):\n"
+            + '\n'.join(q['sql'] for q in after.captured_queries),
+        )
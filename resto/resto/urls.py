@@ -1,10 +1,15 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from orders.views import dashboard, pos_create_order, pos_add_item, pos_checkout
 from django.contrib.auth import views as auth_views
 from django.conf import settings
-from django.conf.urls.static import static
-from reports.views import sales_monthly, top_items_weekly
+from catalog.views import media_file
+from reports.views import (
+    export_orders, export_stock_movements, payments_by_method, sales_monthly, shift_current,
+    top_items_weekly, zreport_detail, zreport_escpos, zreport_list,
+)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -24,10 +29,23 @@ urlpatterns = [
     # Laporan
     path('reports/monthly/', sales_monthly, name='sales_monthly'),
     path('reports/top-weekly/', top_items_weekly, name='top_items_weekly'),
+    path('reports/payments/', payments_by_method, name='payments_by_method'),
+    path('reports/export/orders/', export_orders, name='export_orders'),
+    path('reports/export/stock-movements/', export_stock_movements, name='export_stock_movements'),
+    path('reports/shift/', shift_current, name='shift_current'),
+    path('reports/z/', zreport_list, name='zreport_list'),
+    path('reports/z/<int:pk>/', zreport_detail, name='zreport_detail'),
+    path('reports/z/<int:pk>/escpos/', zreport_escpos, name='zreport_escpos'),
+
+    # Pembayaran gateway
+    path('', include('payments.urls')),
 
     # Orders (route lain milik kasir)
     path('', include('orders.urls')),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # media lewat view sendiri supaya gambar menu berbasis hash dapat header cache panjang
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), media_file),
+    ]